@@ -0,0 +1,222 @@
+from numpy import (
+    add as np__add, array as np__array, divide as np__divide, full as np__full, float64,
+    maximum as np__maximum, nan, nanmean as np__nanmean, nanmedian as np__nanmedian,
+    nanpercentile as np__nanpercentile, nanstd as np__nanstd, ndarray, zeros as np__zeros)
+
+from OSCR import TABLE_HEADER, TreeItem
+from OSCR.combat import Combat
+
+AGGREGATE_STATISTICS = ('Mean', 'Median', 'P90', 'Std Dev')
+# columns of the damage and heal trees, see `combine_children_damage_stats` and
+# `combine_children_heal_stats` in the OSCR parser
+DAMAGE_SUM_COLUMNS = (2, 8, 9, 10, 11, 12, 13, 15, 17, 19, 20, 21)
+DAMAGE_MAX_COLUMNS = (4,)
+HEAL_SUM_COLUMNS = (2, 3, 5, 9, 10, 11, 12, 13)
+HEAL_MAX_COLUMNS = (7,)
+
+
+class FlatTree():
+    """
+    Analysis tree of one combat flattened into arrays. Each item is identified by the path of names
+    leading to it, so that items of different combats can be matched.
+    """
+    __slots__ = ('header', 'paths', 'values', 'graphs')
+
+    def __init__(self, root_item: TreeItem):
+        """
+        Parameters:
+        - :param root_item: invisible root item of the tree
+        """
+        self.header: tuple = root_item.data
+        self.paths: list[tuple] = list()
+        rows = list()
+        self.graphs: list[ndarray] = list()
+        column_count = len(root_item.data)
+        for group_index, group in enumerate(root_item._children):
+            items = [((group_index,), child) for child in reversed(group._children)]
+            while len(items) > 0:
+                parent_path, item = items.pop()
+                name = item.data[0] if isinstance(item.data, tuple) else item.data
+                if isinstance(name, tuple):
+                    name = name[:2]
+                path = (*parent_path, name)
+                self.paths.append(path)
+                if isinstance(item.data, tuple) and len(item.data) == column_count:
+                    rows.append((0, *item.data[1:]))
+                else:
+                    rows.append((0,) * column_count)
+                self.graphs.append(item.graph_data)
+                items.extend((path, child) for child in reversed(item._children))
+        self.values: ndarray = np__array(rows, dtype=float64).reshape(-1, column_count)
+
+
+class CombatColumns():
+    """
+    Numeric data of one combat extracted into arrays once, so that several combats can be
+    aggregated quickly.
+    """
+    __slots__ = ('players', 'overview', 'trees')
+
+    def __init__(self, combat: Combat):
+        """
+        Parameters:
+        - :param combat: analyzed combat
+        """
+        players = sorted((tuple(player) for player in combat.players.values()), key=lambda p: p[0])
+        self.players: list[tuple[str, str]] = [(player[0], player[1]) for player in players]
+        self.overview: ndarray = np__array(
+                [player[2:] for player in players], dtype=float64).reshape(
+                        len(players), len(TABLE_HEADER))
+        self.trees: tuple[FlatTree, ...] = tuple(FlatTree(root) for root in combat.root_items)
+
+
+class CombatAggregate():
+    """
+    Statistics of several combats: per-player statistics of the overview table columns and merged
+    analysis trees containing the totals of all combats.
+    """
+    __slots__ = ('players', 'statistics', 'root_items')
+
+    def __init__(self, combats: list[CombatColumns]):
+        """
+        Parameters:
+        - :param combats: extracted data of the combats to aggregate
+        """
+        player_rows = dict()
+        for combat in combats:
+            for player in combat.players:
+                player_rows.setdefault(player, len(player_rows))
+        self.players: list[tuple[str, str]] = list(player_rows)
+        column_count = max(combat.overview.shape[1] for combat in combats)
+        table = np__full((len(player_rows), len(combats), column_count), nan)
+        for combat_index, combat in enumerate(combats):
+            rows = [player_rows[player] for player in combat.players]
+            table[rows, combat_index] = combat.overview
+        self.statistics: dict[str, ndarray] = {
+            'Mean': np__nanmean(table, axis=1),
+            'Median': np__nanmedian(table, axis=1),
+            'P90': np__nanpercentile(table, 90, axis=1),
+            'Std Dev': np__nanstd(table, axis=1)
+        }
+        self.root_items: tuple[TreeItem, ...] = (
+            merge_trees([combat.trees[0] for combat in combats], heal=False),
+            merge_trees([combat.trees[1] for combat in combats], heal=False),
+            merge_trees([combat.trees[2] for combat in combats], heal=True),
+            merge_trees([combat.trees[3] for combat in combats], heal=True))
+
+    def get_table(self, statistic: str) -> list[list]:
+        """
+        Returns overview table rows containing `statistic` of every column.
+
+        Parameters:
+        - :param statistic: one of `AGGREGATE_STATISTICS`
+        """
+        return self.statistics[statistic].round(2).tolist()
+
+
+def merge_trees(trees: list[FlatTree], heal: bool) -> TreeItem:
+    """
+    Merges analysis trees of several combats into a new tree. Items with the same path are
+    combined: absolute numbers are summed, maxima are kept and rates are recalculated from the
+    sums. Graphs are aligned at the start of their combat and summed.
+
+    Parameters:
+    - :param trees: flattened trees to merge
+    - :param heal: True for heal trees, False for damage trees
+
+    :return: root item of the merged tree
+    """
+    header = trees[0].header
+    column_count = len(header)
+    path_rows: dict[tuple, int] = dict()
+    row_indices = list()
+    for tree in trees:
+        row_indices.append(
+                np__array([path_rows.setdefault(path, len(path_rows)) for path in tree.paths],
+                          dtype=int))
+    graph_length = max(
+            (getattr(graph, 'size', 0) for tree in trees for graph in tree.graphs), default=0)
+    values = np__zeros((len(path_rows), column_count), dtype=float64)
+    graphs = np__zeros((len(path_rows), graph_length), dtype=float64)
+    sum_columns = list(HEAL_SUM_COLUMNS if heal else DAMAGE_SUM_COLUMNS)
+    max_columns = list(HEAL_MAX_COLUMNS if heal else DAMAGE_MAX_COLUMNS)
+    for tree, rows in zip(trees, row_indices):
+        if len(rows) == 0:
+            continue
+        np__add.at(values, (rows[:, None], sum_columns), tree.values[:, sum_columns])
+        for column in max_columns:
+            np__maximum.at(values[:, column], rows, tree.values[:, column])
+        for row, graph in zip(rows, tree.graphs):
+            length = getattr(graph, 'size', 0)
+            if length > 0:
+                graphs[row, :length] += graph
+    if heal:
+        calculate_heal_rates(values)
+    else:
+        calculate_damage_rates(values)
+
+    root = TreeItem(header, None)
+    groups = (
+        TreeItem(['Player'] + [''] * (column_count - 1), root),
+        TreeItem(['NPC'] + [''] * (column_count - 1), root))
+    for group in groups:
+        root.append_child(group)
+    items: dict[tuple, TreeItem] = dict()
+    group_rows = ([], [])
+    for path, row in path_rows.items():
+        if len(path) == 2:
+            parent = groups[path[0]]
+            group_rows[path[0]].append(row)
+        else:
+            parent = items[path[:-1]]
+        row_values = values[row].tolist()
+        row_values[0] = path[-1]
+        row_values[11 if heal else 19] = round(row_values[11 if heal else 19], 1)
+        item = TreeItem(tuple(row_values), parent)
+        item.graph_data = graphs[row]
+        parent.append_child(item)
+        items[path] = item
+    for group, rows in zip(groups, group_rows):
+        group.graph_data = graphs[rows].sum(axis=0)
+    return root
+
+
+def calculate_damage_rates(values: ndarray):
+    """
+    Calculates DPS, debuff, crit chance, accuracy and flank rate of damage tree rows from their
+    summed columns. Modifies `values` in place.
+
+    Parameters:
+    - :param values: rows of a damage tree
+    """
+    combat_time = values[:, 19]
+    successful_attacks = values[:, 20] - values[:, 10]
+    for rate_column, total_column in ((1, 2), (14, 13), (16, 15), (18, 17)):
+        safe_divide(values[:, total_column], combat_time, values[:, rate_column])
+    safe_divide(values[:, 2], values[:, 17], values[:, 3])
+    values[values[:, 17] != 0, 3] -= 1
+    safe_divide(values[:, 11], successful_attacks, values[:, 5])
+    safe_divide(successful_attacks, values[:, 20], values[:, 6])
+    safe_divide(values[:, 12], successful_attacks, values[:, 7])
+
+
+def calculate_heal_rates(values: ndarray):
+    """
+    Calculates HPS and crit chance of heal tree rows from their summed columns. Modifies `values`
+    in place.
+
+    Parameters:
+    - :param values: rows of a heal tree
+    """
+    combat_time = values[:, 11]
+    for rate_column, total_column in ((1, 2), (4, 3), (6, 5)):
+        safe_divide(values[:, total_column], combat_time, values[:, rate_column])
+    safe_divide(values[:, 10], values[:, 12], values[:, 8])
+
+
+def safe_divide(dividend: ndarray, divisor: ndarray, out: ndarray):
+    """
+    Divides `dividend` by `divisor` elementwise into `out`; results of divisions by zero are zero.
+    """
+    out[:] = 0
+    np__divide(dividend, divisor, out=out, where=divisor != 0)
@@ -1,8 +1,12 @@
-from numpy import linspace as np__linspace, median as np__median, subtract as np__subtract
-from pyqtgraph import BarGraphItem, mkPen
+from numpy import (
+    concatenate as np__concatenate, linspace as np__linspace, median as np__median,
+    subtract as np__subtract)
+from pyqtgraph import BarGraphItem, mkBrush, mkPen
 
 from .config import OSCRSettings
 from .theme import AppTheme
+from .timeseries import (
+    DamageTimeline, envelope, finer_resolution, SeriesPyramid, visible_slice)
 from .widgets import AnalysisPlot, LegendPlot
 
 
@@ -27,8 +31,8 @@ class AnalysisGraphs():
         """
         self.dps_bar_plot = LegendPlot(self._theme, y_font='app')
         self.dps_bar_plot.set_padding_fraction(0.01)
-        self.dps_graph_plot = LegendPlot(self._theme, x_unit='s')
-        self.dmg_bar_plot = LegendPlot(self._theme, x_unit='s')
+        self.dps_graph_plot = LegendPlot(self._theme, x_unit='s', zoomable=True)
+        self.dmg_bar_plot = LegendPlot(self._theme, x_unit='s', zoomable=True)
 
     def clear_overview_plots(self):
         """
@@ -40,7 +44,8 @@ class AnalysisGraphs():
 
     def plot_overview_data(
             self, overview_table: list[list], dps_graph_data: dict[str, tuple],
-            dmg_bar_data: dict[str, tuple], time_data: dict[str, tuple]):
+            dmg_bar_data: dict[str, tuple], time_data: dict[str, tuple],
+            timelines: dict[str, DamageTimeline] | None = None):
         """
         Plots overview data into DPS bar, DPS line graph and Damage bar plot widgets.
 
@@ -49,12 +54,13 @@ class AnalysisGraphs():
         - :param dps_graph_data: DPS history data
         - :param dmg_bar_data: DMG history data
         - :param time_data: time reference to plot history data against
+        - :param timelines: damage timelines of the players, used to show details when zooming in
         """
         self.plot_horizontal_bar(overview_table, self.dps_bar_plot)
         self.dps_bar_plot.show_plot()
-        self.plot_graph(dps_graph_data, time_data, self.dps_graph_plot)
+        self.plot_graph(dps_graph_data, time_data, self.dps_graph_plot, timelines)
         self.dps_graph_plot.show_plot()
-        self.plot_grouped_bars(dmg_bar_data, time_data, self.dmg_bar_plot)
+        self.plot_grouped_bars(dmg_bar_data, time_data, self.dmg_bar_plot, timelines)
         self.dmg_bar_plot.show_plot()
 
     def plot_horizontal_bar(self, table: list[list], plot_widget: LegendPlot):
@@ -78,7 +84,7 @@ class AnalysisGraphs():
 
     def plot_graph(
             self, data: dict[str, tuple], time_reference: dict[str, tuple],
-            plot_widget: LegendPlot):
+            plot_widget: LegendPlot, timelines: dict[str, DamageTimeline] | None = None):
         """
         Creates line plot from data and returns layout that countins the plot.
 
@@ -86,21 +92,49 @@ class AnalysisGraphs():
         - :param data: dictionary containing the data to be plotted
         - :param time_reference: contains the time values for the data points
         - :param plot_widget: graph widget that will be plotted to
+        - :param timelines: damage timelines used to compute finer DPS graphs when zooming in
 
         :return: layout containing the graph
         """
         legend_data = list()
+        curves = list()
         plot_widget.clear()
+        if timelines is None:
+            timelines = dict()
         for (player, graph_data), color in zip(data.items(), self._theme['plot']['color_cycler']):
             if player in time_reference:
-                time_data = time_reference[player]
-                plot_widget.plot(time_data, graph_data, pen=mkPen(color, width=1.5))
+                pyramid = self.get_pyramid(time_reference[player], graph_data)
+                if pyramid is None:
+                    continue
+                curve = plot_widget.plot([], [], pen=mkPen(color, width=1.5))
+                curves.append((curve, pyramid, timelines.get(player, None)))
                 legend_data.append((color, player))
         plot_widget.create_legend(legend_data)
+        if len(curves) > 0:
+            self.set_time_range(plot_widget, [pyramid for _, pyramid, _ in curves])
+
+            def update_curves(x_min: float, x_max: float, pixel_width: float):
+                for curve, pyramid, timeline in curves:
+                    resolution = None
+                    if timeline is not None:
+                        resolution = finer_resolution(pyramid.step, x_min, x_max, pixel_width)
+                    if resolution is not None:
+                        time, _, dps = timeline.bin(resolution)
+                        visible = visible_slice(time, x_min, x_max)
+                        curve.setData(time[visible], dps[visible])
+                        continue
+                    level = pyramid.select_level(x_min, x_max, pixel_width)
+                    time, lower, upper, mean = pyramid.get(level)
+                    visible = visible_slice(time, x_min, x_max)
+                    if level == 0:
+                        curve.setData(time[visible], mean[visible])
+                    else:
+                        curve.setData(*envelope(time[visible], lower[visible], upper[visible]))
+            plot_widget.set_level_of_detail_callback(update_curves)
 
     def plot_grouped_bars(
             self, data: dict[str, tuple], time_reference: dict[str, tuple],
-            plot_widget: LegendPlot):
+            plot_widget: LegendPlot, timelines: dict[str, DamageTimeline] | None = None):
         """
         Creates a bar plot with grouped bars.
 
@@ -108,27 +142,89 @@ class AnalysisGraphs():
         - :param data: dictionary containing the data to be plotted
         - :param time_reference: contains the time values for the data points
         - :param plot_widget: bar widget that will be plotted to (supplied by decorator)
+        - :param timelines: damage timelines used to compute finer bars when zooming in
 
         :return: layout containing the graph (returned by decorator)
         """
         legend_data = list()
-        group_width = self._settings.graph_resolution * 0.9
+        series = list()
         player_num = len(data)
         if player_num == 0:
             return
-        bar_width = group_width / player_num
-        relative_bar_positions = np__linspace(
-            0 + bar_width / 2, group_width - bar_width / 2, player_num)
+        relative_bar_positions = np__linspace(0.5 / player_num, 1 - 0.5 / player_num, player_num)
         bar_position_offsets = relative_bar_positions - np__median(relative_bar_positions)
 
         plot_widget.clear()
+        if timelines is None:
+            timelines = dict()
         zipper = zip(data.items(), self._theme['plot']['color_cycler'], bar_position_offsets)
         for (player, graph_data), color, offset in zipper:
             if player in time_reference:
-                time_data = np__subtract(time_reference[player], offset)
-                bars = BarGraphItem(
-                        x=time_data, width=bar_width, height=graph_data, brush=color, pen=None,
-                        name=player)
-                plot_widget.add_item(bars)
+                pyramid = self.get_pyramid(time_reference[player], graph_data)
+                if pyramid is None:
+                    continue
+                series.append((mkBrush(color), pyramid, offset, timelines.get(player, None)))
                 legend_data.append((color, player))
         plot_widget.create_legend(legend_data)
+        if len(series) > 0:
+            bars = BarGraphItem(x=[], width=1, height=[], brushes=[], pen=None)
+            plot_widget.add_item(bars)
+            self.set_time_range(plot_widget, [pyramid for _, pyramid, _, _ in series])
+
+            def update_bars(x_min: float, x_max: float, pixel_width: float):
+                bar_x = list()
+                bar_heights = list()
+                bar_brushes = list()
+                group_width = 0
+                points_per_pixel = 1 / player_num
+                for brush, pyramid, offset, timeline in series:
+                    resolution = None
+                    if timeline is not None:
+                        resolution = finer_resolution(
+                                pyramid.step, x_min, x_max, pixel_width, points_per_pixel)
+                    if resolution is not None:
+                        time, damage, _ = timeline.bin(resolution)
+                        # scaled to damage per base interval to keep the scale when zooming
+                        heights = damage * (pyramid.step / resolution)
+                        group_width = resolution * 0.9
+                    else:
+                        level = pyramid.select_level(x_min, x_max, pixel_width, points_per_pixel)
+                        time, _, _, heights = pyramid.get(level)
+                        group_width = pyramid.level_step(level) * 0.9
+                    visible = visible_slice(time, x_min, x_max)
+                    bar_x.append(np__subtract(time[visible], offset * group_width))
+                    bar_heights.append(heights[visible])
+                    bar_brushes.extend([brush] * len(bar_x[-1]))
+                bars.setOpts(
+                        x=np__concatenate(bar_x), height=np__concatenate(bar_heights),
+                        width=group_width / player_num, brushes=bar_brushes)
+            plot_widget.set_level_of_detail_callback(update_bars)
+
+    def set_time_range(self, plot_widget: LegendPlot, pyramids: list[SeriesPyramid]):
+        """
+        Sets x-range of the plot to contain the full time range of all series.
+
+        Parameters:
+        - :param plot_widget: plot to set the range of
+        - :param pyramids: pyramids of all series shown in the plot
+        """
+        start = min(pyramid.start for pyramid in pyramids)
+        end = max(pyramid.start + pyramid.step * len(pyramid.levels[0][2]) for pyramid in pyramids)
+        step = max(pyramid.step for pyramid in pyramids)
+        plot_widget.set_home_range(start - step / 2, end - step / 2)
+
+    def get_pyramid(self, time_data, graph_data) -> SeriesPyramid | None:
+        """
+        Creates level-of-detail pyramid from time and graph data. Returns `None` for empty series.
+
+        Parameters:
+        - :param time_data: evenly spaced time values
+        - :param graph_data: values belonging to the time values
+        """
+        if len(graph_data) == 0:
+            return None
+        if len(time_data) > 1:
+            step = time_data[1] - time_data[0]
+        else:
+            step = self._settings.graph_resolution
+        return SeriesPyramid(time_data[0], step, graph_data)
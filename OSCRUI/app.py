@@ -7,16 +7,21 @@ from PySide6.QtWidgets import (
     QTabWidget, QTableView, QTreeView, QVBoxLayout, QHBoxLayout, QGridLayout)
 from PySide6.QtCore import QDir, QSize, QTimer, QThread
 from PySide6.QtGui import (
-    QCloseEvent, QFontDatabase, QIntValidator, QKeySequence, QResizeEvent, QShortcut)
+    QCloseEvent, QIntValidator, QKeySequence, QResizeEvent, QShortcut)
 
-from OSCR import LIVE_TABLE_HEADER, TABLE_HEADER, TREE_HEADER, HEAL_TREE_HEADER
+from OSCR import TABLE_HEADER, TREE_HEADER, HEAL_TREE_HEADER
 from .analysisgraphs import AnalysisGraphs
 from .analysistables import AnalysisTables
+from .combatexport import EXPORT_FORMATS
 from .config import OSCRConfig, OSCRSettings
+from .aggregate import AGGREGATE_STATISTICS
 from .datamodels import SortingProxy, TreeModel, TreeSelectionModel
 from .dialogs import DetectionInfoDialog, DialogsWrapper, UploadresultDialog
-from .iofunctions import browse_path, get_asset_path, load_icon_series, load_icon
-from .liveparser import LiveParserWindow
+from .iofunctions import (
+    browse_path, get_asset_path, load_icon_series, load_icon, register_fonts)
+from .liveoverlay import LiveOverlayHost
+from .liveparser import LIVE_PARSER_HEADER, LiveParserWindow
+from .library import CombatLibrary
 from .leagueconnector import OSCRLeagueConnector
 from .parserbridge import ParserBridge
 from .sidebar import OSCRLeftSidebar
@@ -26,7 +31,7 @@ from .theme import AppTheme
 from .translation import init_translation, tr
 from .widgetbuilder import (
     ABOTTOM, ACENTER, AHCENTER, ALEFT, ARIGHT, ATOP, AVCENTER, OVERTICAL, SMAXMAX, SMAXMIN,
-    SMINMAX, SMINMIN, SMIXMAX, SCROLLOFF, SCROLLON,
+    RFIXED, SMINMAX, SMINMIN, SMIXMAX, SCROLLOFF, SCROLLON,
     create_annotated_slider, create_button, create_button_series, create_combo_box, create_entry,
     create_frame, create_icon_button, create_label)
 from .widgetmanager import WidgetManager
@@ -78,6 +83,8 @@ class OSCRUI():
         self.status_bar: StatusBar = StatusBar(self.theme, self.window)
         self.live_parser: LiveParserWindow = LiveParserWindow(
             self.settings, self.theme, self.dialogs, self.widgets)
+        self.live_overlay: LiveOverlayHost = LiveOverlayHost(
+            self.settings, self.config, self.dialogs, self.app_dir)
         self.parser: ParserBridge = ParserBridge(
             self.settings, self.config, self.widgets, self.dialogs)
         self.parser._tables = self.tables
@@ -87,15 +94,19 @@ class OSCRUI():
         self.league: OSCRLeagueConnector = OSCRLeagueConnector(
             self.widgets, self.dialogs, self.theme, self.config, self.parser, self.upload_dialog)
         self.league.status_message.connect(self.status_bar.status_message)
+        self.library: CombatLibrary = CombatLibrary(
+            Path(self.config.config_dir, self.config.library_file), self.parser)
+        self.library.status_message.connect(self.status_bar.status_message)
         self.sidebar: OSCRLeftSidebar = OSCRLeftSidebar(
             version, self.window, self.parser, self.detection_info, self.dialogs, self.widgets,
-            self.league, self.theme, self.config, self.settings)
+            self.league, self.library, self.tables, self.theme, self.config, self.settings)
         self.copy_shortcut: QShortcut = QShortcut(
             QKeySequence.StandardKey.Copy, self.window, self.copy_analysis_table_callback)
         self.setup_main_layout()
 
         # Showing window
         self.window.show()
+        self.league.resume_uploads()
         if self.settings.auto_scan:
             QTimer.singleShot(
                 100,
@@ -140,6 +151,8 @@ class OSCRUI():
             'live-parser': 'live-parser.svg',
             'freeze': 'snowflake.svg',
             'clear-plot': 'clear-plot.svg',
+            'plot-lines': 'plot-lines.svg',
+            'plot-stacked': 'plot-stacked.svg',
             'error': 'error.svg',
             'warning': 'warning.svg',
             'info': 'info.svg',
@@ -148,7 +161,10 @@ class OSCRUI():
             'TFO-normal': 'TFO_normal.png',
             'TFO-advanced': 'TFO_advanced.png',
             'TFO-elite': 'TFO_elite.png',
-            'json': 'json.svg'
+            'json': 'json.svg',
+            'aggregate': 'aggregate.svg',
+            'library': 'library.svg',
+            'export-all': 'export-all.svg'
         }
         self.theme.icons = load_icon_series(icons, self.app_dir)
 
@@ -213,7 +229,10 @@ class OSCRUI():
         Prepares config.
         """
         self.config.ui_scale = self.settings.ui_scale
+        self.config.league_server = self.settings.league_server
         self.config.templog_folder_path = self.config.config_dir / self.config.templog_folder_name
+        self.config.league_log_folder_path = (
+                self.config.config_dir / self.config.league_log_folder_name)
         if os.name == 'nt':
             self.config.home_dir = os.getenv('USERPROFILE') + '/'
         else:
@@ -233,6 +252,9 @@ class OSCRUI():
         """
         if self.live_parser.isVisible():
             self.live_parser.toggle_window(False)
+        self.live_overlay.shutdown()
+        self.library.cancel_scan()
+        self.league.shutdown()
         self.settings.state__geometry = self.window.saveGeometry()
         self.settings.state__overview_splitter = self.widgets.overview_splitter.saveState()
         self.settings.state__analysis_splitter = self.widgets.analysis_splitter.saveState()
@@ -246,6 +268,32 @@ class OSCRUI():
         self.widgets.sidebar_tabber.setFixedWidth(self.sidebar_item_width)
         event.accept()
 
+    def toggle_live_parser(self, activate: bool):
+        """
+        Shows / Hides the live parser, either in this process or as overlay in a separate process.
+
+        Parameters:
+        - :param activate: True when parser should be shown; False when open parser should be
+        closed.
+        """
+        if self.live_overlay.running or (
+                activate and self.settings.liveparser__separate_process
+                and not self.live_parser.isVisible()):
+            self.live_overlay.toggle_window(activate)
+        else:
+            self.live_parser.toggle_window(activate)
+
+    def set_graph_resolution_callback(self, new_value: int) -> float:
+        """
+        Stores new graph resolution and re-bins the graphs of the current combat.
+
+        Parameters:
+        - :param new_value: 10 times the graph resolution
+        """
+        graph_resolution = self.settings.set_graph_resolution(new_value)
+        self.parser.update_graph_resolution()
+        return graph_resolution
+
     def set_sto_logpath_callback(self, logpath_entry: QLineEdit):
         """
         Formats and stores new logpath to `sto_log_path`.
@@ -257,6 +305,20 @@ class OSCRUI():
         self.settings.sto_log_path = formatted_path
         logpath_entry.setText(formatted_path)
 
+    def set_league_server_callback(self, server_entry: QLineEdit):
+        """
+        Stores new league server to `league_server` and reconnects to it if it changed.
+
+        Parameters:
+        - :param server_entry: the entry that holds the server address
+        """
+        server = server_entry.text().strip().rstrip('/')
+        server_entry.setText(server)
+        if server != self.settings.league_server:
+            self.settings.league_server = server
+            self.config.league_server = server
+            self.league.reset_connection()
+
     def copy_analysis_table_callback(self):
         """
         Copies the current selection of analysis table as tab-delimited table.
@@ -293,12 +355,7 @@ class OSCRUI():
         """
         app = QApplication(argv)
         QThread.currentThread().setPriority(QThread.Priority.TimeCriticalPriority)
-        font_database = QFontDatabase()
-        font_database.addApplicationFont(get_asset_path('Overpass-Bold.ttf', self.app_dir))
-        font_database.addApplicationFont(get_asset_path('Overpass-Medium.ttf', self.app_dir))
-        font_database.addApplicationFont(get_asset_path('Overpass-Regular.ttf', self.app_dir))
-        font_database.addApplicationFont(get_asset_path('RobotoMono-Regular.ttf', self.app_dir))
-        font_database.addApplicationFont(get_asset_path('RobotoMono-Medium.ttf', self.app_dir))
+        register_fonts(self.app_dir)
         app.setStyleSheet(self.theme.create_style_sheet(self.theme['app']['style']))
         window = QWidget()
         window.setMinimumSize(
@@ -478,6 +535,14 @@ class OSCRUI():
         icon_layout = QHBoxLayout()
         icon_layout.setContentsMargins(0, 0, 0, 0)
         icon_layout.setSpacing(self.theme['defaults']['csp'])
+        aggregate_statistic_combo = create_combo_box(self.theme)
+        aggregate_statistic_combo.addItems(tr(AGGREGATE_STATISTICS))
+        aggregate_statistic_combo.setToolTip(tr('Statistic of the aggregated combats'))
+        aggregate_statistic_combo.currentIndexChanged.connect(
+            lambda new_index: self.parser.set_aggregate_statistic(AGGREGATE_STATISTICS[new_index]))
+        aggregate_statistic_combo.hide()
+        icon_layout.addWidget(aggregate_statistic_combo)
+        self.widgets.aggregate_statistic_combo = aggregate_statistic_combo
         copy_button = create_icon_button(self.theme, 'copy', tr('Copy Result'))
         copy_button.clicked.connect(self.parser.copy_summary_data)
         icon_layout.addWidget(copy_button)
@@ -539,7 +604,7 @@ class OSCRUI():
         plot_legend_layout.setContentsMargins(0, 0, 0, 0)
         plot_legend_layout.setSpacing(2 * self.theme['defaults']['margin'])
         plot_legend_frame.setLayout(plot_legend_layout)
-        plot_widget = AnalysisPlot(self.theme, self.theme['plot']['color_cycler'])
+        plot_widget = AnalysisPlot(self.theme, self.theme['plot']['color_cycler'], tree_model)
         plot_widget.setStyleSheet(self.theme.get_style('plot_widget_nullifier'))
         plot_widget.setSizePolicy(SMINMAX)
         plot_bundle_layout.addWidget(plot_widget)
@@ -560,6 +625,12 @@ class OSCRUI():
         clear_button = create_icon_button(self.theme, 'clear-plot', tr('Clear Graph'))
         clear_button.clicked.connect(plot_widget.clear)
         plot_button_layout.addWidget(clear_button, alignment=ATOP)
+        plot_lines_button = create_icon_button(
+            self.theme, 'plot-lines', tr('Plot Selected Rows as Lines'))
+        plot_button_layout.addWidget(plot_lines_button, alignment=ATOP)
+        plot_stacked_button = create_icon_button(
+            self.theme, 'plot-stacked', tr('Plot Selected Rows as Stacked Areas'))
+        plot_button_layout.addWidget(plot_stacked_button, alignment=ATOP)
         plot_button_frame.setLayout(plot_button_layout)
         graph_layout.addWidget(plot_button_frame, stretch=0)
         graph_frame.setLayout(graph_layout)
@@ -576,8 +647,13 @@ class OSCRUI():
             self.theme.get_font('tree_table_header'), self.theme.get_font('tree_table'),
             self.theme.get_font('tree_table_cells'))
         tree.setModel(tree_model)
-        tree.setSelectionModel(TreeSelectionModel(tree_model))
+        selection_model = TreeSelectionModel(tree_model)
+        tree.setSelectionModel(selection_model)
         tree.clicked.connect(lambda index, pw=plot_widget: pw.add_bar(index.internalPointer()))
+        plot_lines_button.clicked.connect(
+            lambda: plot_widget.plot_selection(selection_model.selected_items()))
+        plot_stacked_button.clicked.connect(
+            lambda: plot_widget.plot_selection(selection_model.selected_items(), stacked=True))
         tree_layout.addWidget(tree)
         tree_frame.setLayout(tree_layout)
         return tree, plot_widget
@@ -698,7 +774,9 @@ class OSCRUI():
         self.tables.style_table(ladder_table, table_style, single_row_selection=True)
         self.league.ladder_table_model.init_fonts(
             self.theme.get_font('table_header'), self.theme.get_font('table'))
+        ladder_table.verticalHeader().setSectionResizeMode(RFIXED)
         ladder_table.setModel(self.league.ladder_table_sort)
+        ladder_table.verticalScrollBar().valueChanged.connect(self.league.prefetch_ladder)
         self.widgets.ladder_table = ladder_table
         layout.addWidget(ladder_table, stretch=1)
 
@@ -708,7 +786,7 @@ class OSCRUI():
         control_layout.setColumnStretch(2, 1)
         search_bar = create_entry(
             self.theme, placeholder=tr('name@handle'), style_override={'margin-top': 0})
-        search_bar.textChanged.connect(lambda t: setattr(self.league, 'current_filter_term', t))
+        search_bar.textChanged.connect(self.league.set_filter_term)
         control_layout.addWidget(search_bar, 0, 0, alignment=AVCENTER)
         self.widgets.ladder_search = search_bar
         search_style = {
@@ -773,9 +851,11 @@ class OSCRUI():
         live_parser_button = create_icon_button(
             self.theme, 'live-parser', tr('Live Parser'), 'live_icon_button', icon_size=size)
         live_parser_button.setCheckable(True)
-        live_parser_button.clicked[bool].connect(self.live_parser.toggle_window)
+        live_parser_button.clicked[bool].connect(self.toggle_live_parser)
         menu_layout.addWidget(live_parser_button, 0, 2)
         self.widgets.live_parser_button = live_parser_button
+        self.live_parser.closed.connect(lambda: live_parser_button.setChecked(False))
+        self.live_overlay.closed.connect(lambda: live_parser_button.setChecked(False))
         menu_frame.setLayout(menu_layout)
 
         w = self.theme['app']['frame_thickness']
@@ -869,7 +949,7 @@ class OSCRUI():
         sec_1.addWidget(graph_resolution_label, 3, 0, alignment=ARIGHT)
         graph_resolution_layout = create_annotated_slider(
             self.theme, self.settings.graph_resolution * 10, 1, 20,
-            callback=self.settings.set_graph_resolution)
+            callback=self.set_graph_resolution_callback)
         sec_1.addLayout(graph_resolution_layout, 3, 1, alignment=ALEFT)
 
         overview_sort_label = create_label(
@@ -999,19 +1079,34 @@ class OSCRUI():
             live_enabled_button.flip()
         sec_1.addWidget(live_enabled_button, 15, 1, alignment=ALEFT)
 
+        live_process_label = create_label(
+            self.theme, tr('LiveParser in separate process:'), 'label_subhead')
+        sec_1.addWidget(live_process_label, 16, 0, alignment=ARIGHT)
+        live_process_button = FlipButton(tr('Disabled'), tr('Enabled'), checkable=True)
+        live_process_button.setStyleSheet(self.theme.get_style_class(
+            'QPushButton', 'toggle_button', override={'margin-top': 0, 'margin-left': 0}))
+        live_process_button.setFont(self.theme.get_font('app', '@font'))
+        live_process_button.r_function = (
+            lambda: self.settings.set('liveparser__separate_process', True))
+        live_process_button.l_function = (
+            lambda: self.settings.set('liveparser__separate_process', False))
+        if self.settings.liveparser__separate_process:
+            live_process_button.flip()
+        sec_1.addWidget(live_process_button, 16, 1, alignment=ALEFT)
+
         result_format_label = create_label(
             self.theme, tr('Result Clipboard Format:'), 'label_subhead')
-        sec_1.addWidget(result_format_label, 16, 0, alignment=ARIGHT)
+        sec_1.addWidget(result_format_label, 17, 0, alignment=ARIGHT)
         result_format_combo = create_combo_box(self.theme, style_override={'font': '@small_text'})
         result_format_combo.addItems(('Compact', 'Verbose', 'CSV'))
         result_format_combo.setCurrentText(self.settings.copy_format)
         result_format_combo.currentTextChanged.connect(
             lambda new_text: self.settings.set('copy_format', new_text))
-        sec_1.addWidget(result_format_combo, 16, 1, alignment=ALEFT)
+        sec_1.addWidget(result_format_combo, 17, 1, alignment=ALEFT)
 
         live_copy_label = create_label(
             self.theme, tr('Show kills in LiveParser Copy:'), 'label_subhead')
-        sec_1.addWidget(live_copy_label, 17, 0, alignment=ARIGHT)
+        sec_1.addWidget(live_copy_label, 18, 0, alignment=ARIGHT)
         live_copy_button = FlipButton(tr('Disabled'), tr('Enabled'), checkable=True)
         live_copy_button.setStyleSheet(self.theme.get_style_class(
                 'QPushButton', 'toggle_button', override={'margin-top': 0, 'margin-left': 0}))
@@ -1020,19 +1115,56 @@ class OSCRUI():
         live_copy_button.l_function = lambda: self.settings.set('liveparser__copy_kills', False)
         if self.settings.liveparser__copy_kills:
             live_copy_button.flip()
-        sec_1.addWidget(live_copy_button, 17, 1, alignment=ALEFT)
+        sec_1.addWidget(live_copy_button, 18, 1, alignment=ALEFT)
 
         languages = ('English',)  # 'Chinese', 'German')
         language_codes = ('en',)  # 'zh', 'de')
         language_label = create_label(self.theme, tr('Language:'), 'label_subhead')
-        sec_1.addWidget(language_label, 18, 0, alignment=ARIGHT)
+        sec_1.addWidget(language_label, 19, 0, alignment=ARIGHT)
         language_combo = create_combo_box(self.theme, style_override={'font': '@small_text'})
         language_combo.addItems(languages)
         current_language_code = self.settings.language
         language_combo.setCurrentText(languages[language_codes.index(current_language_code)])
         language_combo.currentIndexChanged.connect(
             lambda index: self.settings.set('language', language_codes[index]))
-        sec_1.addWidget(language_combo, 18, 1, alignment=ALEFT | AVCENTER)
+        sec_1.addWidget(language_combo, 19, 1, alignment=ALEFT | AVCENTER)
+
+        export_format_label = create_label(self.theme, tr('Combat export format:'), 'label_subhead')
+        sec_1.addWidget(export_format_label, 20, 0, alignment=ARIGHT)
+        export_format_combo = create_combo_box(
+            self.theme, style_override={'font': '@small_text'})
+        export_formats = tuple(EXPORT_FORMATS)
+        export_format_combo.addItems(EXPORT_FORMATS.values())
+        if self.settings.export_format in export_formats:
+            export_format_combo.setCurrentIndex(export_formats.index(self.settings.export_format))
+        export_format_combo.currentIndexChanged.connect(
+            lambda index: self.settings.set('export_format', export_formats[index]))
+        sec_1.addWidget(export_format_combo, 20, 1, alignment=ALEFT | AVCENTER)
+
+        archive_trimmed_label = create_label(
+            self.theme, tr('Archive trimmed combats:'), 'label_subhead')
+        sec_1.addWidget(archive_trimmed_label, 21, 0, alignment=ARIGHT)
+        archive_trimmed_button = FlipButton(tr('Disabled'), tr('Enabled'), checkable=True)
+        archive_trimmed_button.setStyleSheet(self.theme.get_style_class(
+                'QPushButton', 'toggle_button', override={'margin-top': 0, 'margin-left': 0}))
+        archive_trimmed_button.setFont(self.theme.get_font('app', '@font'))
+        archive_trimmed_button.r_function = (
+            lambda: self.settings.set('archive_trimmed_logs', True))
+        archive_trimmed_button.l_function = (
+            lambda: self.settings.set('archive_trimmed_logs', False))
+        if self.settings.archive_trimmed_logs:
+            archive_trimmed_button.flip()
+        sec_1.addWidget(archive_trimmed_button, 21, 1, alignment=ALEFT)
+
+        league_server_label = create_label(self.theme, tr('League Server:'), 'label_subhead')
+        sec_1.addWidget(league_server_label, 22, 0, alignment=ARIGHT)
+        league_server_entry = create_entry(
+            self.theme, self.settings.league_server, style_override={'margin-top': 0},
+            placeholder=tr('Official server'))
+        league_server_entry.setSizePolicy(SMIXMAX)
+        league_server_entry.editingFinished.connect(
+            lambda: self.set_league_server_callback(league_server_entry))
+        sec_1.addWidget(league_server_entry, 22, 1, alignment=AVCENTER)
         scroll_layout.addLayout(sec_1)
 
         # seperator
@@ -1103,7 +1235,7 @@ class OSCRUI():
         live_hider_layout = QVBoxLayout()
         live_hider_frame = create_frame(
             self.theme, size_policy=SMINMAX, style_override=hider_frame_style_override)
-        for i, head in enumerate(tr(LIVE_TABLE_HEADER)):
+        for i, head in enumerate(tr(LIVE_PARSER_HEADER)):
             bt = create_button(
                 self.theme, head, 'toggle_button', toggle=self.settings.liveparser__columns[i])
             bt.setSizePolicy(SMINMAX)
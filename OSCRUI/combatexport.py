@@ -0,0 +1,191 @@
+"""Exports analyzed combats to JSON and NumPy files"""
+
+from datetime import datetime
+from gzip import open as gzip_open
+import json
+from pathlib import Path
+from typing import TextIO
+
+from numpy import array as np__array, float64, savez_compressed, str_, zeros as np__zeros
+
+from OSCR import HEAL_TREE_HEADER, TREE_HEADER, TreeItem
+from OSCR.combat import Combat
+
+try:
+    from compression.zstd import open as zstd_open
+except ImportError:
+    zstd_open = None
+
+# file extension -> name of the format, shown in file dialogs and settings
+EXPORT_FORMATS = {
+    '.json': 'JSON',
+    '.json.gz': 'JSON (gzip)',
+    '.json.zst': 'JSON (zstd)',
+    '.npz': 'NumPy Archive'
+}
+if zstd_open is None:
+    del EXPORT_FORMATS['.json.zst']
+EXPORT_TABLES = ('damage_out', 'damage_in', 'heals_out', 'heals_in')
+EXPORT_WORKERS = 8
+GZIP_COMPRESSION_LEVEL = 6
+
+
+def get_export_format(path: Path) -> str:
+    """
+    Returns export format of `path` determined by its file extension; defaults to `.json`.
+    """
+    name = path.name.casefold()
+    for extension in EXPORT_FORMATS:
+        if extension != '.json' and name.endswith(extension):
+            return extension
+    return '.json'
+
+
+def get_export_filter() -> str:
+    """
+    Returns file dialog filter containing all export formats.
+    """
+    formats = [f'{name} (*{extension})' for extension, name in EXPORT_FORMATS.items()]
+    return ';;'.join((*formats, 'Any File (*.*)'))
+
+
+def get_combat_file_name(map_name: str, difficulty: str | None, start_time: datetime) -> str:
+    """
+    Returns file name for exports of a combat without extension, composed of map, difficulty and
+    start time of the combat.
+    """
+    file_name = map_name
+    if difficulty is not None and difficulty != '':
+        file_name += ' ' + difficulty
+    return file_name + ' ' + start_time.strftime('%Y-%m-%d %H.%M')
+
+
+def get_column_names() -> dict[str, list[str]]:
+    """
+    Returns the column names of the exported tables.
+    """
+    column_names = {
+        'damage_out': list(TREE_HEADER),
+        'damage_in': list(TREE_HEADER),
+        'heal_out': list(HEAL_TREE_HEADER),
+        'heal_in': list(HEAL_TREE_HEADER)
+    }
+    for table, first_column in zip(column_names.values(), ('Ability', 'Actor') * 2):
+        table[0] = first_column
+    return column_names
+
+
+def get_combat_info(combat: Combat) -> dict:
+    """
+    Returns general information on `combat` as contained in exports.
+    """
+    return {
+        'map': combat.map,
+        'difficulty': combat.difficulty,
+        'time': combat.start_time.timestamp(),
+        'log_duration': combat.meta['log_duration'],
+        'player_duration': combat.meta['player_duration'],
+    }
+
+
+def get_players(combat: Combat, table: str) -> list[TreeItem]:
+    """
+    Returns player items of an analysis table of `combat`.
+
+    Parameters:
+    - :param combat: analyzed combat
+    - :param table: one of `EXPORT_TABLES`
+    """
+    return getattr(combat, table)._player._children
+
+
+def export_combat(path: Path, combat: Combat) -> bool:
+    """
+    Exports combat to `path` using the format belonging to the file extension. Returns `True` on
+    success, `False` on failure.
+
+    Parameters:
+    - :param path: path to write the export to, overwrites existing files
+    - :param combat: analyzed combat
+    """
+    export_format = get_export_format(path)
+    try:
+        if export_format == '.npz':
+            write_combat_npz(path, combat)
+        elif export_format == '.json.gz':
+            with gzip_open(path, 'wt', GZIP_COMPRESSION_LEVEL, encoding='utf-8') as file:
+                write_combat_json(file, combat)
+        elif export_format == '.json.zst':
+            with zstd_open(path, 'wt', encoding='utf-8') as file:
+                write_combat_json(file, combat)
+        else:
+            with path.open('w', encoding='utf-8') as file:
+                write_combat_json(file, combat)
+        return True
+    except OSError:
+        return False
+    except (ValueError, TypeError):  # data that cannot be serialized
+        try:
+            path.unlink(missing_ok=True)
+        except OSError:
+            pass
+        return False
+
+
+def write_combat_json(file: TextIO, combat: Combat):
+    """
+    Writes JSON export of `combat` to `file`. The result is identical to serializing
+    `Combat.get_export`, but the data is written player by player instead of first building the
+    whole document in memory.
+
+    Parameters:
+    - :param file: text file opened for writing
+    - :param combat: analyzed combat
+    """
+    file.write('{"version": "1", "combat_info": ')
+    file.write(json.dumps(get_combat_info(combat)))
+    file.write(', "column_names": ')
+    file.write(json.dumps(get_column_names()))
+    for table in EXPORT_TABLES:
+        file.write(f', "{table}": {{')
+        for player_num, player in enumerate(get_players(combat, table)):
+            if player_num > 0:
+                file.write(', ')
+            file.write(json.dumps(player.data[0][2]))
+            file.write(': ')
+            file.write(json.dumps([ability.data for ability in player._children]))
+        file.write('}')
+    file.write('}')
+
+
+def write_combat_npz(path: Path, combat: Combat):
+    """
+    Writes compressed NumPy archive of `combat` to `path`. For each table and player the archive
+    contains the arrays `<table>/<handle>/names` (first column), `<table>/<handle>/values`
+    (remaining columns) and `<table>/<handle>/graphs` (graph of the player followed by the graphs
+    of the rows). `combat_info` and `column_names` contain the JSON encoded general information.
+
+    Parameters:
+    - :param path: path to write the archive to
+    - :param combat: analyzed combat
+    """
+    arrays = {
+        'combat_info': np__array(json.dumps(get_combat_info(combat)), dtype=str_),
+        'column_names': np__array(json.dumps(get_column_names()), dtype=str_)
+    }
+    for table in EXPORT_TABLES:
+        for player in get_players(combat, table):
+            prefix = f'{table}/{player.data[0][2]}'
+            rows = [ability.data for ability in player._children]
+            arrays[f'{prefix}/names'] = np__array([str(row[0]) for row in rows], dtype=str_)
+            arrays[f'{prefix}/values'] = np__array(
+                    [row[1:] for row in rows], dtype=float64).reshape(len(rows), -1)
+            graphs = [player.graph_data, *(ability.graph_data for ability in player._children)]
+            length = max((getattr(graph, 'size', 0) for graph in graphs), default=0)
+            graph_matrix = np__zeros((len(graphs), length), dtype=float64)
+            for row, graph in enumerate(graphs):
+                graph_length = getattr(graph, 'size', 0)
+                graph_matrix[row, :graph_length] = graph
+            arrays[f'{prefix}/graphs'] = graph_matrix
+    with path.open('wb') as file:
+        savez_compressed(file, **arrays)
@@ -1,5 +1,6 @@
 import os
 from pathlib import Path
+from typing import Iterable
 
 from PySide6.QtCore import QByteArray, QSettings
 
@@ -12,13 +13,26 @@ class OSCRConfig():
         self.default_ui_scale: float = 1.0
         self.excluded_event_ids: list[str] = ['Autodesc.Combatevent.Falling']
         self.home_dir: Path = Path()
+        self.league_backoff: float = 0.5
+        self.league_cache_file: str = 'OSCR_league_cache.db'
+        self.league_log_cache_size: int = 20
+        self.league_log_folder_name: str = '_league_logs'
+        self.league_log_folder_path: Path = Path()
+        self.league_retries: int = 3
+        self.league_server: str = ''
+        self.league_timeout: tuple[float, float] = (5.0, 30.0)
+        self.league_upload_compression: int = 6
+        self.league_upload_timeout: tuple[float, float] = (5.0, 120.0)
+        self.library_file: str = 'OSCR_library.db'
         self.icon_size: int = 24
         self.link_downloads: str = 'https://github.com/STOCD/OSCR-UI/releases'
         self.link_github: str = 'https://github.com/STOCD/OSCR-UI'
         self.link_stobuilds: str = 'https://discord.gg/stobuilds'
         self.link_stocd: str = 'https://github.com/STOCD'
         self.link_website: str = 'https://oscr.stobuilds.com'
-        self.live_graph_fields: tuple[str] = ('DPS', 'Debuff', 'Attacks-in Share', 'HPS')
+        self.live_graph_fields: tuple[str] = (
+                'DPS', 'Debuff', 'Attacks-in Share', 'HPS', 'DPS (5s)', 'DPS (10s)', 'DPS (30s)',
+                'Burst Peak')
         self.live_parser_scale: float = 1.0
         self.minimum_window_width: int = 1280
         self.minimum_window_height: int = 720
@@ -26,6 +40,8 @@ class OSCRConfig():
         self.templog_folder_name: str = '_temp'
         self.templog_folder_path: Path = Path()
         self.ui_scale: float = 1.0
+        self.upload_queue_file: str = 'OSCR_upload_queue.json'
+        self.upload_queue_folder_name: str = '_upload_queue'
 
     def __repr__(self):
         return f'<OSCR-Config ui_scale={self.ui_scale} icon_size={self.icon_size} ...>'
@@ -33,29 +49,35 @@ class OSCRConfig():
 
 class OSCRSettings():
 
-    __slots__ = ('_settings', 'analysis_graph', 'auto_scan', 'combat_min_lines',
-                 'combats_to_parse', 'copy_format', 'dmg_columns', 'favorite_ladders',
-                 'first_overview_tab', 'graph_resolution', 'heal_columns', 'language', 'log_path',
-                 'overview_sort_column', 'overview_sort_order', 'seconds_between_combats',
+    __slots__ = ('_settings', 'analysis_graph', 'archive_trimmed_logs', 'auto_scan',
+                 'combat_min_lines', 'combats_to_parse', 'copy_format', 'dmg_columns',
+                 'export_format', 'favorite_ladders', 'first_overview_tab', 'graph_resolution',
+                 'heal_columns', 'language', 'league_server', 'library_path', 'log_path',
+                 'overview_sort_column',
+                 'overview_sort_order', 'seconds_between_combats',
                  'sto_log_path', 'ui_scale', 'state__analysis_splitter', 'state__geometry',
                  'state__live_geometry', 'state__live_splitter', 'state__overview_splitter',
                  'liveparser__auto_enabled', 'liveparser__columns', 'liveparser__copy_kills',
                  'liveparser__graph_active', 'liveparser__graph_field',
-                 'liveparser__player_display', 'liveparser__window_scale',
-                 'liveparser__window_opacity')
+                 'liveparser__player_display', 'liveparser__separate_process',
+                 'liveparser__window_scale', 'liveparser__window_opacity')
 
     def __init__(self, settings_file_path: Path):
         self.analysis_graph: bool = True
+        self.archive_trimmed_logs: bool = False
         self.auto_scan: bool = False
         self.combat_min_lines: int = 20
         self.combats_to_parse: int = 10
         self.copy_format: str = 'Compact'
         self.dmg_columns: list[bool] = [True] * 21
+        self.export_format: str = '.json'
         self.favorite_ladders: list[str] = list()
         self.first_overview_tab: int = 0
         self.graph_resolution: float = 0.2
         self.heal_columns: list[bool] = [True] * 13
         self.language: str = 'en'
+        self.league_server: str = ''
+        self.library_path: str = ''
         self.log_path: str = ''
         self.overview_sort_column: int = 1
         self.overview_sort_order: str = 'Descending'
@@ -70,11 +92,13 @@ class OSCRSettings():
         self.state__overview_splitter: QByteArray = QByteArray()
 
         self.liveparser__auto_enabled: bool = False
-        self.liveparser__columns: list[bool] = [True, False, True, False, False, False, False]
+        self.liveparser__columns: list[bool] = [
+                True, False, True, False, False, False, False, False, False, False, False]
         self.liveparser__copy_kills: bool = False
         self.liveparser__graph_active: bool = False
         self.liveparser__graph_field: int = 0
         self.liveparser__player_display: str = 'Handle'
+        self.liveparser__separate_process: bool = False
         self.liveparser__window_scale: float = 1.0
         self.liveparser__window_opacity: float = 0.85
 
@@ -85,11 +109,17 @@ class OSCRSettings():
 
         self.load_settings()
 
-    def load_settings(self):
+    def load_settings(self, setting_names: Iterable[str] | None = None):
         """
         Loads settings from settings file given in constructor into attributes.
+
+        Parameters:
+        - :param setting_names: only load these settings, loads all settings when `None`
         """
-        for setting in self.__slots__:
+        self._settings.sync()
+        if setting_names is None:
+            setting_names = self.__slots__
+        for setting in setting_names:
             if setting.startswith('_'):
                 continue
             setting_id = setting.replace('__', '/')
@@ -104,20 +134,28 @@ class OSCRSettings():
                     item_list = self._settings.value(setting_id, type=list)
                     if list_element_type is bool:
                         items = [True if el == 'true' else False for el in item_list]
+                        # lists stored by older versions may lack newly added entries
+                        items.extend(settings_item[len(items):])
                         setattr(self, setting, items)
                     else:
                         setattr(self, setting, [list_element_type(el) for el in item_list])
                 else:
                     setattr(self, setting, self._settings.value(setting_id, type=item_type))
 
-    def store_settings(self):
+    def store_settings(self, setting_names: Iterable[str] | None = None):
         """
         Stores settings from attributes to settings file given in constructor.
+
+        Parameters:
+        - :param setting_names: only store these settings, stores all settings when `None`
         """
-        for setting in self.__slots__:
+        if setting_names is None:
+            setting_names = self.__slots__
+        for setting in setting_names:
             if not setting.startswith('_'):
                 setting_id = setting.replace('__', '/')
                 self._settings.setValue(setting_id, getattr(self, setting))
+        self._settings.sync()
 
     def set(self, setting_name: str, value):
         """
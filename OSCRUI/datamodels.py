@@ -3,11 +3,13 @@ import sys
 
 from PySide6.QtCore import (
         QAbstractItemModel, QAbstractTableModel, QItemSelectionModel, QItemSelection, QModelIndex,
-        QSortFilterProxyModel, QStringListModel, Qt)
+        QSortFilterProxyModel, QStringListModel, Qt, Signal)
 from PySide6.QtGui import QColor, QFont
 
 from OSCR import TreeItem
 
+from .timeseries import TreeSeries
+
 ARIGHT = Qt.AlignmentFlag.AlignRight
 ALEFT = Qt.AlignmentFlag.AlignLeft
 ACENTER = Qt.AlignmentFlag.AlignCenter
@@ -123,12 +125,17 @@ class OverviewTableModel(TableModel):
 
 class LeagueTableModel(TableModel):
     """
-    Model for league table
+    Model for league table; rows are fetched page by page. Views request the next page through
+    `fetchMore`, which emits `fetch_more_requested`.
     """
+
+    fetch_more_requested: Signal = Signal()
+
     def __init__(self, header_data: list[str]):
         super().__init__()
         self._header: list[str] = header_data
         self.combatlog_id_list: list[int] = list()
+        self.more_rows_available: bool = False
 
     def data(self, index: QModelIndex, role: int):
         if role == Qt.ItemDataRole.DisplayRole:
@@ -158,6 +165,13 @@ class LeagueTableModel(TableModel):
             return self._cell_font
         return super().headerData(section, orientation, role)
 
+    def canFetchMore(self, parent: QModelIndex) -> bool:
+        return not parent.isValid() and self.more_rows_available
+
+    def fetchMore(self, parent: QModelIndex):
+        if not parent.isValid() and self.more_rows_available:
+            self.fetch_more_requested.emit()
+
     def extend_data(self, index: list, rows: list, combatlog_ids: list):
         """
         Append data to the existing data.
@@ -184,9 +198,111 @@ class LeagueTableModel(TableModel):
         - :param combatlog_ids: list of ids referencing the combatlog behind the individual rows
         """
         self.beginResetModel()
-        self._index = index
-        self._data = rows
-        self.combatlog_id_list = combatlog_ids
+        self._index = list(index)
+        self._data = list(rows)
+        self.combatlog_id_list = list(combatlog_ids)
+        self.endResetModel()
+
+    def merge_data(self, index: list, rows: list, combatlog_ids: list):
+        """
+        Replaces existing data with new data without resetting the model. Rows are matched by their
+        index: unchanged rows are kept, so that views keep selection and scroll position; missing
+        rows are removed and new rows inserted. Works best if old and new index are both sorted
+        ascending.
+
+        Parameters:
+        - :param index: data for the index of the table
+        - :param rows: row data to be displayed
+        - :param combatlog_ids: list of ids referencing the combatlog behind the individual rows
+        """
+        row = 0
+        new_row = 0
+        while row < len(self._index) or new_row < len(index):
+            run_end = row
+            while run_end < len(self._index) and (
+                    new_row >= len(index) or self._index[run_end] < index[new_row]):
+                run_end += 1
+            if run_end > row:
+                self.beginRemoveRows(QModelIndex(), row, run_end - 1)
+                del self._index[row:run_end]
+                del self._data[row:run_end]
+                del self.combatlog_id_list[row:run_end]
+                self.endRemoveRows()
+                continue
+            run_end = new_row
+            while run_end < len(index) and (
+                    row >= len(self._index) or index[run_end] < self._index[row]):
+                run_end += 1
+            if run_end > new_row:
+                run_length = run_end - new_row
+                self.beginInsertRows(QModelIndex(), row, row + run_length - 1)
+                self._index[row:row] = index[new_row:run_end]
+                self._data[row:row] = rows[new_row:run_end]
+                self.combatlog_id_list[row:row] = combatlog_ids[new_row:run_end]
+                self.endInsertRows()
+                row += run_length
+                new_row = run_end
+                continue
+            if (self._data[row] != rows[new_row]
+                    or self.combatlog_id_list[row] != combatlog_ids[new_row]):
+                self._data[row] = rows[new_row]
+                self.combatlog_id_list[row] = combatlog_ids[new_row]
+                self.dataChanged.emit(
+                        self.index(row, 0), self.index(row, len(self._header) - 1))
+            row += 1
+            new_row += 1
+
+
+class LibraryTableModel(TableModel):
+    """
+    Model for the combat library table
+    """
+    def __init__(self, header_data: Sequence[str]):
+        super().__init__()
+        self._header: list[str] = list(header_data)
+        self.entries: list[tuple] = list()
+
+    def data(self, index: QModelIndex, role: int):
+        if role == Qt.ItemDataRole.DisplayRole:
+            column = index.column()
+            cell = self._data[index.row()][column]
+            if column == 4:
+                return f'{cell:.1f}s'
+            elif column in (6, 7):
+                return f'{cell:,.2f}'
+            elif column == 5:
+                return str(cell)
+            return cell
+
+        if role == Qt.ItemDataRole.ToolTipRole:
+            entry = self.entries[index.row()]
+            return f'{entry[10]}\n{entry[7]}'
+
+        if role == Qt.ItemDataRole.FontRole:
+            return self._cell_font
+
+        if role == Qt.ItemDataRole.TextAlignmentRole:
+            if index.column() in (0, 1):
+                return AVCENTER + ALEFT
+            return AVCENTER + ARIGHT
+
+    def headerData(self, section: int, orientation: Qt.Orientation, role: int):
+        if role == Qt.ItemDataRole.DisplayRole and orientation == Qt.Orientation.Vertical:
+            return section + 1
+        if role == Qt.ItemDataRole.FontRole and orientation == Qt.Orientation.Vertical:
+            return self._cell_font
+        return super().headerData(section, orientation, role)
+
+    def set_entries(self, entries: list[tuple]):
+        """
+        Replaces existing data with catalog entries.
+
+        Parameters:
+        - :param entries: catalog entries as returned by `CombatLibrary.query`
+        """
+        self.beginResetModel()
+        self.entries = entries
+        self._data = [(*entry[1:7], entry[8], entry[9]) for entry in entries]
         self.endResetModel()
 
 
@@ -208,7 +324,7 @@ class LiveParserTableModel(TableModel):
         if role == Qt.ItemDataRole.DisplayRole:
             column = index.column()
             data = self._data[index.row()][1 + column]
-            if column in (0, 4):  # DPS, HPS
+            if column in (0, 4) or column >= 7:  # DPS, HPS, rolling DPS, Burst Peak
                 return f'{data:,.2f}'
             elif column == 1:  # Combat Time
                 return f'{data:.1f}s'
@@ -228,9 +344,7 @@ class LiveParserTableModel(TableModel):
 
         if role == Qt.ItemDataRole.ForegroundRole:
             if self.legend_column is not None and index.column() == self.legend_column:
-                row = index.row()
-                if row < len(self._colors):
-                    return self._colors[self._data[row][8]]
+                return self._colors[self._data[index.row()][-1]]
             return None
 
     def headerData(self, section, orientation, role):
@@ -267,7 +381,8 @@ class LiveParserTableModel(TableModel):
 
     def columnCount(self, index):
         if len(self._data) > 0:
-            return 7  # has 7 possible columns, the eighth entry contains internal data id
+            # the last entry of each row contains internal data id
+            return len(self._header)
         else:
             return 0
 
@@ -313,6 +428,7 @@ class TreeModel(QAbstractItemModel):
         self.player_index: QModelIndex
         self._npc: TreeItem
         self.header_data: tuple[str] = list()
+        self.series: TreeSeries | None = None
         self._header_font: QFont
         self._name_font: QFont
         self._cell_font: QFont
@@ -332,10 +448,12 @@ class TreeModel(QAbstractItemModel):
 
     def set_data(self, new_root_item: TreeItem):
         """
-        Replaces the data in the table with the new data sourced from the `new_root_item`
+        Replaces the data in the table with the new data sourced from the `new_root_item`. Graphs
+        of the items are prepared for plotting when they are first plotted.
         """
         self.beginResetModel()
         self._root = new_root_item
+        self.series = TreeSeries(new_root_item)
         self._player = new_root_item.get_child(0)
         self._npc = new_root_item.get_child(1)
         self.player_index = self.createIndex(0, 0, self._player)
@@ -510,6 +628,12 @@ class TreeSelectionModel(QItemSelectionModel):
             else:
                 self.clear()
 
+    def selected_items(self) -> list[TreeItem]:
+        """
+        Returns the items of all rows containing selected cells, in order of selection.
+        """
+        return list(dict.fromkeys(index.internalPointer() for index in self.selectedIndexes()))
+
 
 class CombatModel(QStringListModel):
     def __init__(self):
@@ -135,6 +135,7 @@ class UploadresultDialog(QDialog):
         self._theme: AppTheme = theme
         self.setWindowTitle(tr('OSCR - Upload Results'))
         self._log_id: int = -1
+        self._server_url: str = ''
         self._result_frame: QFrame
         self._title_label: QLabel
         self._view_button: QPushButton
@@ -178,15 +179,17 @@ class UploadresultDialog(QDialog):
         Opens webbrowser to show the uploaded combatlog on the DPS League tables.
         """
         if self._log_id != -1:
-            open_link(f"https://oscr.stobuilds.com/ui/combatlog/{self._log_id}/")
+            open_link(f"{self._server_url.rstrip('/')}/ui/combatlog/{self._log_id}/")
 
-    def show_dialog(self, result: CombatLogUploadV2Response):
+    def show_dialog(self, result: CombatLogUploadV2Response, server_url: str):
         """
         Shows a dialog that informs about the result of the triggered upload.
 
         Paramters:
         - :param result: response of upload
+        - :param server_url: address of the league server the combat was uploaded to
         """
+        self._server_url = server_url
         QWidget().setLayout(self._result_frame.layout())
         self._title_label.setText(result.detail)
         if result.combatlog is None:
@@ -197,38 +200,90 @@ class UploadresultDialog(QDialog):
         result_layout = QGridLayout()
         result_layout.setContentsMargins(0, 0, 0, 0)
         result_layout.setSpacing(0)
-        icon_size = QSize(self._theme.opt.icon_size / 1.5, self._theme.opt.icon_size / 1.5)
-        row = 0
         if result.results:
             for row, line in enumerate(result.results, 1):
-                if row % 2 == 1:
-                    table_style = {'background-color': '@mbg', 'padding': (5, 3, 3, 3), 'margin': 0}
-                    icon_table_style = {'background-color': '@mbg', 'padding': 3, 'margin': 0}
-                else:
-                    table_style = {'background-color': '@bg', 'padding': (5, 3, 3, 3), 'margin': 0}
-                    icon_table_style = {'background-color': '@bg', 'padding': 3, 'margin': 0}
-                if line.updated:
-                    icon = self._theme.icons['check'].pixmap(icon_size)
-                else:
-                    icon = self._theme.icons['dash'].pixmap(icon_size)
-                status_label = create_label(self._theme, '', style_override=icon_table_style)
-                status_label.setPixmap(icon)
-                status_label.setSizePolicy(SMINMIN)
-                result_layout.addWidget(status_label, row, 0)
-                name_label = create_label(self._theme, line.name, style_override=table_style)
-                name_label.setSizePolicy(SMINMAX)
-                result_layout.addWidget(name_label, row, 1)
-                value_label = create_label(
-                    self._theme, str(line.value), style_override=table_style)
-                value_label.setSizePolicy(SMINMAX)
-                value_label.setAlignment(ARIGHT)
-                result_layout.addWidget(value_label, row, 2)
-                detail_label = create_label(self._theme, line.detail, style_override=table_style)
-                detail_label.setSizePolicy(SMINMAX)
-                result_layout.addWidget(detail_label, row, 3)
+                self.add_result_row(
+                    result_layout, row, line.updated, line.name, str(line.value), line.detail)
         self._result_frame.setLayout(result_layout)
         self.open()
 
+    def show_results(self, results: list[tuple[str, CombatLogUploadV2Response | BaseException]]):
+        """
+        Shows a dialog that informs about the results of several uploads.
+
+        Parameters:
+        - :param results: contains name of the uploaded combat and response of its upload or the
+        error that made it fail
+        """
+        QWidget().setLayout(self._result_frame.layout())
+        successful_uploads = sum(
+                not isinstance(result, BaseException) and result.combatlog is not None
+                for _, result in results)
+        self._title_label.setText(
+                tr('Uploaded') + f' {successful_uploads} / {len(results)} ' + tr('combats'))
+        self._view_button.hide()
+        result_layout = QGridLayout()
+        result_layout.setContentsMargins(0, 0, 0, 0)
+        result_layout.setSpacing(0)
+        row = 0
+        for combat_name, result in results:
+            row += 1
+            if isinstance(result, BaseException):
+                error_reason = getattr(result, 'reason', None)
+                detail = str(result) if error_reason is None else str(error_reason)
+                self.add_result_row(result_layout, row, False, combat_name, '', detail)
+                continue
+            self.add_result_row(
+                result_layout, row, result.combatlog is not None, combat_name, '', result.detail)
+            if result.results:
+                for line in result.results:
+                    row += 1
+                    self.add_result_row(
+                        result_layout, row, line.updated, '    ' + line.name, str(line.value),
+                        line.detail)
+        self._result_frame.setLayout(result_layout)
+        self.open()
+
+    def add_result_row(
+            self, layout: QGridLayout, row: int, success: bool, name: str, value: str,
+            detail: str):
+        """
+        Adds row showing the result of an upload to `layout`.
+
+        Parameters:
+        - :param layout: layout to add the row to
+        - :param row: row of the layout
+        - :param success: shows check mark if True, dash otherwise
+        - :param name: name of the ladder or combat
+        - :param value: value achieved in the ladder
+        - :param detail: description of the result
+        """
+        icon_size = QSize(self._theme.opt.icon_size / 1.5, self._theme.opt.icon_size / 1.5)
+        if row % 2 == 1:
+            table_style = {'background-color': '@mbg', 'padding': (5, 3, 3, 3), 'margin': 0}
+            icon_table_style = {'background-color': '@mbg', 'padding': 3, 'margin': 0}
+        else:
+            table_style = {'background-color': '@bg', 'padding': (5, 3, 3, 3), 'margin': 0}
+            icon_table_style = {'background-color': '@bg', 'padding': 3, 'margin': 0}
+        if success:
+            icon = self._theme.icons['check'].pixmap(icon_size)
+        else:
+            icon = self._theme.icons['dash'].pixmap(icon_size)
+        status_label = create_label(self._theme, '', style_override=icon_table_style)
+        status_label.setPixmap(icon)
+        status_label.setSizePolicy(SMINMIN)
+        layout.addWidget(status_label, row, 0)
+        name_label = create_label(self._theme, name, style_override=table_style)
+        name_label.setSizePolicy(SMINMAX)
+        layout.addWidget(name_label, row, 1)
+        value_label = create_label(self._theme, value, style_override=table_style)
+        value_label.setSizePolicy(SMINMAX)
+        value_label.setAlignment(ARIGHT)
+        layout.addWidget(value_label, row, 2)
+        detail_label = create_label(self._theme, detail, style_override=table_style)
+        detail_label.setSizePolicy(SMINMAX)
+        layout.addWidget(detail_label, row, 3)
+
 
 class DialogsWrapper(QObject):
     """Contains simple, multi-purpose dialogs"""
@@ -1,10 +1,12 @@
+from gzip import open as gzip_open
 import json
 import os
 from pathlib import Path
+from typing import BinaryIO, Iterable
 import webbrowser
 
 from PySide6.QtWidgets import QFileDialog
-from PySide6.QtGui import QIcon
+from PySide6.QtGui import QFontDatabase, QIcon
 
 
 def browse_path(
@@ -38,6 +40,161 @@ def browse_path(
             return None
 
 
+def browse_folder(preset_path: Path) -> Path | None:
+    """
+    Opens dialog prompting the user to select a folder.
+
+    Parameters:
+    - :param preset_path: folder that the dialog opens at
+
+    :return: returns selected folder; None if user aborts
+    """
+    f = QFileDialog.getExistingDirectory(caption='Select Folder', dir=str(preset_path))
+    if f == '':
+        return None
+    return Path(f)
+
+
+COPY_BUFFER_SIZE = 4 * 1024 * 1024
+
+
+def merge_intervals(intervals: Iterable[tuple[int, int]]) -> list[tuple[int, int]]:
+    """
+    Sorts half-open byte intervals and merges overlapping and adjacent ones.
+
+    Parameters:
+    - :param intervals: start and end position pairs
+    """
+    merged_intervals = list()
+    for start, end in sorted(intervals):
+        if end <= start:
+            continue
+        if len(merged_intervals) > 0 and start <= merged_intervals[-1][1]:
+            if end > merged_intervals[-1][1]:
+                merged_intervals[-1] = (merged_intervals[-1][0], end)
+        else:
+            merged_intervals.append((start, end))
+    return merged_intervals
+
+
+def copy_byte_ranges(
+        source_path: Path, target_path: Path, intervals: Iterable[tuple[int, int]]) -> bool:
+    """
+    Copies bytes in `intervals` from `source_path` to `target_path`, overwriting the target.
+    Uncompressed sources are copied by the operating system where possible, otherwise through a
+    reusable buffer. When target and source are the same file, the result is written to a
+    temporary file next to it that replaces the source once complete. Returns `True` on success,
+    `False` on failure.
+
+    Parameters:
+    - :param source_path: path to source file, may be gzip compressed
+    - :param target_path: path to target file
+    - :param intervals: start and end position pairs (half-open intervals)
+    """
+    intervals = merge_intervals(intervals)
+    created_path = None
+    try:
+        in_place = target_path.exists() and os.path.samefile(source_path, target_path)
+        if in_place:
+            write_path = target_path.with_name(f'.{target_path.name}.{os.getpid()}.tmp')
+        else:
+            write_path = target_path
+        with open(source_path, 'rb', buffering=0) as source_file:
+            compressed = source_file.read(2) == b'\x1f\x8b'
+            with open(write_path, 'wb', buffering=0) as target_file:
+                created_path = write_path
+                if compressed:
+                    source_file.seek(0)
+                    with gzip_open(source_file, 'rb') as gzip_file:
+                        for start, end in intervals:
+                            gzip_file.seek(start)
+                            if copy_stream(gzip_file, target_file, end - start) < end - start:
+                                raise EOFError('Source ends before end of byte range')
+                else:
+                    for start, end in intervals:
+                        if copy_file_range(source_file, target_file, start, end) < end - start:
+                            raise EOFError('Source ends before end of byte range')
+        if in_place:
+            os.replace(write_path, target_path)
+        return True
+    except (OSError, EOFError):
+        if created_path is not None:
+            try:
+                created_path.unlink()
+            except OSError:
+                pass
+        return False
+
+
+def archive_byte_range(
+        source_path: Path, target_path: Path, start: int, end: int,
+        compression_level: int = 9) -> bool:
+    """
+    Writes bytes `start` (including) to `end` (not including) of `source_path` gzip compressed to
+    `target_path`. The data is compressed chunk by chunk. Returns `True` on success, `False` on
+    failure.
+
+    Parameters:
+    - :param source_path: path to uncompressed source file
+    - :param target_path: path to compressed target file, will be overwritten
+    - :param start: first byte to archive
+    - :param end: end of the archived bytes
+    - :param compression_level: gzip compression level from 0 (none) to 9 (smallest)
+    """
+    try:
+        with open(source_path, 'rb', buffering=0) as source_file:
+            source_file.seek(start)
+            with gzip_open(target_path, 'wb', compression_level) as target_file:
+                copy_stream(source_file, target_file, end - start)
+        return True
+    except OSError:
+        return False
+
+
+def copy_file_range(
+        source_file: BinaryIO, target_file: BinaryIO, start: int, end: int) -> int:
+    """
+    Appends bytes `start` (including) to `end` (not including) of `source_file` to `target_file`
+    using `os.copy_file_range`, falling back to `copy_stream` where that is not available.
+    Both files must be unbuffered. Returns the number of bytes copied, which is less than
+    `end - start` when `source_file` ends early.
+    """
+    position = start
+    if hasattr(os, 'copy_file_range'):
+        try:
+            while position < end:
+                copied = os.copy_file_range(
+                        source_file.fileno(), target_file.fileno(), end - position, position)
+                if copied == 0:
+                    return position - start
+                position += copied
+            return position - start
+        except OSError:
+            pass  # not supported between these files, copy remaining bytes through Python
+    source_file.seek(position)
+    return position - start + copy_stream(source_file, target_file, end - position)
+
+
+def copy_stream(source_file: BinaryIO, target_file: BinaryIO, size: int) -> int:
+    """
+    Copies `size` bytes from the current position of `source_file` to `target_file` using a
+    reusable buffer. Returns the number of bytes copied, which is less than `size` when
+    `source_file` ends early.
+    """
+    buffer = bytearray(min(COPY_BUFFER_SIZE, max(size, 1)))
+    view = memoryview(buffer)
+    copied_bytes = 0
+    while copied_bytes < size:
+        read_bytes = source_file.readinto(view[:min(size - copied_bytes, len(buffer))])
+        if not read_bytes:
+            break
+        written_bytes = 0
+        while written_bytes < read_bytes:
+            written_bytes += target_file.write(view[written_bytes:read_bytes])
+        copied_bytes += read_bytes
+    return copied_bytes
+
+
 def get_asset_path(asset_name: str, app_directory: str) -> str:
     """
     returns the absolute path to a file in the asset folder
@@ -81,6 +238,20 @@ def load_icon_series(icons: dict, app_directory: str) -> dict[str, QIcon]:
     return icon_dict
 
 
+def register_fonts(app_directory: str):
+    """
+    Adds the fonts shipped with the app to the application font database.
+
+    Parameters:
+    - :param app_directory: absolute path to app directory
+    """
+    font_database = QFontDatabase()
+    for font_file in (
+            'Overpass-Bold.ttf', 'Overpass-Medium.ttf', 'Overpass-Regular.ttf',
+            'RobotoMono-Regular.ttf', 'RobotoMono-Medium.ttf'):
+        font_database.addApplicationFont(get_asset_path(font_file, app_directory))
+
+
 def open_link(link: str = ''):
     """
     Opens provided link
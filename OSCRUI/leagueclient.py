@@ -0,0 +1,384 @@
+"""HTTP connection layer of the league API client"""
+
+from collections.abc import Iterator
+from contextlib import contextmanager
+import logging
+from pathlib import Path
+from socket import SO_KEEPALIVE, SOL_SOCKET
+import sqlite3
+from threading import local
+from time import perf_counter, time
+from urllib.parse import urlsplit
+
+from OSCR_django_client import ApiClient, ApiException, Configuration
+from OSCR_django_client.rest import RESTResponse
+from urllib3 import HTTPResponse, Retry, Timeout
+from urllib3.connection import HTTPConnection
+from urllib3.exceptions import HTTPError
+from urllib3.filepost import choose_boundary
+
+LEAGUE_LOGGER = logging.getLogger('OSCRUI.league')
+# read errors and error responses are only retried for these methods; connection errors are
+# retried for all methods, as the request did not reach the server
+RETRY_METHODS = frozenset(('GET', 'HEAD', 'OPTIONS'))
+RETRY_STATUS_CODES = frozenset((429, 500, 502, 503, 504))
+RETRY_BACKOFF_MAX = 10
+
+CACHE_SCHEMA = '''
+CREATE TABLE IF NOT EXISTS responses (
+    url TEXT PRIMARY KEY,
+    body BLOB NOT NULL,
+    content_type TEXT,
+    etag TEXT,
+    last_modified TEXT,
+    fetched REAL NOT NULL
+);
+'''
+# first path segment of the endpoint -> seconds a cached response is used without revalidating
+# it; responses of other endpoints are not cached
+CACHE_TTLS = {'variant': 24 * 3600, 'ladder': 3600, 'ladder-entries': 300}
+# responses not revalidated for this many seconds are removed from the cache
+CACHE_MAX_AGE = 30 * 24 * 3600
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+
+
+class CacheMiss(Exception):
+    """Raised when a request restricted to the cache has no cached response"""
+
+
+class UploadFile():
+    """File parameter of a request; the file is streamed from disk when the request is sent"""
+    __slots__ = ('path',)
+
+    def __init__(self, path: Path):
+        self.path: Path = path
+
+
+def encode_multipart(
+        fields: list[tuple[str, object]], boundary: str) -> list[bytes | UploadFile]:
+    """
+    Returns parts of the `multipart/form-data` body containing `fields`; files are not read.
+
+    Parameters:
+    - :param fields: form fields; values are `UploadFile`, (file name, data, mime type) tuples
+    or plain values
+    - :param boundary: boundary separating the fields
+    """
+    parts = list()
+    for name, value in fields:
+        if isinstance(value, UploadFile):
+            disposition = f'form-data; name="{name}"; filename="{value.path.name}"'
+            content_type = 'application/octet-stream'
+            data = value
+        elif isinstance(value, tuple):
+            disposition = f'form-data; name="{name}"; filename="{value[0]}"'
+            content_type = value[2]
+            data = value[1] if isinstance(value[1], bytes) else str(value[1]).encode()
+        else:
+            disposition = f'form-data; name="{name}"'
+            content_type = 'text/plain'
+            data = str(value).encode()
+        parts.append((
+            f'--{boundary}\r\nContent-Disposition: {disposition}\r\n'
+            f'Content-Type: {content_type}\r\n\r\n').encode())
+        parts.append(data)
+        parts.append(b'\r\n')
+    parts.append(f'--{boundary}--\r\n'.encode())
+    return parts
+
+
+def stream_multipart(parts: list[bytes | UploadFile]) -> Iterator[bytes]:
+    """
+    Yields body created by `encode_multipart` in chunks, reading files piece by piece.
+    """
+    for part in parts:
+        if isinstance(part, UploadFile):
+            with part.path.open('rb') as file:
+                while chunk := file.read(UPLOAD_CHUNK_SIZE):
+                    yield chunk
+        else:
+            yield part
+
+
+class CachedResponse():
+    """Response body and validators of a cached response"""
+    __slots__ = ('body', 'content_type', 'etag', 'last_modified', 'fetched')
+
+    def __init__(
+            self, body: bytes, content_type: str | None, etag: str | None,
+            last_modified: str | None, fetched: float):
+        self.body: bytes = body
+        self.content_type: str | None = content_type
+        self.etag: str | None = etag
+        self.last_modified: str | None = last_modified
+        self.fetched: float = fetched
+
+    def to_response(self) -> RESTResponse:
+        """
+        Returns cached response as response object of the API client.
+        """
+        headers = dict()
+        if self.content_type is not None:
+            headers['Content-Type'] = self.content_type
+        response = RESTResponse(HTTPResponse(self.body, headers, 200, reason='OK'))
+        response.read()
+        return response
+
+
+class ResponseCache():
+    """
+    On-disk cache of API responses stored in a SQLite database, keyed by request URL. Can be used
+    from several threads; each thread uses its own connection to the database.
+    """
+
+    def __init__(self, database_path: Path):
+        """
+        Parameters:
+        - :param database_path: path to the cache database
+        """
+        self._database_path: Path = database_path
+        self._local: local = local()
+        with self.connection() as connection:
+            connection.execute(
+                    'DELETE FROM responses WHERE fetched < ?', (time() - CACHE_MAX_AGE,))
+
+    def connection(self) -> sqlite3.Connection:
+        """
+        Returns connection of the current thread, opening it if necessary.
+        """
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = sqlite3.connect(self._database_path, timeout=30)
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.executescript(CACHE_SCHEMA)
+            self._local.connection = connection
+        return connection
+
+    def get(self, url: str) -> CachedResponse | None:
+        """
+        Returns cached response of `url` or None if it is not cached.
+        """
+        row = self.connection().execute(
+                'SELECT body, content_type, etag, last_modified, fetched FROM responses '
+                'WHERE url = ?', (url,)).fetchone()
+        if row is None:
+            return None
+        return CachedResponse(*row)
+
+    def store(self, url: str, response: RESTResponse):
+        """
+        Stores successful response of `url`.
+
+        Parameters:
+        - :param url: requested URL
+        - :param response: response that was read already
+        """
+        with self.connection() as connection:
+            connection.execute(
+                    'INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?)',
+                    (url, response.data, response.getheader('Content-Type'),
+                     response.getheader('ETag'), response.getheader('Last-Modified'), time()))
+
+    def touch(self, url: str):
+        """
+        Marks cached response of `url` as revalidated.
+        """
+        with self.connection() as connection:
+            connection.execute('UPDATE responses SET fetched = ? WHERE url = ?', (time(), url))
+
+
+class LeagueApiClient(ApiClient):
+    """
+    API client keeping persistent connections to the server. Each host gets a pool of keep-alive
+    connections, so consecutive requests reuse established (TLS) connections. Idempotent requests
+    are retried with exponential backoff and the latency of every request is logged.
+
+    If a response cache is given, GET responses of the endpoints in `CACHE_TTLS` are cached. Cached
+    responses are returned without contacting the server until their TTL expired, then they are
+    revalidated with a conditional request. When the server is unreachable, expired responses are
+    returned as well.
+    """
+
+    def __init__(
+            self, host: str, timeout: tuple[float, float], retries: int, backoff: float,
+            pool_size: int, cache: ResponseCache | None = None):
+        """
+        Parameters:
+        - :param host: URL of the server
+        - :param timeout: default connect and read timeout in seconds
+        - :param retries: maximum number of retries per request
+        - :param backoff: delay before the second retry in seconds, doubled for every further retry
+        - :param pool_size: maximum number of idle connections kept per host; should match the
+        number of requests running at the same time
+        - :param cache: cache for responses, responses are not cached if None
+        """
+        configuration = Configuration(host=host)
+        configuration.connection_pool_maxsize = pool_size
+        configuration.socket_options = [
+                *HTTPConnection.default_socket_options, (SOL_SOCKET, SO_KEEPALIVE, 1)]
+        configuration.retries = Retry(
+                total=retries, backoff_factor=backoff, backoff_max=RETRY_BACKOFF_MAX,
+                allowed_methods=RETRY_METHODS, status_forcelist=RETRY_STATUS_CODES,
+                raise_on_status=False)
+        super().__init__(configuration)
+        self.timeout: tuple[float, float] = timeout
+        self.cache: ResponseCache | None = cache
+        self._local: local = local()
+
+    @contextmanager
+    def cache_only(self):
+        """
+        Context manager restricting requests of the current thread to the cache: cached responses
+        are returned regardless of their age and `CacheMiss` is raised for uncached requests.
+        """
+        self._local.cache_only = True
+        try:
+            yield
+        finally:
+            self._local.cache_only = False
+
+    @contextmanager
+    def streamed(self):
+        """
+        Context manager that stops requests of the current thread from reading the response body,
+        so that it can be read piece by piece through the underlying `urllib3.HTTPResponse`. The
+        caller has to read or release the response to return the connection to the pool.
+        """
+        self._local.streamed = True
+        try:
+            yield
+        finally:
+            self._local.streamed = False
+
+    def get_cache_ttl(self, url: str) -> int | None:
+        """
+        Returns TTL of responses of `url` or None if they are not cached.
+        """
+        if self.cache is None:
+            return None
+        path = urlsplit(url).path[len(urlsplit(self.configuration.host).path.rstrip('/')):]
+        return CACHE_TTLS.get(path.strip('/').split('/')[0])
+
+    def call_api(
+            self, method: str, url: str, header_params: dict | None = None, body=None,
+            post_params: list | None = None, _request_timeout=None) -> RESTResponse:
+        """
+        Performs request, applying the default timeout unless `_request_timeout` is given, and
+        answers it from the cache if possible. The response body is read before returning, so that
+        the connection is released to the pool and the logged latency includes the transfer.
+
+        Parameters:
+        - same as `ApiClient.call_api`
+        """
+        ttl = self.get_cache_ttl(url) if method == 'GET' else None
+        if ttl is None:
+            if getattr(self._local, 'cache_only', False):
+                raise CacheMiss(url)
+            return self._request(method, url, header_params, body, post_params, _request_timeout)
+
+        cached = self.cache.get(url)
+        if getattr(self._local, 'cache_only', False):
+            if cached is None:
+                raise CacheMiss(url)
+            return cached.to_response()
+        if cached is not None and time() - cached.fetched < ttl:
+            LEAGUE_LOGGER.info('GET %s served from cache', url)
+            return cached.to_response()
+        if cached is not None:
+            header_params = dict() if header_params is None else dict(header_params)
+            if cached.etag is not None:
+                header_params['If-None-Match'] = cached.etag
+            if cached.last_modified is not None:
+                header_params['If-Modified-Since'] = cached.last_modified
+        try:
+            response = self._request(
+                    method, url, header_params, body, post_params, _request_timeout)
+        except (ApiException, HTTPError, OSError):
+            if cached is None:
+                raise
+            LEAGUE_LOGGER.info('GET %s served from expired cache, server unreachable', url)
+            return cached.to_response()
+        if response.status == 304 and cached is not None:
+            self.cache.touch(url)
+            return cached.to_response()
+        if 200 <= response.status < 300:
+            self.cache.store(url, response)
+        elif response.status >= 500 and cached is not None:
+            LEAGUE_LOGGER.info('GET %s served from expired cache, server error', url)
+            return cached.to_response()
+        return response
+
+    def files_parameters(self, files: dict) -> list:
+        """
+        Builds form parameters from file parameters. Files given by path are not read here, they
+        are streamed from disk when the request is sent.
+
+        Parameters:
+        - same as `ApiClient.files_parameters`
+        """
+        params = list()
+        for name, value in files.items():
+            if isinstance(value, str):
+                params.append((name, UploadFile(Path(value))))
+            else:
+                params.extend(super().files_parameters({name: value}))
+        return params
+
+    def _request(
+            self, method: str, url: str, header_params: dict | None, body,
+            post_params: list | None, _request_timeout) -> RESTResponse:
+        """
+        Sends request to the server and reads the response unless responses are streamed, logging
+        its latency.
+        """
+        if _request_timeout is None:
+            _request_timeout = self.timeout
+        start_time = perf_counter()
+        try:
+            if post_params is not None and any(
+                    isinstance(value, UploadFile) for _, value in post_params):
+                response = self._send_multipart(
+                        method, url, header_params, post_params, _request_timeout)
+            else:
+                response = super().call_api(
+                        method, url, header_params, body, post_params, _request_timeout)
+            if getattr(self._local, 'streamed', False):
+                LEAGUE_LOGGER.info(
+                        '%s %s -> %d, headers received in %.0f ms', method, url, response.status,
+                        (perf_counter() - start_time) * 1000)
+                return response
+            response.read()
+        except BaseException as e:
+            LEAGUE_LOGGER.info(
+                    '%s %s failed after %.0f ms: %r', method, url,
+                    (perf_counter() - start_time) * 1000, e)
+            raise
+        LEAGUE_LOGGER.info(
+                '%s %s -> %d (%d bytes) in %.0f ms', method, url, response.status,
+                len(response.data), (perf_counter() - start_time) * 1000)
+        return response
+
+    def _send_multipart(
+            self, method: str, url: str, header_params: dict | None, post_params: list,
+            timeout: tuple[float, float]) -> RESTResponse:
+        """
+        Sends `multipart/form-data` request streaming the contained files from disk, so that
+        memory usage does not depend on the size of the files.
+        """
+        boundary = choose_boundary()
+        parts = encode_multipart(post_params, boundary)
+        headers = dict() if header_params is None else dict(header_params)
+        headers['Content-Type'] = f'multipart/form-data; boundary={boundary}'
+        headers['Content-Length'] = str(sum(
+                part.path.stat().st_size if isinstance(part, UploadFile) else len(part)
+                for part in parts))
+        response = self.rest_client.pool_manager.request(
+                method, url, body=stream_multipart(parts), headers=headers,
+                timeout=Timeout(connect=timeout[0], read=timeout[1]), preload_content=False)
+        return RESTResponse(response)
+
+    def close(self):
+        """
+        Closes all pooled connections.
+        """
+        self.rest_client.pool_manager.clear()
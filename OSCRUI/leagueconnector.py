@@ -1,25 +1,35 @@
 """Backend interface to the OSCR web server"""
 
-from gzip import compress as gzip__compress, decompress as gzip__decompress
+from collections import deque
+from contextlib import nullcontext
+from functools import partial
+from gzip import open as gzip_open
 from json import JSONDecodeError, loads as json__loads
+import os
 from pathlib import Path
+from shutil import copyfileobj
 from tempfile import NamedTemporaryFile as TempFile
 from typing import Callable
+from urllib.parse import urlsplit
 
 from OSCR_django_client import (
-    ApiClient, CombatlogApi, CombatLogUploadV2Response, Ladder, LadderApi, LadderEntriesApi,
+    ApiException, CombatlogApi, CombatLogUploadV2Response, Ladder, LadderApi, LadderEntriesApi,
     Variant, VariantApi)
-from PySide6.QtCore import QObject, QThread, Signal, Slot
+from PySide6.QtCore import QModelIndex, QObject, QRunnable, QThreadPool, QTimer, Signal, Slot
 from PySide6.QtGui import QIcon
 from PySide6.QtWidgets import QListWidgetItem
 
+from .combatexport import get_combat_file_name
 from .config import OSCRConfig
 from .datamodels import LeagueTableModel, SortingProxy
 from .dialogs import DialogsWrapper, UploadresultDialog
+from .iofunctions import COPY_BUFFER_SIZE
+from .leagueclient import CacheMiss, LeagueApiClient, ResponseCache
 from .parserbridge import ParserBridge
 from .textedit import format_datetime_str
 from .theme import AppTheme
 from .translation import tr
+from .uploadqueue import QueuedUpload, StaleUploadError, UploadQueue
 from .widgetmanager import WidgetManager
 
 LEAGUE_TABLE_HEADER = [
@@ -27,43 +37,150 @@ LEAGUE_TABLE_HEADER = [
         'Debuff', 'Highest Damage Ability']
 
 OSCR_SERVER_BACKEND = "https://oscr.stobuilds.com/"
-# OSCR_SERVER_BACKEND = "http://127.0.0.1:8000"
-
-
-class FetchThread(QThread):
-    """Thread with attached callback"""
-
-    result: Signal = Signal(object)
+LADDER_PAGE_SIZE = 50
+# milliseconds without typing before the search term is sent to the server
+LADDER_SEARCH_DELAY = 300
+# request category -> whether new requests supersede older requests of the category
+REQUEST_CATEGORIES = {
+    'seasons': True, 'ladders': True, 'ladder': True, 'search': True, 'download': True,
+    'upload': False}
+REQUEST_THREADS = 4
+# failed uploads are retried after the delay in milliseconds, doubled for every further attempt
+UPLOAD_ATTEMPTS = 3
+UPLOAD_RETRY_DELAY = 5000
+
+
+class LeagueRequest(QRunnable):
+    """Request executed by the thread pool of a `RequestScheduler`"""
 
     def __init__(
-            self, target: Callable, args: tuple = tuple(), kwargs: dict[str] = dict(),
-            callback: Callable | None = None):
+            self, scheduler: 'RequestScheduler', category: str, generation: int,
+            target: Callable, args: tuple, kwargs: dict[str], callback: Callable | None):
         super().__init__()
+        self.setAutoDelete(False)
+        self.category: str = category
+        self.generation: int = generation
+        self.callback: Callable | None = callback
+        self._scheduler: RequestScheduler = scheduler
         self._target: Callable = target
         self._args: tuple = args
         self._kwargs: dict[str] = kwargs
-        self._callback: Callable | None = callback
-        self.result.connect(self.handle_result)
 
-    @Slot(object)
     def run(self):
         """
         This function will be executed in a separate thread.
         """
-        self.result.emit(self._target(*self._args, **self._kwargs))
+        self._scheduler.request_finished.emit(self, self._target(*self._args, **self._kwargs))
+
+
+class RequestScheduler(QObject):
+    """
+    Runs requests in a bounded thread pool. Requests belong to a category; requests of superseding
+    categories replace older requests of the same category, whose results are discarded. Requests
+    of other categories are queued and executed one after another.
+    """
+
+    request_finished: Signal = Signal(object, object)
+
+    def __init__(self, categories: dict[str, bool], max_threads: int = REQUEST_THREADS):
+        """
+        Parameters:
+        - :param categories: maps category names to whether new requests supersede older ones
+        - :param max_threads: maximum number of requests running at the same time
+        """
+        super().__init__()
+        self._pool: QThreadPool = QThreadPool()
+        self._pool.setMaxThreadCount(max_threads)
+        self._supersede: dict[str, bool] = categories
+        self._generations: dict[str, int] = {category: 0 for category in categories}
+        self._queues: dict[str, deque[LeagueRequest]] = {
+            category: deque() for category in categories}
+        self._running: dict[str, set[LeagueRequest]] = {category: set() for category in categories}
+        self.request_finished.connect(self._handle_result)
+
+    def submit(
+            self, category: str, target: Callable, args: tuple = tuple(),
+            kwargs: dict[str] = dict(), callback: Callable | None = None,
+            supersedes: tuple[str, ...] = tuple()):
+        """
+        Schedules request. `callback` is called with the result of `target` in the thread the
+        scheduler lives in, unless the request is cancelled or superseded before it finishes.
+
+        Parameters:
+        - :param category: category of the request
+        - :param target: function to execute in the thread pool
+        - :param args: positional arguments for `target`
+        - :param kwargs: keyword arguments for `target`
+        - :param callback: function receiving the result of `target`
+        - :param supersedes: other categories whose requests are cancelled by this request
+        """
+        for other_category in supersedes:
+            self.cancel(other_category)
+        if self._supersede[category]:
+            self.cancel(category)
+        request = LeagueRequest(
+                self, category, self._generations[category], target, args, kwargs, callback)
+        if self._supersede[category] or len(self._running[category]) == 0:
+            self._start(request)
+        else:
+            self._queues[category].append(request)
 
-    @Slot(object)
-    def handle_result(self, thread_result: object):
+    def cancel(self, category: str):
         """
-        Calls callback function in original thread if it's given.
+        Removes queued requests of `category` and discards the results of its running requests.
         """
-        if self._callback is not None:
-            self._callback(thread_result)
+        self._generations[category] += 1
+        self._queues[category].clear()
+
+    def cancel_all(self):
+        """
+        Cancels requests of all categories.
+        """
+        for category in self._generations:
+            self.cancel(category)
+
+    def shutdown(self):
+        """
+        Cancels all requests and removes requests that did not start yet from the thread pool.
+        """
+        self.cancel_all()
+        self._pool.clear()
+
+    def is_busy(self, category: str) -> bool:
+        """
+        Returns True if requests of `category` are queued or running. Running requests that were
+        cancelled or superseded are not counted.
+        """
+        if len(self._queues[category]) > 0:
+            return True
+        generation = self._generations[category]
+        return any(request.generation == generation for request in self._running[category])
+
+    def _start(self, request: LeagueRequest):
+        """
+        Starts request in the thread pool.
+        """
+        self._running[request.category].add(request)
+        self._pool.start(request)
+
+    @Slot(object, object)
+    def _handle_result(self, request: LeagueRequest, result: object):
+        """
+        Passes result of finished request to its callback and starts the next queued request.
+        """
+        self._running[request.category].discard(request)
+        if request.generation == self._generations[request.category]:
+            if request.callback is not None:
+                request.callback(result)
+        queue = self._queues[request.category]
+        if len(queue) > 0 and len(self._running[request.category]) == 0:
+            self._start(queue.popleft())
 
 
 class OSCRLeagueConnector(QObject):
     """Manages connection to League Tables"""
 
+    fetch_error: Signal = Signal(object)
     ladder_data: Signal = Signal(dict)
     status_message: Signal = Signal(str, str)
 
@@ -77,20 +194,33 @@ class OSCRLeagueConnector(QObject):
         self._config: OSCRConfig = config
         self._parser: ParserBridge = parser
         self._upload_dialog: UploadresultDialog = upload_dialog
-        self._api: ApiClient | None = None
+        self._api: LeagueApiClient | None = None
         self._api_variant: VariantApi
         self._api_ladder: LadderApi
         self._api_ladder_entries: LadderEntriesApi
         self._api_combatlog: CombatlogApi
-        self._thread: FetchThread | None = None
+        self._requests: RequestScheduler = RequestScheduler(REQUEST_CATEGORIES)
+        self.upload_queue: UploadQueue = UploadQueue(
+                Path(config.config_dir, config.upload_queue_file),
+                Path(config.config_dir, config.upload_queue_folder_name))
+        self._upload_retries: set[str] = set()
+        self._upload_results: list[tuple[str, CombatLogUploadV2Response | BaseException]] = list()
+        self.fetch_error.connect(self.show_fetch_error)
         self.ladder_meta: dict[str, Ladder] = dict()
+        self._season_ladders: dict[str, list[Ladder]] = dict()
+        self._difficulty_icons: dict[str, QIcon] = dict()
+        self._current_season: str = ''
         self.current_ladder_id: int | None = None
-        self.entire_ladder_loaded: bool = False
         self.pages_loaded: int = 0
         self.current_filter_term: str = ''
         self.ladder_table_model: LeagueTableModel = LeagueTableModel(LEAGUE_TABLE_HEADER)
         self.ladder_table_sort: SortingProxy = SortingProxy()
         self.ladder_table_sort.setSourceModel(self.ladder_table_model)
+        self.ladder_table_model.fetch_more_requested.connect(self.extend_ladder)
+        self._search_timer: QTimer = QTimer()
+        self._search_timer.setSingleShot(True)
+        self._search_timer.setInterval(LADDER_SEARCH_DELAY)
+        self._search_timer.timeout.connect(self.search_league_table)
 
     def establish_league_connection(self, fetch_seasons: bool = True):
         """
@@ -100,8 +230,10 @@ class OSCRLeagueConnector(QObject):
         - :param fetch_seasons: fetches available maps and updates map selector if true
         """
         if self._api is None:
-            self._api = ApiClient()
-            self._api.configuration.host = OSCR_SERVER_BACKEND
+            self._api = LeagueApiClient(
+                    self.server_url, self._config.league_timeout, self._config.league_retries,
+                    self._config.league_backoff, REQUEST_THREADS,
+                    ResponseCache(Path(self._config.config_dir, self._config.league_cache_file)))
             self._api_variant = VariantApi(api_client=self._api)
             self._api_ladder = LadderApi(api_client=self._api)
             self._api_ladder_entries = LadderEntriesApi(api_client=self._api)
@@ -110,6 +242,15 @@ class OSCRLeagueConnector(QObject):
             self.fetch_and_insert_maps()
 
     def handle_fetch_error(self, error: BaseException):
+        """
+        Reports error raised while fetching data from the server. Can be called from any thread.
+
+        Parameters:
+        - :param error: error object that was raised in trying to fetch from server
+        """
+        self.fetch_error.emit(error)
+
+    def show_fetch_error(self, error: BaseException):
         """
         Shows error message after fetching data from server failed.
 
@@ -133,23 +274,69 @@ class OSCRLeagueConnector(QObject):
         self._dialogs.show_error(
             tr('League Error'), tr('Retrieving League data failed.'), error_details)
 
+    @property
+    def server_url(self) -> str:
+        """
+        Address of the league server; `OSCRConfig.league_server` overrides the official server,
+        for example to use a local mirror started with `python -m OSCRUI.leaguemirror`.
+        """
+        if self._config.league_server != '':
+            return self._config.league_server
+        return OSCR_SERVER_BACKEND
+
+    def shutdown(self):
+        """
+        Cancels all pending league requests and closes the connections to the server.
+        """
+        self._requests.shutdown()
+        if self._api is not None:
+            self._api.close()
+
+    def reset_connection(self):
+        """
+        Closes the connection to the league server and removes all ladders. An open connection is
+        replaced by a connection to the current league server, so that queued uploads and upload
+        retries are sent to the new server.
+        """
+        for category in REQUEST_CATEGORIES:
+            if category != 'upload':
+                self._requests.cancel(category)
+        if self._api is not None:
+            self._api.close()
+            self._api = None
+            self.establish_league_connection(fetch_seasons=False)
+        self._search_timer.stop()
+        self.ladder_meta.clear()
+        self._season_ladders.clear()
+        self._current_season = ''
+        self.current_ladder_id = None
+        self.pages_loaded = 0
+        self._widgets.variant_combo.blockSignals(True)
+        self._widgets.variant_combo.clear()
+        self._widgets.variant_combo.blockSignals(False)
+        self._widgets.ladder_selector.clear()
+        self.ladder_table_model.more_rows_available = False
+        self.ladder_table_model.replace_data(list(), list(), list())
+
     def fetch_and_insert_maps(self):
         """
         Retrieves maps from API and inserts them into the list.
         """
         # Only populate the table once.
-        if self._widgets.variant_combo.count() > 0:
+        if self._widgets.variant_combo.count() > 0 or self._requests.is_busy('seasons'):
             return
-        if self._thread is None or not self._thread.isRunning():
-            self._thread = FetchThread(target=self._fetch_and_insert_maps)
-            self._thread.start()
-            self.status_message.emit(tr('Fetching seasons'), '')
+        self._requests.submit(
+            'seasons', self.variants, kwargs={'ordering': '-start_date'},
+            callback=self._insert_maps)
+        self.status_message.emit(tr('Fetching seasons'), '')
 
-    def _fetch_and_insert_maps(self):
+    def _insert_maps(self, variants: list[Variant] | None):
         """
-        Retrieves maps from API and inserts them into the list.
+        Inserts fetched maps into the list.
+
+        Parameters:
+        - :param variants: fetched variants
         """
-        variants = self.variants(ordering="-start_date")
         if variants is not None:
             for variant in variants:
                 self._widgets.variant_combo.addItem(variant.name)
@@ -157,45 +344,77 @@ class OSCRLeagueConnector(QObject):
                     self._widgets.variant_combo.setCurrentText('Default')
             self.status_message.emit(tr('Seasons fetched'), '')
 
-    def upload(self, combat: tuple[str, int, int]) -> CombatLogUploadV2Response | None:
+    def upload(self, item: QueuedUpload) -> CombatLogUploadV2Response | BaseException:
         """
-        Upload a combat log located at path to the league tables
+        Upload a queued combat to the league tables. The combat is compressed chunk by chunk into
+        the spool folder of the upload queue, from where it is streamed to the server. Returns the
+        response or the error that made the upload fail.
 
         Parameters:
-        - :param combat: contains path to log file, start and end position of combat in log file
+        - :param item: entry of the upload queue
         """
         try:
-            with (TempFile(dir=str(self._config.templog_folder_path), delete=False) as temp,
-                    open(combat[0], 'rb') as log_file):
-                log_file.seek(combat[1])
-                temp.write(gzip__compress(
-                    log_file.read(combat[2] - combat[1])))
-                temp.flush()
-            response = self._api_combatlog.combatlog_uploadv2(file=temp.name)
-            return response
+            spool_path = self.upload_queue.prepare(item, self._config.league_upload_compression)
+            return self._api_combatlog.combatlog_uploadv2(
+                    file=str(spool_path), _request_timeout=self._config.league_upload_timeout)
         except BaseException as e:
-            self.handle_fetch_error(e)
+            return e
 
     def download(self, id: int) -> Path | None:
         """
-        Download a combat log, returns gzipped file bytes.
+        Download a combat log into the download cache and returns the path to the log file. The
+        response is decompressed chunk by chunk while it is received. Logs that were downloaded
+        before are taken from the cache.
 
         Parameters:
         - :param id: id of the combatlog to download
         """
+        log_folder = self._config.league_log_folder_path
+        if self._config.league_server != '':
+            log_folder /= urlsplit(self._config.league_server).netloc.replace(':', '_')
+        log_path = log_folder / f'{id}.log'
+        temp_path = None
         try:
-            result = self._api_combatlog.combatlog_download(id=id)
-            if result is None:
-                return
-            with TempFile(mode="wb", dir=str(self._config.templog_folder_path), delete=False) as f:
-                f.write(gzip__decompress(result))
-            return Path(f.name)
+            if log_path.is_file():
+                os.utime(log_path)  # marks log as recently used
+                return log_path
+            log_folder.mkdir(parents=True, exist_ok=True)
+            with self._api.streamed():
+                response = self._api_combatlog.combatlog_download_without_preload_content(id=id)
+            try:
+                if response.status != 200:
+                    raise ApiException(http_resp=response)
+                with TempFile(dir=log_folder, suffix='.part', delete=False) as temp_file:
+                    temp_path = Path(temp_file.name)
+                    with gzip_open(response, 'rb') as gzip_file:
+                        copyfileobj(gzip_file, temp_file, COPY_BUFFER_SIZE)
+            finally:
+                response.release_conn()
+            os.replace(temp_path, log_path)
+            temp_path = None
+            self._prune_downloads(log_folder)
+            return log_path
         except BaseException as e:
+            if temp_path is not None:
+                temp_path.unlink(missing_ok=True)
             self.handle_fetch_error(e)
 
+    def _prune_downloads(self, log_folder: Path):
+        """
+        Removes least recently used logs from the download cache, keeping
+        `OSCRConfig.league_log_cache_size` logs.
+        """
+        try:
+            logs = sorted(
+                    log_folder.glob('*.log'), key=lambda path: path.stat().st_mtime, reverse=True)
+            for log_path in logs[self._config.league_log_cache_size:]:
+                log_path.unlink(missing_ok=True)
+        except OSError:
+            pass
+
     def ladder_entries(
-            self, id: int, page: int = 1,
-            player_filter: str = '') -> tuple[list, list, list] | None:
+            self, id: int, page: int = 1, player_filter: str = '',
+            cached: bool = False) -> tuple[list, list, list] | None:
         """
         Fetch ladder entries from server and creates table data. Returns tuple containing the table
         index, row data, list of logfile ids and whether the entire ladder was loaded if
@@ -203,13 +422,17 @@ class OSCRLeagueConnector(QObject):
 
         Parameters:
         - :param id: id of the ladder from fetched ladder data
-        - :param page: number of the page to fetch with each page containing 50 entries
+        - :param page: number of the page to fetch with each page containing `LADDER_PAGE_SIZE`
+        entries
         - :param player_filter: search string for filtering player name
+        - :param cached: only reads entries from the cache without contacting the server; returns
+        `None` without reporting an error if the entries are not cached
         """
         try:
-            ladder_response = self._api_ladder_entries.ladder_entries_list(
-                ladder=str(id), page=page, ordering="-data__DPS", page_size=50,
-                player__icontains=player_filter)
+            with self._api.cache_only() if cached else nullcontext():
+                ladder_response = self._api_ladder_entries.ladder_entries_list(
+                    ladder=str(id), page=page, ordering="-data__DPS", page_size=LADDER_PAGE_SIZE,
+                    player__icontains=player_filter)
             table_index = list()
             table_data = list()
             logfile_ids = list()
@@ -222,33 +445,26 @@ class OSCRLeagueConnector(QObject):
                     row['combat_time'], format_datetime_str(entry.var_date), row['max_one_hit'],
                     row['debuff'], row.get('build', 'Unknown')))
             return table_index, table_data, logfile_ids
+        except CacheMiss:
+            return None
         except BaseException as e:
             self.handle_fetch_error(e)
 
-    def ladders(self, **kwargs) -> list[QListWidgetItem] | None:
+    def ladders(self, cached: bool = False, **kwargs) -> list[Ladder] | None:
         """
-        Fetch ladders from server and create ladder list. Returns `None` if ladders could not be
-        retrieved.
+        Fetch ladders from server. Returns `None` if ladders could not be retrieved. Does not create
+        any Qt objects, so it can run in a worker thread.
 
         Parameters:
-        - same as `LadderApi.ladder_list`
+        - :param cached: only reads ladders from the cache without contacting the server; returns
+        `None` without reporting an error if the ladders are not cached
+        - other parameters are the same as `LadderApi.ladder_list`
         """
         try:
-            ladders = self._api_ladder.ladder_list(**kwargs).results
-            ladder_list = list()
-            for ladder in ladders:
-                solo = ' [Solo]' if ladder.is_solo else ''
-                key = f'{ladder.name}{solo}|{ladder.difficulty}'
-                text = f'{ladder.name}{solo}'
-                self.ladder_meta[key] = ladder
-                item = QListWidgetItem(text)
-                item.difficulty = ladder.difficulty
-                if ladder.difficulty != 'Any' and ladder.difficulty is not None:
-                    icon = self._theme.icons[f'TFO-{ladder.difficulty.lower()}']
-                    icon.addPixmap(icon.pixmap(18, 24), QIcon.Mode.Selected)
-                    item.setIcon(icon)
-                ladder_list.append(item)
-            return ladder_list
+            with self._api.cache_only() if cached else nullcontext():
+                return self._api_ladder.ladder_list(**kwargs).results
+        except CacheMiss:
+            return None
         except BaseException as e:
             self.handle_fetch_error(e)
 
@@ -266,45 +482,114 @@ class OSCRLeagueConnector(QObject):
 
     def update_seasonal_records(self, new_season: str):
         """
-        Update the default records widget
+        Update the default records widget. Ladders of seasons that were shown before are inserted
+        immediately, otherwise ladders are read from the response cache if possible. In both cases,
+        the ladders are fetched from the server in the background and replaced if they changed.
 
         Parameters:
         - :param new_season: Name of the season to be shown
         """
-        if self._thread is not None and not self._thread.isRunning():
-            self._thread = FetchThread(
-                self.ladders, kwargs={'variant': new_season},
-                callback=self._insert_seasonal_records)
-            self._thread.start()
-            self.status_message.emit(
-                tr('Updating ladders'),
-                tr('Retrieving ladders for season') + f' "{new_season}" ' + tr('from the server.'))
+        self._current_season = new_season
+        shown_ladders = self._season_ladders.get(new_season, None)
+        if shown_ladders is None:
+            shown_ladders = self.ladders(cached=True, variant=new_season)
+            if shown_ladders is not None:
+                self._season_ladders[new_season] = shown_ladders
+        if shown_ladders is not None:
+            self._insert_seasonal_records(shown_ladders)
+        self._requests.submit(
+            'ladders', self.ladders, kwargs={'variant': new_season},
+            callback=partial(self._revalidate_seasonal_records, new_season, shown_ladders))
+        self.status_message.emit(
+            tr('Updating ladders'),
+            tr('Retrieving ladders for season') + f' "{new_season}" ' + tr('from the server.'))
 
-    def _insert_seasonal_records(self, ladder_list: list[QListWidgetItem] | None):
+    def get_difficulty_icon(self, difficulty: str) -> QIcon:
         """
-        Puts fetched seasonal records into the ladder selector.
+        Returns icon shown next to ladders of `difficulty`. Icons are created on first use, using
+        the normal pixmap of the theme icon for the selected state as well.
 
         Parameters:
-        - :param ladder_list: list containing the ladder items
+        - :param difficulty: difficulty of the ladder, not "Any"
         """
-        if ladder_list is not None:
-            self._widgets.ladder_selector.clear()
-            for ladder_item in ladder_list:
-                self._widgets.ladder_selector.addItem(ladder_item)
-            self.status_message.emit(
-                tr('Ladders updated'), tr('Updated ladders to match the selected season.'))
+        try:
+            return self._difficulty_icons[difficulty]
+        except KeyError:
+            icon = QIcon(self._theme.icons[f'TFO-{difficulty.lower()}'])
+            icon.addPixmap(icon.pixmap(18, 24), QIcon.Mode.Selected)
+            self._difficulty_icons[difficulty] = icon
+            return icon
+
+    def _insert_seasonal_records(self, ladders: list[Ladder]):
+        """
+        Creates items for seasonal records and puts them into the ladder selector.
+
+        Parameters:
+        - :param ladders: ladders of the season
+        """
+        ladder_selector = self._widgets.ladder_selector
+        ladder_selector.setUpdatesEnabled(False)
+        ladder_selector.clear()
+        for ladder in ladders:
+            solo = ' [Solo]' if ladder.is_solo else ''
+            text = f'{ladder.name}{solo}'
+            self.ladder_meta[f'{text}|{ladder.difficulty}'] = ladder
+            item = QListWidgetItem(text)
+            item.difficulty = ladder.difficulty
+            if ladder.difficulty != 'Any' and ladder.difficulty is not None:
+                item.setIcon(self.get_difficulty_icon(ladder.difficulty))
+            ladder_selector.addItem(item)
+        ladder_selector.setUpdatesEnabled(True)
+        self.status_message.emit(
+            tr('Ladders updated'), tr('Updated ladders to match the selected season.'))
+
+    def _revalidate_seasonal_records(
+            self, season: str, shown_ladders: list[Ladder] | None, ladders: list[Ladder] | None):
+        """
+        Stores fetched ladders of season and replaces the shown ladders if they differ.
+
+        Parameters:
+        - :param season: season the ladders were fetched for
+        - :param shown_ladders: ladders shown before fetching, None if there were none
+        - :param ladders: fetched ladders
+        """
+        if ladders is None:
+            return
+        self._season_ladders[season] = ladders
+        if season != self._current_season:
+            return
+        if shown_ladders is not None:
+            shown_keys = [(ladder.id, ladder.name, ladder.is_solo, ladder.difficulty)
+                          for ladder in shown_ladders]
+            fetched_keys = [(ladder.id, ladder.name, ladder.is_solo, ladder.difficulty)
+                            for ladder in ladders]
+            if shown_keys == fetched_keys:
+                self.status_message.emit(
+                    tr('Ladders updated'), tr('Updated ladders to match the selected season.'))
+                return
+        self._insert_seasonal_records(ladders)
+
+    def set_filter_term(self, filter_term: str):
+        """
+        Filters the rows of the current table by `filter_term` immediately and queries the server
+        for matching rows once the term was not changed for `LADDER_SEARCH_DELAY` milliseconds.
+
+        Parameters:
+        - :param filter_term: search string for filtering player name
+        """
+        self.current_filter_term = filter_term
+        self.ladder_table_sort.name_filter = filter_term
+        if self.current_ladder_id is not None:
+            self._search_timer.start()
 
     def search_league_table(self):
         """
         Queries league tables for rows of the current table containing the current search term.
         """
-        if (self.current_ladder_id is None
-                or self._thread is None or self._thread.isRunning()):
+        self._search_timer.stop()
+        if self.current_ladder_id is None:
             return
-        self._thread = FetchThread(
-            self.ladder_entries, args=(self.current_ladder_id, 1, self.current_filter_term),
-            callback=self._insert_ladder_rows)
-        self._thread.start()
+        self._fetch_ladder('search', 'ladder', merge=True)
         if self.current_filter_term == '':
             self.status_message.emit(
                 tr('Retrieving Ladder'),
@@ -321,48 +606,112 @@ class OSCRLeagueConnector(QObject):
         Parameters:
         - :param selected_map_item: item containing name and difficulty of clicked map
         """
-        if self._thread is not None and not self._thread.isRunning():
-            map_key = f'{selected_map_item.text()}|{selected_map_item.difficulty}'
-            if map_key not in self.ladder_meta:
-                return
-            selected_ladder = self.ladder_meta[map_key]
-            self.current_ladder_id = selected_ladder.id
-            self._thread = FetchThread(
-                self.ladder_entries, args=(selected_ladder.id, 1, self.current_filter_term),
-                callback=self._insert_ladder_rows)
-            self._thread.start()
-            if selected_map_item.difficulty is None:
-                map_name = selected_map_item.text()
-            else:
-                map_name = f'{selected_map_item.text()} - {selected_map_item.difficulty}'
+        map_key = f'{selected_map_item.text()}|{selected_map_item.difficulty}'
+        if map_key not in self.ladder_meta:
+            return
+        selected_ladder = self.ladder_meta[map_key]
+        self.current_ladder_id = selected_ladder.id
+        self._search_timer.stop()
+        self._fetch_ladder('ladder', 'search')
+        if selected_map_item.difficulty is None:
+            map_name = selected_map_item.text()
+        else:
+            map_name = f'{selected_map_item.text()} - {selected_map_item.difficulty}'
+        self.status_message.emit(
+            tr('Retrieving ladder'), tr('Fetching ladder table for') + f' "{map_name}".')
+
+    def _fetch_ladder(self, category: str, superseded_category: str, merge: bool = False):
+        """
+        Shows cached first page of the current ladder immediately and fetches it from the server in
+        the background.
+
+        Parameters:
+        - :param category: request category of the fetch
+        - :param superseded_category: request category cancelled by the fetch
+        - :param merge: merges rows into the table instead of replacing the table contents
+        """
+        fetch_args = (self.current_ladder_id, 1, self.current_filter_term)
+        cached_data = self.ladder_entries(*fetch_args, cached=True)
+        if cached_data is not None:
+            self._insert_ladder_rows(cached_data, merge)
+        self._requests.submit(
+            category, self.ladder_entries, args=fetch_args,
+            callback=partial(self._revalidate_ladder_rows, cached_data, merge),
+            supersedes=(superseded_category,))
+
+    def _revalidate_ladder_rows(
+            self, cached_data: tuple[list, list, list] | None, merge: bool,
+            ladder_data: tuple[list, list, list] | None):
+        """
+        Replaces ladder rows shown from the cache with the fetched rows if they differ.
+
+        Parameters:
+        - :param cached_data: ladder rows shown from the cache, None if there were none
+        - :param merge: merges rows into the table instead of replacing the table contents
+        - :param ladder_data: fetched ladder rows
+        """
+        if ladder_data is None:
+            return
+        if ladder_data == cached_data:
             self.status_message.emit(
-                tr('Retrieving ladder'), tr('Fetching ladder table for') + f' "{map_name}".')
+                tr('Table updated'), tr('Ladder table retrieved successfully.'))
+            self.prefetch_ladder()
+        else:
+            self._insert_ladder_rows(ladder_data, merge)
 
-    def _insert_ladder_rows(self, ladder_data: tuple[list, list, list] | None):
+    def _insert_ladder_rows(
+            self, ladder_data: tuple[list, list, list] | None, merge: bool = False):
         """
         Puts fetched ladder rows into the table.
+
+        Parameters:
+        - :param ladder_data: fetched ladder rows
+        - :param merge: merges rows into the table, keeping unchanged rows, instead of replacing
+        the table contents and scrolling to the top
         """
         if ladder_data is not None:
             table_index, table_data, logfile_ids = ladder_data
-            self.entire_ladder_loaded = False
             self.pages_loaded = 1
-            self.ladder_table_model.replace_data(table_index, table_data, logfile_ids)
-            self._widgets.ladder_table.resizeColumnsToContents()
-            self._widgets.ladder_table.scrollToTop()
+            self.ladder_table_model.more_rows_available = len(table_data) == LADDER_PAGE_SIZE
+            table = self._widgets.ladder_table
+            if merge:
+                self.ladder_table_model.merge_data(table_index, table_data, logfile_ids)
+                self._widen_ladder_columns(0)
+            else:
+                self.ladder_table_model.replace_data(table_index, table_data, logfile_ids)
+                if len(table_data) > 0:
+                    # fitting every row to its contents makes long tables slow
+                    table.verticalHeader().setDefaultSectionSize(table.sizeHintForRow(0))
+                table.resizeColumnsToContents()
+                table.scrollToTop()
             self.status_message.emit(
                 tr('Table updated'), tr('Ladder table retrieved successfully.'))
+            self.prefetch_ladder()
+
+    def prefetch_ladder(self):
+        """
+        Fetches the next page of the ladder when less than a page of rows is left below the visible
+        rows of the table.
+        """
+        if not self.ladder_table_model.more_rows_available:
+            return
+        table = self._widgets.ladder_table
+        last_visible_row = table.rowAt(table.viewport().height() - 1)
+        if (last_visible_row == -1
+                or self.ladder_table_sort.rowCount() - last_visible_row <= LADDER_PAGE_SIZE):
+            self.extend_ladder()
 
     def extend_ladder(self):
         """
-        Extends the ladder table by 50 newly fetched rows.
+        Extends the ladder table by a page of newly fetched rows.
         """
-        if (self.entire_ladder_loaded or self.current_ladder_id is None
-                or self._thread is None or self._thread.isRunning()):
+        if (not self.ladder_table_model.more_rows_available or self.current_ladder_id is None
+                or self._search_timer.isActive() or self._requests.is_busy('ladder')
+                or self._requests.is_busy('search')):
             return
         fetch_args = (self.current_ladder_id, self.pages_loaded + 1, self.current_filter_term)
-        self._thread = FetchThread(
-            self.ladder_entries, args=fetch_args, callback=self._extend_ladder_rows)
-        self._thread.start()
+        self._requests.submit(
+            'ladder', self.ladder_entries, args=fetch_args, callback=self._extend_ladder_rows)
         self.status_message.emit(
             tr('Extending ladder'), tr('Fetching more rows of the current ladder.'))
 
@@ -373,59 +722,144 @@ class OSCRLeagueConnector(QObject):
         if ladder_data is not None:
             table_index, table_data, logfile_ids = ladder_data
             self.pages_loaded += 1
+            first_row = self.ladder_table_model.rowCount(QModelIndex())
             self.ladder_table_model.extend_data(table_index, table_data, logfile_ids)
-            self._widgets.ladder_table.resizeColumnsToContents()
-            self._widgets.ladder_table.scrollToTop()
+            self._widen_ladder_columns(first_row)
             self.status_message.emit(
                 tr('Table updated'), tr('Ladder table retrieved successfully.'))
-            if len(table_data) < 50:
-                self.entire_ladder_loaded = True
+            if len(table_data) < LADDER_PAGE_SIZE:
+                self.ladder_table_model.more_rows_available = False
                 self.status_message.emit(
                     tr('Table complete'),
                     tr('All entries of the current ladder are present in the table.'))
+            else:
+                self.prefetch_ladder()
+
+    def _widen_ladder_columns(self, first_row: int):
+        """
+        Widens the columns of the ladder table that are too narrow for the rows starting at
+        `first_row`; other columns keep their width.
+        """
+        table = self._widgets.ladder_table
+        grid_width = 1 if table.showGrid() else 0
+        row_count = self.ladder_table_model.rowCount(QModelIndex())
+        for column in range(self.ladder_table_model.columnCount(QModelIndex())):
+            width = table.columnWidth(column)
+            for row in range(first_row, row_count):
+                index = self.ladder_table_sort.mapFromSource(
+                        self.ladder_table_model.index(row, column))
+                width = max(width, table.sizeHintForIndex(index).width() + grid_width)
+            if width > table.columnWidth(column):
+                table.setColumnWidth(column, width)
 
     def download_and_view_combat(self):
         """
         Download a combat log and view its contents in the overview / analysis pages.
         """
         selection = self._widgets.ladder_table.selectedIndexes()
-        if len(selection) < 1 or self._thread is None or self._thread.isRunning():
+        if len(selection) < 1:
             return
         original_index = self.ladder_table_sort.mapToSource(selection[0])
         log_id = self.ladder_table_model.combatlog_id_list[original_index.row()]
-        self._thread = FetchThread(
-            self.download, args=(log_id,),
-            callback=lambda log_path: self._parser.analyze_log_file(log_path, hidden_path=True))
-        self._thread.start()
+        self._requests.submit(
+            'download', self.download, args=(log_id,), callback=self._view_downloaded_combat)
         self.status_message.emit(tr('Downloading log file'), tr('Log file id:') + f' "{log_id}"')
 
+    def _view_downloaded_combat(self, log_path: Path | None):
+        """
+        Analyzes downloaded log file.
+
+        Parameters:
+        - :param log_path: path to the downloaded log file
+        """
+        if log_path is not None:
+            self._parser.analyze_log_file(log_path, hidden_path=True)
+
     def upload_callback(self):
         """
-        Helper function to grab the current combat and upload it to the backend.
+        Adds the combats selected in the combat list, or the current combat if none is selected, to
+        the upload queue.
         """
-        try:
-            current_combat = self._parser.current_combat
-        except IndexError:
-            return
+        combat_ids = [index.data()[0] for index in self._widgets.combats_list.selectedIndexes()]
+        if len(combat_ids) == 0:
+            if self._parser.current_combat_id == -1:
+                return
+            combat_ids = [self._parser.current_combat_id]
         self.establish_league_connection(fetch_seasons=False)
-        if self._thread is not None and self._thread.isRunning():
-            self.status_message.emit(
-                tr('League busy'), tr('Please wait for the last league request to finish.'))
+        for combat_id in sorted(combat_ids):
+            try:
+                combat = self._parser.combat_list[combat_id]
+            except IndexError:
+                continue
+            name = get_combat_file_name(combat.map, combat.difficulty, combat.start_time)
+            self._submit_upload(self.upload_queue.add(name, combat.log_file, *combat.file_pos))
+        self.status_message.emit(
+            tr('Upload queued'),
+            str(len(self.upload_queue)) + ' ' + tr('combats are waiting to be uploaded.'))
+
+    def resume_uploads(self):
+        """
+        Uploads combats that remained in the upload queue when the app was closed.
+        """
+        if len(self.upload_queue) == 0:
             return
-        combat = (current_combat.log_file, current_combat.file_pos[0], current_combat.file_pos[1])
-        self._thread = FetchThread(self.upload, args=(combat,), callback=self._handle_upload)
-        self._thread.start()
-        self.status_message.emit(tr('Uploading log file'), '')
+        self.establish_league_connection(fetch_seasons=False)
+        for item in self.upload_queue.items:
+            self._submit_upload(item)
+        self.status_message.emit(
+            tr('Resuming uploads'),
+            str(len(self.upload_queue)) + ' ' + tr('combats are waiting to be uploaded.'))
 
-    def _handle_upload(self, response: CombatLogUploadV2Response | None):
+    def _submit_upload(self, item: QueuedUpload):
         """
-        Informs the user after upload.
+        Schedules upload of queue entry; uploads run one after another.
+        """
+        self._upload_retries.discard(item.id)
+        self._requests.submit(
+            'upload', self.upload, args=(item,), callback=partial(self._handle_upload, item))
 
-        Parameters:
-        - :param response: contains data about upload
+    def _handle_upload(
+            self, item: QueuedUpload, result: CombatLogUploadV2Response | BaseException):
         """
-        if response is None:
-            self.status_message.emit(tr('Upload failed'), tr('Could not connect to the server.'))
+        Removes uploaded combat from the queue or schedules retry of failed upload. Uploads that
+        failed because of the connection or the server are retried `UPLOAD_ATTEMPTS` times and then
+        stay in the queue to be retried by `resume_uploads`; uploads rejected by the server are
+        removed. Shows the results once all queued combats were processed.
+
+        Parameters:
+        - :param item: uploaded queue entry
+        - :param result: response of the upload or error that made it fail
+        """
+        if isinstance(result, BaseException):
+            self.upload_queue.record_failure(item)
+            client_error = isinstance(result, StaleUploadError) or (
+                isinstance(result, ApiException) and result.status is not None
+                and 400 <= result.status < 500)
+            if client_error:
+                self.upload_queue.remove(item)
+            elif item.attempts % UPLOAD_ATTEMPTS != 0:
+                # every session retries queued uploads `UPLOAD_ATTEMPTS` times
+                delay = UPLOAD_RETRY_DELAY * 2 ** ((item.attempts - 1) % UPLOAD_ATTEMPTS)
+                self._upload_retries.add(item.id)
+                QTimer.singleShot(delay, partial(self._submit_upload, item))
+                self.status_message.emit(
+                    tr('Upload failed'),
+                    tr('Retrying upload of') + f' "{item.name}" '
+                    + tr('in') + f' {delay // 1000}s.')
+                return
         else:
+            self.upload_queue.remove(item)
+        self._upload_results.append((item.name, result))
+        if self._requests.is_busy('upload') or len(self._upload_retries) > 0:
+            self.status_message.emit(
+                tr('Uploading combats'),
+                str(len(self.upload_queue)) + ' ' + tr('combats are waiting to be uploaded.'))
+            return
+        results = self._upload_results
+        self._upload_results = list()
+        if len(results) == 1 and not isinstance(results[0][1], BaseException):
             self.status_message.emit(tr('Upload performed'), '')
-            self._upload_dialog.show_dialog(response)
+            self._upload_dialog.show_dialog(results[0][1], self.server_url)
+        else:
+            self.status_message.emit(tr('Uploads performed'), '')
+            self._upload_dialog.show_results(results)
@@ -0,0 +1,308 @@
+"""
+Local stand-in for the league server, serving synthetic variants, ladders and ladder entries.
+Uploaded combat logs are kept in memory and can be downloaded again. Run with
+`python -m OSCRUI.leaguemirror` and set the league server in the settings to the printed address.
+"""
+
+from argparse import ArgumentParser
+from datetime import datetime, timedelta, timezone
+from email.parser import BytesParser
+from gzip import compress as gzip_compress, decompress as gzip_decompress
+from hashlib import md5
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import json
+from pathlib import Path
+from random import Random
+import re
+from threading import Lock
+import time
+from urllib.parse import parse_qs, urlencode, urlsplit
+
+MIRROR_HOST = '127.0.0.1'
+MIRROR_PORT = 8000
+MIRROR_ENTRIES = 1000
+MAX_PAGE_SIZE = 100
+# map name -> whether the map is a space map
+MIRROR_MAPS = {
+    'Infected Space': True, 'Hive Space': True, 'Azure Nebula Rescue': True,
+    'Borg Disconnected': True, 'Gravity Kills': True, 'Infected Ground': False,
+    'Bug Hunt': False, 'Nukara Prime: Transdimensional Tactics': False}
+MIRROR_DIFFICULTIES = ('Normal', 'Advanced', 'Elite')
+MIRROR_VARIANTS = ('Default', 'Mirror Season 2', 'Mirror Season 1')
+BUILDS = (
+    'Dew Point', 'Exotic Damage', 'Kinetic Cutting Beam', 'Photon Torpedo', 'Antiproton Beam',
+    'Phaser Beam Array', 'Plasma Explosion', 'Disruptor Dual Heavy Cannons')
+NAME_SYLLABLES = ('ka', 'to', 'ri', 'ven', 'sha', 'lor', 'mi', 'dax', 'el', 'qu', 'zan', 'tor')
+COMBATLOG_PATTERN = re.compile(r'^/combatlog/(\d+)/download/$')
+
+
+class LeagueMirror():
+    """
+    Synthetic league data. Data is generated from `seed`, so that a mirror started with the same
+    arguments always serves the same responses.
+    """
+
+    def __init__(
+            self, entry_count: int = MIRROR_ENTRIES, seed: int = 0, log_path: Path | None = None):
+        """
+        Parameters:
+        - :param entry_count: number of entries of each ladder
+        - :param seed: seed of the generated data
+        - :param log_path: combat log served for all ladder entries; only uploaded logs can be
+        downloaded if `None`
+        """
+        self._entry_count: int = entry_count
+        self._seed: int = seed
+        self._lock: Lock = Lock()
+        self._entries: dict[int, list[dict]] = dict()
+        self._uploads: dict[int, bytes] = dict()
+        self._entry_log: bytes | None = None
+        if log_path is not None:
+            self._entry_log = gzip_compress(log_path.read_bytes())
+        self.variants: list[dict] = list()
+        self.ladders: list[dict] = list()
+        end_date = datetime(2025, 1, 1, tzinfo=timezone.utc)
+        for variant_name in MIRROR_VARIANTS:
+            start_date = end_date - timedelta(days=180)
+            self.variants.append({
+                'name': variant_name, 'start_date': start_date.isoformat(),
+                'end_date': end_date.isoformat(), 'is_ground_variant': True,
+                'is_space_variant': True, 'exclude_space': list(), 'exclude_ground': list()})
+            end_date = start_date
+            for map_name, is_space in MIRROR_MAPS.items():
+                for difficulty in MIRROR_DIFFICULTIES:
+                    for is_solo in (False, True):
+                        self.ladders.append({
+                            'id': len(self.ladders) + 1, 'variant_name': variant_name,
+                            'name': map_name, 'difficulty': difficulty, 'is_solo': is_solo,
+                            'is_space': is_space, 'metric': 'DPS', 'variant': variant_name})
+
+    def get_entries(self, ladder_id: int) -> list[dict]:
+        """
+        Returns entries of ladder ordered by descending DPS; entries are generated on first use.
+        """
+        if not 0 < ladder_id <= len(self.ladders):
+            return list()
+        with self._lock:
+            if ladder_id not in self._entries:
+                self._entries[ladder_id] = self._create_entries(ladder_id)
+            return self._entries[ladder_id]
+
+    def _create_entries(self, ladder_id: int) -> list[dict]:
+        """
+        Generates entries of ladder.
+        """
+        random = Random(self._seed * 100003 + ladder_id)
+        first_date = datetime(2024, 7, 1, tzinfo=timezone.utc)
+        entries = list()
+        for player_num in range(self._entry_count):
+            name = ''.join(random.choices(NAME_SYLLABLES, k=random.randint(2, 4))).title()
+            handle = f'@{name.lower()}{player_num}'
+            combat_time = random.uniform(60, 600)
+            dps = random.lognormvariate(13, 0.6)
+            entries.append({
+                'date': (first_date + timedelta(seconds=random.randint(0, 15_000_000))).isoformat(),
+                'player': f'{name}{handle}', 'combatlog': ladder_id * 100000 + player_num,
+                'ladder': ladder_id, 'data': {
+                    'name': name, 'handle': handle, 'DPS': dps, 'total_damage': dps * combat_time,
+                    'deaths': random.choice((0, 0, 0, 1, 2)), 'combat_time': combat_time,
+                    'max_one_hit': dps * random.uniform(2, 20), 'debuff': random.uniform(0, 60),
+                    'build': random.choice(BUILDS)}})
+        entries.sort(key=lambda entry: entry['data']['DPS'], reverse=True)
+        for rank, entry in enumerate(entries, 1):
+            entry['id'] = entry['combatlog']
+            entry['rank'] = rank
+            entry['ladder_rank'] = rank
+        return entries
+
+    def add_upload(self, compressed_log: bytes) -> int:
+        """
+        Stores gzip compressed combat log and returns its combatlog id.
+        """
+        with self._lock:
+            combatlog_id = len(self._uploads) + 1
+            self._uploads[combatlog_id] = compressed_log
+            return combatlog_id
+
+    def get_log(self, combatlog_id: int) -> bytes | None:
+        """
+        Returns gzip compressed log of combatlog or `None` if it does not exist.
+        """
+        if combatlog_id in self._uploads:
+            return self._uploads[combatlog_id]
+        ladder_id, player_num = divmod(combatlog_id, 100000)
+        if 0 < ladder_id <= len(self.ladders) and player_num < self._entry_count:
+            return self._entry_log
+        return None
+
+
+class MirrorRequestHandler(BaseHTTPRequestHandler):
+    """Answers league API requests from the `LeagueMirror` of the server"""
+
+    server: 'MirrorServer'
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        if not self.server.quiet:
+            super().log_message(format, *args)
+
+    def do_GET(self):
+        time.sleep(self.server.delay)
+        url = urlsplit(self.path)
+        query = {key: values[0] for key, values in parse_qs(url.query).items()}
+        mirror = self.server.mirror
+        if url.path == '/variant/':
+            variants = mirror.variants
+            if query.get('ordering', None) == 'start_date':
+                variants = variants[::-1]
+            self.send_page(variants, query)
+        elif url.path == '/ladder/':
+            ladders = mirror.ladders
+            if 'variant' in query:
+                ladders = [ladder for ladder in ladders if ladder['variant'] == query['variant']]
+            self.send_page(ladders, query)
+        elif url.path == '/ladder-entries/':
+            try:
+                entries = mirror.get_entries(int(query.get('ladder', 0)))
+            except ValueError:
+                entries = list()
+            search_term = query.get('player__icontains', '').casefold()
+            if search_term != '':
+                entries = [entry for entry in entries if search_term in entry['player'].casefold()]
+            self.send_page(entries, query)
+        elif match := COMBATLOG_PATTERN.match(url.path):
+            log = mirror.get_log(int(match.group(1)))
+            if log is None:
+                self.send_json({'detail': 'Not found.'}, 404)
+            else:
+                self.send_body(log, 'application/octet-stream')
+        else:
+            self.send_json({'detail': 'Not found.'}, 404)
+
+    def do_POST(self):
+        time.sleep(self.server.delay)
+        body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        if urlsplit(self.path).path != '/combatlog/uploadv2/':
+            self.send_json({'detail': 'Not found.'}, 404)
+            return
+        message = BytesParser().parsebytes(
+                b'Content-Type: ' + self.headers.get('Content-Type', '').encode() + b'\r\n\r\n'
+                + body)
+        compressed_log = None
+        if message.is_multipart():
+            for part in message.get_payload():
+                if part.get_param('name', header='content-disposition') == 'file':
+                    compressed_log = part.get_payload(decode=True)
+        try:
+            if compressed_log is None or len(gzip_decompress(compressed_log)) == 0:
+                raise ValueError
+        except (OSError, EOFError, ValueError):
+            self.send_json({'detail': 'Invalid combat log.'}, 400)
+            return
+        combatlog_id = self.server.mirror.add_upload(compressed_log)
+        self.send_json({'results': list(), 'combatlog': combatlog_id, 'detail': 'Log uploaded.'})
+
+    def send_page(self, results: list[dict], query: dict[str, str]):
+        """
+        Sends page of `results` selected by the `page` and `page_size` query parameters.
+        """
+        try:
+            page = int(query.get('page', 1))
+            page_size = min(int(query.get('page_size', MAX_PAGE_SIZE)), MAX_PAGE_SIZE)
+        except ValueError:
+            page = page_size = 0
+        if page < 1 or page_size < 1 or (page > 1 and (page - 1) * page_size >= len(results)):
+            self.send_json({'detail': 'Invalid page.'}, 404)
+            return
+        next_page = None
+        if page * page_size < len(results):
+            next_page = f'{urlsplit(self.path).path}?{urlencode({**query, 'page': page + 1})}'
+        self.send_json({
+            'count': len(results), 'next': next_page, 'previous': None,
+            'results': results[(page - 1) * page_size:page * page_size]})
+
+    def send_json(self, data, status: int = 200):
+        """
+        Sends `data` encoded as JSON. Successful responses carry an ETag and are answered with
+        "304 Not Modified" if the client already has them.
+        """
+        body = json.dumps(data).encode()
+        if status != 200:
+            self.send_body(body, 'application/json', status)
+            return
+        etag = f'"{md5(body).hexdigest()}"'
+        if self.headers.get('If-None-Match', None) == etag:
+            self.send_response(304)
+            self.send_header('ETag', etag)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+        else:
+            self.send_body(body, 'application/json', status, {'ETag': etag})
+
+    def send_body(
+            self, body: bytes, content_type: str, status: int = 200,
+            headers: dict[str, str] | None = None):
+        """
+        Sends response with `body`.
+        """
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        if headers is not None:
+            for name, value in headers.items():
+                self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class MirrorServer(ThreadingHTTPServer):
+    """HTTP server answering league API requests with synthetic data"""
+
+    daemon_threads = True
+
+    def __init__(
+            self, address: tuple[str, int], mirror: LeagueMirror, delay: float = 0.0,
+            quiet: bool = False):
+        """
+        Parameters:
+        - :param address: host and port to listen on; port 0 selects a free port
+        - :param mirror: data served by the server
+        - :param delay: seconds each request is delayed to simulate network latency
+        - :param quiet: disables logging of requests
+        """
+        super().__init__(address, MirrorRequestHandler)
+        self.mirror: LeagueMirror = mirror
+        self.delay: float = delay
+        self.quiet: bool = quiet
+
+    @property
+    def url(self) -> str:
+        return f'http://{self.server_address[0]}:{self.server_address[1]}'
+
+
+def main():
+    argparser = ArgumentParser(
+        prog='OSCR League Mirror', description='Local league server serving synthetic data.')
+    argparser.add_argument('--host', type=str, default=MIRROR_HOST, help='Address to listen on')
+    argparser.add_argument('--port', type=int, default=MIRROR_PORT, help='Port to listen on')
+    argparser.add_argument(
+        '--entries', type=int, default=MIRROR_ENTRIES, help='Number of entries of each ladder')
+    argparser.add_argument('--seed', type=int, default=0, help='Seed of the generated data')
+    argparser.add_argument(
+        '--log', type=Path, required=False, help='Combat log served for all ladder entries')
+    argparser.add_argument(
+        '--delay', type=float, default=0.0, help='Seconds each request is delayed')
+    argparser.add_argument('--quiet', action='store_true', help='Do not log requests')
+    args = argparser.parse_args()
+    mirror = LeagueMirror(args.entries, args.seed, args.log)
+    with MirrorServer((args.host, args.port), mirror, args.delay, args.quiet) as server:
+        print(f'League mirror listening on {server.url}', flush=True)
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,443 @@
+"""Local catalog of the combats contained in a folder of combat logs"""
+
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from multiprocessing import Event
+from multiprocessing.synchronize import Event as EventType
+import os
+from pathlib import Path
+import shlex
+import sqlite3
+from sys import maxsize
+from threading import Thread
+
+from PySide6.QtCore import QObject, Signal
+
+from OSCR import OSCR
+from OSCR.combat import Combat
+from OSCR.parser import analyze_combat
+
+from .parserbridge import ParserBridge
+from .translation import tr
+
+LIBRARY_SCHEMA = '''
+CREATE TABLE IF NOT EXISTS logs (
+    id INTEGER PRIMARY KEY,
+    path TEXT UNIQUE NOT NULL,
+    size INTEGER NOT NULL,
+    mtime REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS combats (
+    id INTEGER PRIMARY KEY,
+    log_id INTEGER NOT NULL REFERENCES logs(id) ON DELETE CASCADE,
+    map TEXT NOT NULL,
+    difficulty TEXT NOT NULL,
+    date TEXT NOT NULL,
+    time TEXT NOT NULL,
+    duration REAL NOT NULL,
+    player_count INTEGER NOT NULL,
+    players TEXT NOT NULL,
+    max_dps REAL NOT NULL,
+    total_damage REAL NOT NULL,
+    byte_start INTEGER NOT NULL,
+    byte_end INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS combat_players (
+    combat_id INTEGER NOT NULL REFERENCES combats(id) ON DELETE CASCADE,
+    player TEXT NOT NULL,
+    damage REAL NOT NULL,
+    dps REAL NOT NULL
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS combats_fts USING fts5(
+    map, difficulty, players, content='combats', content_rowid='id'
+);
+CREATE TRIGGER IF NOT EXISTS combats_fts_insert AFTER INSERT ON combats BEGIN
+    INSERT INTO combats_fts (rowid, map, difficulty, players)
+    VALUES (new.id, new.map, new.difficulty, new.players);
+END;
+CREATE TRIGGER IF NOT EXISTS combats_fts_delete AFTER DELETE ON combats BEGIN
+    INSERT INTO combats_fts (combats_fts, rowid, map, difficulty, players)
+    VALUES ('delete', old.id, old.map, old.difficulty, old.players);
+END;
+CREATE INDEX IF NOT EXISTS combats_date ON combats(date DESC, time DESC);
+CREATE INDEX IF NOT EXISTS combats_duration ON combats(duration);
+CREATE INDEX IF NOT EXISTS combats_player_count ON combats(player_count);
+CREATE INDEX IF NOT EXISTS combats_log ON combats(log_id);
+CREATE INDEX IF NOT EXISTS combat_players_combat ON combat_players(combat_id);
+CREATE INDEX IF NOT EXISTS combat_players_dps ON combat_players(dps);
+CREATE INDEX IF NOT EXISTS combat_players_damage ON combat_players(damage);
+'''
+LIBRARY_COLUMNS = (
+    'combats.id', 'map', 'date', 'time', 'difficulty', 'duration', 'player_count', 'players',
+    'max_dps', 'total_damage', 'path', 'byte_start', 'byte_end', 'size', 'mtime')
+LIBRARY_TABLE_HEADER = (
+    'Map', 'Difficulty', 'Date', 'Time', 'Duration', 'Players', 'Max DPS', 'Total Damage')
+LIBRARY_LIST_LIMIT = 10000
+LOG_FILE_PATTERN = '*.log'
+SCAN_POLL_INTERVAL = 0.25
+# query fields matched against the full text index, mapping field name to indexed column
+QUERY_TEXT_FIELDS = {'map': 'map', 'difficulty': 'difficulty', 'player': 'players'}
+# query fields compared to columns of combats or combat_players, mapping field name to column
+QUERY_COMBAT_FIELDS = {'duration': 'duration', 'players': 'player_count', 'date': 'date'}
+QUERY_PLAYER_FIELDS = {'dps': 'dps', 'damage': 'damage'}
+QUERY_OPERATORS = ('>=', '<=', '!=', '>', '<', '=')
+
+# set by `init_scan_worker` in the worker processes of a library scan
+scan_cancelled: EventType | None = None
+
+
+class ScanCancelled(Exception):
+    """Raised in a worker process when the library scan was cancelled"""
+
+
+def init_scan_worker(cancelled: EventType):
+    """
+    Stores the cancellation flag of the library scan in a worker process.
+    """
+    global scan_cancelled
+    scan_cancelled = cancelled
+
+
+def summarize_combat(combat: Combat) -> tuple:
+    """
+    Returns combat row and player rows for the catalog, taken from the overview of the analyzed
+    `combat`.
+
+    Parameters:
+    - :param combat: analyzed combat
+    """
+    player_rows = [
+        (player_name, player.total_damage, player.DPS)
+        for player_name, player in combat.players.items()]
+    player_rows.sort(key=lambda row: row[2], reverse=True)
+    combat_row = (
+        combat.map, combat.difficulty or '', combat.start_time.strftime('%Y-%m-%d'),
+        combat.start_time.strftime('%H:%M:%S'), combat.duration.total_seconds(),
+        len(player_rows), ', '.join(row[0] for row in player_rows),
+        max((row[2] for row in player_rows), default=0), sum(row[1] for row in player_rows),
+        *combat.file_pos)
+    return combat_row, player_rows
+
+
+def scan_log_file(path: str, parser_settings: dict) -> list[tuple]:
+    """
+    Isolates and analyzes all combats of a log file with the parser and returns their summaries,
+    so that the catalog contains the same numbers as the overview. Runs in a worker process; stops
+    with `ScanCancelled` before analyzing the next combat when the scan was cancelled.
+
+    Parameters:
+    - :param path: path to the log file
+    - :param parser_settings: settings of the parser
+
+    :return: list of combat row / player rows pairs
+    """
+    combats = list()
+
+    def add_combat(combat: Combat):
+        if scan_cancelled is not None and scan_cancelled.is_set():
+            raise ScanCancelled()
+        analyze_combat(combat)
+        combats.append(summarize_combat(combat))
+
+    # isolates combats starting from the end of the file, the same way `OSCR.analyze_log_file`
+    # does, but without keeping every combat of the file in memory
+    OSCR._analyze_log_file(path, maxsize, 0, 0, parser_settings, add_combat)
+    return combats
+
+
+def terminate_executor(executor: ProcessPoolExecutor, cancelled: EventType):
+    """
+    Cancels pending tasks of `executor` and stops its workers without waiting for running tasks.
+    Workers are terminated where the executor supports it, otherwise running tasks stop at the next
+    check of `cancelled`.
+
+    Parameters:
+    - :param executor: executor to terminate
+    - :param cancelled: cancellation flag shared with the worker processes
+    """
+    cancelled.set()
+    if hasattr(executor, 'terminate_workers'):  # Python 3.14+
+        executor.terminate_workers()
+    else:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+class CombatLibrary(QObject):
+    """
+    Catalog of all combats found in a folder of log files, stored in a SQLite database. Scanning
+    runs in the background and only reads files whose size or modification time changed.
+    """
+
+    status_message = Signal(str, str)
+    scan_finished = Signal()
+
+    def __init__(self, database_path: Path, parser: ParserBridge):
+        """
+        Parameters:
+        - :param database_path: path to the catalog database
+        - :param parser: parser bridge providing the parser settings
+        """
+        super().__init__()
+        self._database_path: Path = database_path
+        self._parser: ParserBridge = parser
+        self._thread: Thread | None = None
+        self._executor: ProcessPoolExecutor | None = None
+        self._scan_cancelled: EventType | None = None
+        self._cancelled: bool = False
+        self._connection: sqlite3.Connection = self.connect()
+
+    @property
+    def scanning(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def connect(self) -> sqlite3.Connection:
+        """
+        Opens new connection to the catalog; each thread needs its own connection.
+        """
+        connection = sqlite3.connect(self._database_path, timeout=30)
+        connection.execute('PRAGMA journal_mode=WAL')
+        connection.execute('PRAGMA foreign_keys=ON')
+        fts_exists = connection.execute(
+            "SELECT 1 FROM sqlite_master WHERE name = 'combats_fts'").fetchone()
+        connection.executescript(LIBRARY_SCHEMA)
+        if fts_exists is None:
+            with connection:
+                connection.execute("INSERT INTO combats_fts (combats_fts) VALUES ('rebuild')")
+        return connection
+
+    def scan(self, folder: Path):
+        """
+        Starts scanning `folder` and its subfolders for log files.
+
+        Parameters:
+        - :param folder: folder containing log files
+        """
+        if not folder.is_dir():
+            self.status_message.emit(
+                tr('Invalid folder'), tr('Please select an existing folder to scan.'))
+            return
+        if self.scanning:
+            self.status_message.emit(
+                tr('Library busy'), tr('The library is already being scanned.'))
+            return
+        self._cancelled = False
+        self._thread = Thread(target=self._scan, args=(folder,), daemon=True)
+        self._thread.start()
+        self.status_message.emit(tr('Scanning library'), str(folder))
+
+    def cancel_scan(self):
+        """
+        Stops running scan; files currently being read are abandoned before their next combat is
+        analyzed. Does not wait for the scan thread to finish.
+        """
+        self._cancelled = True
+        executor = self._executor
+        if executor is not None:
+            terminate_executor(executor, self._scan_cancelled)
+
+    def _scan(self, folder: Path):
+        """
+        Scans folder for new and changed log files and updates the catalog. Runs in a separate
+        thread; log files are read in parallel by worker processes.
+        """
+        connection = self.connect()
+        known_logs = {
+            path: (log_id, size, mtime)
+            for log_id, path, size, mtime in connection.execute(
+                'SELECT id, path, size, mtime FROM logs')}
+        changed_files = list()
+        found_paths = set()
+        for log_path in folder.rglob(LOG_FILE_PATTERN):
+            try:
+                stat = log_path.stat()
+            except OSError:
+                continue
+            path = str(log_path.absolute())
+            found_paths.add(path)
+            known_log = known_logs.get(path)
+            if known_log is None or known_log[1:] != (stat.st_size, stat.st_mtime):
+                changed_files.append((path, stat.st_size, stat.st_mtime))
+        folder_prefix = str(folder.absolute()) + os.sep
+        removed_ids = [
+            (log_id,) for path, (log_id, _, _) in known_logs.items()
+            if path.startswith(folder_prefix) and path not in found_paths]
+        connection.executemany('DELETE FROM logs WHERE id = ?', removed_ids)
+        connection.commit()
+
+        scanned_combats = 0
+        if len(changed_files) > 0:
+            parser_settings = self._parser.parser_settings
+            workers = min(len(changed_files), os.cpu_count() or 1)
+            self._scan_cancelled = cancelled = Event()
+            self._executor = executor = ProcessPoolExecutor(
+                    max_workers=workers, initializer=init_scan_worker, initargs=(cancelled,))
+            try:
+                futures = {
+                    executor.submit(scan_log_file, path, parser_settings): (path, size, mtime)
+                    for path, size, mtime in changed_files}
+                pending = set(futures)
+                num = 0
+                while len(pending) > 0 and not self._cancelled:
+                    done, pending = wait(
+                            pending, timeout=SCAN_POLL_INTERVAL, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        num += 1
+                        path, size, mtime = futures[future]
+                        try:
+                            combats = future.result()
+                        except Exception:  # unreadable file or broken worker process
+                            continue
+                        self.store_log(connection, path, size, mtime, combats)
+                        scanned_combats += len(combats)
+                        self.status_message.emit(
+                            tr('Scanning library'),
+                            f'{num} / {len(changed_files)}: {Path(path).name}')
+            finally:
+                self._executor = None
+                if self._cancelled:
+                    terminate_executor(executor, cancelled)
+                else:
+                    executor.shutdown()
+        connection.close()
+        if self._cancelled:
+            self.status_message.emit(tr('Library scan cancelled'), '')
+        else:
+            details = (
+                f'{len(changed_files)} ' + tr('new or changed log files with')
+                + f' {scanned_combats} ' + tr('combats were added to the library.'))
+            self.status_message.emit(tr('Library scanned'), details)
+        self.scan_finished.emit()
+
+    def store_log(
+            self, connection: sqlite3.Connection, path: str, size: int, mtime: float,
+            combats: list[tuple]):
+        """
+        Replaces the catalog entries of a log file.
+
+        Parameters:
+        - :param connection: catalog connection of the current thread
+        - :param path: absolute path of the log file
+        - :param size: size of the log file when it was read
+        - :param mtime: modification time of the log file when it was read
+        - :param combats: combat summaries as returned by `scan_log_file`
+        """
+        with connection:
+            connection.execute('DELETE FROM logs WHERE path = ?', (path,))
+            log_id = connection.execute(
+                'INSERT INTO logs (path, size, mtime) VALUES (?, ?, ?)',
+                (path, size, mtime)).lastrowid
+            for combat_row, player_rows in combats:
+                combat_id = connection.execute(
+                    'INSERT INTO combats (log_id, map, difficulty, date, time, duration, '
+                    'player_count, players, max_dps, total_damage, byte_start, byte_end) '
+                    'VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                    (log_id, *combat_row)).lastrowid
+                connection.executemany(
+                    'INSERT INTO combat_players (combat_id, player, damage, dps) '
+                    'VALUES (?, ?, ?, ?)',
+                    ((combat_id, *player_row) for player_row in player_rows))
+
+    def query(self, query_text: str = '', limit: int = LIBRARY_LIST_LIMIT) -> list[tuple]:
+        """
+        Returns catalog entries matching `query_text`, most recent combats first. Columns are
+        given by `LIBRARY_COLUMNS`. See `parse_query` for the query syntax.
+
+        Parameters:
+        - :param query_text: query
+        - :param limit: maximum number of entries
+        """
+        conditions, parameters = parse_query(query_text)
+        where = f'WHERE {" AND ".join(conditions)}' if conditions else ''
+        try:
+            return self._connection.execute(
+                f'SELECT {", ".join(LIBRARY_COLUMNS)} FROM combats '
+                f'JOIN logs ON logs.id = combats.log_id {where} '
+                'ORDER BY date DESC, time DESC LIMIT ?', (*parameters, limit)).fetchall()
+        except sqlite3.OperationalError:
+            self.status_message.emit(tr('Invalid query'), query_text)
+            return list()
+
+    def is_current(self, entry: tuple) -> bool:
+        """
+        Returns True if the log file of the catalog entry did not change since it was scanned.
+
+        Parameters:
+        - :param entry: catalog entry as returned by `query`
+        """
+        try:
+            stat = os.stat(entry[10])
+        except OSError:
+            return False
+        return (stat.st_size, stat.st_mtime) == (entry[13], entry[14])
+
+
+def parse_query(query_text: str) -> tuple[list[str], list]:
+    """
+    Translates library query into SQL conditions on the `combats` table. Words are separated by
+    spaces and all of them have to match; values containing spaces can be quoted.
+
+    - plain words match the beginning of any word in map, difficulty or players
+    - `map:`, `difficulty:` and `player:` restrict a word to one of those
+    - `duration`, `players` (number of players) and `date` can be compared to a value using one of
+      `>=`, `<=`, `!=`, `>`, `<` and `=`, for example `duration>120` or `date>=2024-05-01`
+    - `dps` and `damage` are compared to the values of every player; when combined with `player:`
+      the same player has to match both, for example `player:name@handle dps>1000000`
+
+    Parameters:
+    - :param query_text: query
+
+    :return: conditions and their parameters
+    """
+    try:
+        words = shlex.split(query_text)
+    except ValueError:
+        words = query_text.split()
+    conditions = list()
+    parameters = list()
+    text_terms = list()
+    player_conditions = list()
+    player_parameters = list()
+    for word in words:
+        field, separator, value = word.partition(':')
+        if separator and field.casefold() in QUERY_TEXT_FIELDS and value:
+            escaped_value = value.replace('"', '""')
+            column = QUERY_TEXT_FIELDS[field.casefold()]
+            text_terms.append(f'{column} : "{escaped_value}"*')
+            if column == 'players':
+                player_conditions.append('player LIKE ?')
+                player_parameters.append(f'%{value}%')
+            continue
+        for operator in QUERY_OPERATORS:
+            field, separator, value = word.partition(operator)
+            if separator:
+                break
+        field = field.casefold()
+        if separator and value and field in QUERY_COMBAT_FIELDS | QUERY_PLAYER_FIELDS:
+            if field != 'date':
+                try:
+                    value = float(value)
+                except ValueError:
+                    pass
+            if field in QUERY_COMBAT_FIELDS:
+                conditions.append(f'{QUERY_COMBAT_FIELDS[field]} {operator} ?')
+                parameters.append(value)
+            else:
+                player_conditions.append(f'{QUERY_PLAYER_FIELDS[field]} {operator} ?')
+                player_parameters.append(value)
+            continue
+        text_terms.append('"{}"*'.format(word.replace('"', '""')))
+    if len(text_terms) > 0:
+        conditions.append(
+            'combats.id IN (SELECT rowid FROM combats_fts WHERE combats_fts MATCH ?)')
+        parameters.append(' AND '.join(text_terms))
+    if len(player_conditions) > 0:
+        player_where = ' AND '.join(player_conditions)
+        if any(condition.startswith('player ') for condition in player_conditions):
+            # the full text index already narrowed down the combats, check their players only
+            conditions.append(
+                'EXISTS (SELECT 1 FROM combat_players WHERE combat_id = combats.id AND '
+                f'{player_where})')
+        else:
+            conditions.append(
+                f'combats.id IN (SELECT combat_id FROM combat_players WHERE {player_where})')
+        parameters.extend(player_parameters)
+    return conditions, parameters
@@ -0,0 +1,185 @@
+import os
+from multiprocessing import get_context
+from multiprocessing.process import BaseProcess
+from pathlib import Path
+import sys
+
+from PySide6.QtCore import QDir, QObject, QTimer, Signal
+from PySide6.QtWidgets import QApplication
+
+from OSCR import LiveParser
+
+from .config import OSCRConfig, OSCRSettings
+from .dialogs import DialogsWrapper
+from .iofunctions import load_icon_series, register_fonts
+from .liveparser import LiveParserWindow
+from .livesnapshot import LiveSnapshot
+from .theme import AppTheme
+from .translation import init_translation, tr
+from .widgetmanager import WidgetManager
+
+OVERLAY_WINDOW_SETTINGS = ('state__live_geometry', 'state__live_splitter')
+
+
+class LiveOverlayHost(QObject):
+    """
+    Runs the LiveParser in the main process and shows its data in an overlay window running in a
+    separate process, so that load on the main window does not stall the overlay.
+    """
+    closed = Signal()
+
+    def __init__(
+            self, global_settings: OSCRSettings, config: OSCRConfig, dialogs: DialogsWrapper,
+            app_dir: str):
+        """
+        Parameters:
+        - :param global_settings: OSCRSettings
+        - :param config: OSCRConfig
+        - :param dialogs: reference to dialogs
+        - :param app_dir: absolute path to install directory
+        """
+        super().__init__()
+        self._settings: OSCRSettings = global_settings
+        self._config: OSCRConfig = config
+        self._dialogs: DialogsWrapper = dialogs
+        self._app_dir: str = app_dir
+        self._liveparser: LiveParser = LiveParser(
+            update_callback=self.publish,
+            settings={'seconds_between_combats': self._settings.seconds_between_combats})
+        self._parser_active: bool = False
+        self._snapshot: LiveSnapshot | None = None
+        self._process: BaseProcess | None = None
+        self._poll_timer: QTimer = QTimer()
+        self._poll_timer.setInterval(250)
+        self._poll_timer.timeout.connect(self.poll)
+
+    @property
+    def running(self) -> bool:
+        """
+        True while an overlay process exists.
+        """
+        return self._process is not None
+
+    def toggle_window(self, activate: bool):
+        """
+        Starts / Stops overlay process.
+
+        Parameters:
+        - :param activate: True when overlay should be shown; False when open overlay should be
+        closed.
+        """
+        if activate:
+            if self.running:
+                return
+            if not self._liveparser.set_log_path(self._settings.sto_log_path):
+                bad_logfile_message = tr(
+                    'Make sure to set the STO Logfile setting in the settings tab to a valid '
+                    'logfile before starting the live parser.')
+                self._dialogs.show_message(tr('Invalid Logfile'), bad_logfile_message, 'warning')
+                self.closed.emit()
+                return
+            self._settings.store_settings()
+            self._snapshot = LiveSnapshot()
+            # spawn explicitly: a forked child would inherit the QApplication of this process
+            self._process = get_context('spawn').Process(
+                target=run_live_overlay, daemon=True, args=(
+                    self._snapshot.name,
+                    str(Path(self._config.config_dir, self._config.settings_file)),
+                    self._app_dir))
+            self._process.start()
+            self._poll_timer.start()
+        elif self._snapshot is not None:
+            self._snapshot.overlay_running = False
+
+    def shutdown(self, timeout: float = 2):
+        """
+        Closes the overlay and waits for the overlay process to exit.
+
+        Parameters:
+        - :param timeout: seconds to wait before the process is terminated
+        """
+        if not self.running:
+            return
+        self._snapshot.overlay_running = False
+        self._process.join(timeout)
+        if self._process.is_alive():
+            self._process.terminate()
+        self.cleanup()
+
+    def poll(self):
+        """
+        Applies parser state requested by the overlay and detects when the overlay exited.
+        """
+        if not self._process.is_alive():
+            self.cleanup()
+            self.closed.emit()
+            return
+        requested_state = self._snapshot.parser_active
+        if requested_state != self._parser_active:
+            self._parser_active = requested_state
+            if requested_state:
+                self._liveparser.start()
+            else:
+                self._liveparser.stop()
+
+    def publish(self, player_data: dict[tuple, dict], combat_time: float):
+        """
+        Passes LiveParser data on to the overlay. Called from LiveParser thread.
+        """
+        snapshot = self._snapshot
+        if snapshot is not None:
+            try:
+                snapshot.publish(player_data, combat_time)
+            except ValueError:  # snapshot was closed concurrently
+                pass
+
+    def cleanup(self):
+        """
+        Stops the parser and frees resources of the exited overlay process.
+        """
+        self._poll_timer.stop()
+        self._liveparser.stop()
+        self._parser_active = False
+        self._process.join()
+        self._process = None
+        snapshot = self._snapshot
+        self._snapshot = None
+        snapshot.close()
+        self._settings.load_settings(OVERLAY_WINDOW_SETTINGS)
+
+
+def run_live_overlay(snapshot_name: str, settings_file_path: str, app_dir: str):
+    """
+    Entry point of the overlay process. Shows a LiveParserWindow displaying the snapshots published
+    by the main process.
+
+    Parameters:
+    - :param snapshot_name: name of the shared memory snapshot
+    - :param settings_file_path: path to the settings file of the main process
+    - :param app_dir: absolute path to install directory
+    """
+    app = QApplication([])
+    settings = OSCRSettings(Path(settings_file_path))
+    init_translation(settings.language)
+    QDir.addSearchPath('assets_folder', os.path.join(app_dir, 'assets'))
+    theme = AppTheme(settings.ui_scale)
+    register_fonts(app_dir)
+    app.setStyleSheet(theme.create_style_sheet(theme['app']['style']))
+    theme.icons = load_icon_series({
+        'oscr': 'oscr_icon_small.png',
+        'copy': 'copy.svg',
+        'close': 'close.svg',
+        'error': 'error.svg',
+        'warning': 'warning.svg',
+        'info': 'info.svg',
+        'chevron-right': 'chevron-right.svg',
+        'chevron-down': 'chevron-down.svg'
+    }, app_dir)
+    dialogs = DialogsWrapper(None, theme)
+    window = LiveParserWindow(
+        settings, theme, dialogs, WidgetManager(settings), snapshot_name=snapshot_name)
+    window.closed.connect(app.quit)
+    window.toggle_window(True)
+    exit_code = app.exec()
+    settings.store_settings(OVERLAY_WINDOW_SETTINGS)
+    sys.exit(exit_code)
@@ -1,6 +1,9 @@
+from collections import deque
+
+from numpy import arange as np__arange, array as np__array, ndarray
 from pyqtgraph import mkPen, PlotDataItem, PlotWidget
 from PySide6.QtCore import QPoint, Qt, Signal, Slot
-from PySide6.QtGui import QMouseEvent
+from PySide6.QtGui import QMouseEvent, QPen
 from PySide6.QtWidgets import (
     QApplication, QGridLayout, QFrame, QHBoxLayout, QLabel, QSplitter, QTableView, QVBoxLayout)
 
@@ -9,6 +12,7 @@ from OSCR import LIVE_TABLE_HEADER, LiveParser
 from .datamodels import LiveParserTableModel
 from .dialogs import DialogsWrapper
 from .config import OSCRSettings
+from .livesnapshot import LiveSnapshotReader
 from .theme import AppTheme
 from .translation import tr
 from .widgetbuilder import (
@@ -17,40 +21,126 @@ from .widgetbuilder import (
 from .widgetmanager import WidgetManager
 from .widgets import CustomPlotAxis, FlipButton, SizeGrip
 
+GRAPH_HISTORY = 15
+ROLLING_WINDOWS = (5, 10, 30)
+BURST_WINDOW = 5
+LIVE_PARSER_HEADER = (
+    *LIVE_TABLE_HEADER, *(f'DPS ({window}s)' for window in ROLLING_WINDOWS), 'Burst Peak')
+
+
+class RollingWindow():
+    """
+    Sliding window over the last `size` one-second damage samples. Keeps a running sum, so adding a
+    sample and reading the average are O(1).
+    """
+    __slots__ = ('_samples', '_sum')
+
+    def __init__(self, size: int):
+        """
+        Parameters:
+        - :param size: length of the window in seconds
+        """
+        self._samples: deque[float] = deque(maxlen=size)
+        self._sum: float = 0
+
+    def push(self, value: float):
+        """
+        Adds new sample to the window, dropping the oldest sample when the window is full.
+
+        Parameters:
+        - :param value: damage dealt during the last second
+        """
+        if len(self._samples) == self._samples.maxlen:
+            self._sum -= self._samples[0]
+        self._samples.append(value)
+        self._sum += value
+
+    @property
+    def average(self) -> float:
+        """
+        Average damage per second over the samples currently in the window.
+        """
+        if len(self._samples) == 0:
+            return 0
+        return self._sum / len(self._samples)
+
+
+class RollingMetrics():
+    """
+    Rolling-window metrics of a single player, updated once per live parser tick.
+    """
+    __slots__ = ('_last_damage', '_windows', '_burst_window', 'burst_peak')
+
+    def __init__(self):
+        self._last_damage: float = 0
+        self._windows: tuple[RollingWindow, ...] = tuple(
+            RollingWindow(window) for window in ROLLING_WINDOWS)
+        self._burst_window: RollingWindow = RollingWindow(BURST_WINDOW)
+        self.burst_peak: float = 0
+
+    def update(self, total_damage: float) -> tuple[float, ...]:
+        """
+        Adds the damage dealt since the last update to all windows and returns the rolling DPS
+        values followed by the burst peak.
+
+        Parameters:
+        - :param total_damage: total damage the player has dealt in this combat so far
+        """
+        delta = max(total_damage - self._last_damage, 0)
+        self._last_damage = total_damage
+        for window in self._windows:
+            window.push(delta)
+        self._burst_window.push(delta)
+        self.burst_peak = max(self.burst_peak, self._burst_window.average)
+        return (*(window.average for window in self._windows), self.burst_peak)
+
 
 class LiveParserWindow(QFrame):
     """Manages LiveParser and its window"""
     update_table = Signal(tuple)
     update_graph = Signal(list)
+    closed = Signal()
 
     def __init__(
             self, global_settings: OSCRSettings, theme: AppTheme, dialogs: DialogsWrapper,
-            widgets: WidgetManager):
+            widgets: WidgetManager, snapshot_name: str | None = None):
         """
         Parameters:
         - :param global_settings: OSCRSettings
         - :param theme: reference to app theme
         - :param dialogs: reference to dialogs
         - :param widgets: reference to widget store
+        - :param snapshot_name: name of the shared memory snapshot to display instead of running a
+        LiveParser; used when the window runs as overlay in a separate process
         """
         super().__init__()
         self._settings: OSCRSettings = global_settings
         self._theme: AppTheme = theme
         self._dialogs: DialogsWrapper = dialogs
         self._widgets: WidgetManager = widgets
-        self._liveparser: LiveParser = LiveParser(
-            update_callback=self.update_live_display, settings=self.live_parser_settings)
+        self._liveparser: LiveParser | LiveSnapshotReader
+        if snapshot_name is None:
+            self._liveparser = LiveParser(
+                update_callback=self.update_live_display, settings=self.live_parser_settings)
+        else:
+            self._liveparser = LiveSnapshotReader(
+                snapshot_name, self.update_live_display, lambda: self.toggle_window(False))
         self._move_start_pos: QPoint
         self._window_scale: float
         self._splitter: QSplitter
-        self._graph_curves: list[PlotDataItem]
+        self._plot_widget: PlotWidget
+        self._graph_curves: dict[tuple, tuple[PlotDataItem, int]] = dict()
+        self._graph_time: ndarray = np__arange(1 - GRAPH_HISTORY, 1)
         self._table: QTableView
         self._table_model: LiveParserTableModel
         self._activate_button: FlipButton
         self._duration_label: QLabel
         self._graph_active: bool = False
-        self._graph_data_buffer: list[list[int | float]] = list()
+        self._graph_data_buffer: dict[tuple, deque[float]] = dict()
+        self._player_colors: dict[tuple, int] = dict()
         self._graph_column: int = 0
+        self._rolling_metrics: dict[tuple, RollingMetrics] = dict()
+        self._last_combat_time: float = 0
         self.build_window()
 
     @property
@@ -90,7 +180,8 @@ class LiveParserWindow(QFrame):
         self._splitter.setStyleSheet(self._theme.get_style_class(
             'QSplitter', 'splitter', {'border': 'none', 'margin': 0}))
         self._splitter.setChildrenCollapsible(False)
-        graph_frame, self._graph_curves = self.create_live_graph()
+        graph_frame, self._plot_widget = self.create_live_graph()
+        self._graph_curves = dict()
         graph_frame.setMinimumHeight(self._window_scale * 50)
         self._splitter.addWidget(graph_frame)
         layout.addWidget(self._splitter, stretch=1)
@@ -120,8 +211,8 @@ class LiveParserWindow(QFrame):
         table.setMinimumWidth(self._window_scale * 150)
         table.setMinimumHeight(self._window_scale * 50)
         table.setSortingEnabled(True)
-        graph_colors = (*self._theme['plot']['color_cycler'][:5], '#eeeeee')
-        self._table_model = LiveParserTableModel(tr(LIVE_TABLE_HEADER), graph_colors)
+        graph_colors = (*self._theme['plot']['color_cycler'], '#eeeeee')
+        self._table_model = LiveParserTableModel(tr(LIVE_PARSER_HEADER), graph_colors)
         self._table_model.init_fonts(
             self._theme.get_font('live_table_header'), self._theme.get_font('live_table'))
         table.setModel(self._table_model)
@@ -169,11 +260,11 @@ class LiveParserWindow(QFrame):
         self.update_graph.connect(self.update_live_graph)
         self._theme.scale = ui_scale_temp
 
-    def create_live_graph(self) -> tuple[QFrame, list[PlotDataItem]]:
+    def create_live_graph(self) -> tuple[QFrame, PlotWidget]:
         """
         Creates and styles live graph.
 
-        :return: Frame containing the graph and list of curves that will be used to plot the data
+        :return: Frame containing the graph and the plot widget curves will be added to
         """
         plot_widget = PlotWidget()
         left_axis = CustomPlotAxis(
@@ -189,12 +280,9 @@ class LiveParserWindow(QFrame):
         plot_widget.setMenuEnabled(False)
         plot_widget.hideButtons()
         plot_widget.setDefaultPadding(padding=0)
-        plot_widget.setXRange(-14, 0, padding=0)
-
-        curves = list()
-        for color_index in range(5):
-            color = self._theme['plot']['color_cycler'][color_index]
-            curves.append(plot_widget.plot([0], [0], pen=mkPen(color, width=1)))
+        plot_widget.setXRange(1 - GRAPH_HISTORY, 0, padding=0)
+        plot_widget.setDownsampling(auto=True, mode='peak')
+        plot_widget.setClipToView(True)
 
         frame = create_frame(self._theme, 'plot_widget', size_policy=SMIXMAX, style_override={
                 'margin': 4, 'padding': 2, 'border': 'none'})
@@ -204,7 +292,50 @@ class LiveParserWindow(QFrame):
         layout.setContentsMargins(0, 0, 0, 0)
         layout.addWidget(plot_widget, stretch=1)
         frame.setLayout(layout)
-        return frame, curves
+        return frame, plot_widget
+
+    def get_curve_pen(self, color_slot: int) -> QPen:
+        """
+        Returns pen for the curve with `color_slot`. Colors of the color cycler are used in order;
+        once they are exhausted, they are reused with a different line style.
+
+        Parameters:
+        - :param color_slot: stable color index of the player the curve belongs to
+        """
+        color_cycler = self._theme['plot']['color_cycler']
+        line_styles = (Qt.PenStyle.SolidLine, Qt.PenStyle.DashLine, Qt.PenStyle.DotLine)
+        cycle, color_index = divmod(color_slot, len(color_cycler))
+        return mkPen(color_cycler[color_index], width=1, style=line_styles[cycle % 3])
+
+    def create_live_curve(self, color_slot: int) -> PlotDataItem:
+        """
+        Adds new curve to the live graph.
+
+        Parameters:
+        - :param color_slot: stable color index of the player the curve belongs to
+        """
+        curve = self._plot_widget.plot(pen=self.get_curve_pen(color_slot))
+        curve.setDownsampling(auto=True, method='peak')
+        curve.setClipToView(True)
+        return curve
+
+    def get_color_slot(self, player: tuple) -> int:
+        """
+        Returns the color index assigned to `player`. Players without color are assigned the lowest
+        unused index, so that colors stay stable while the player remains in combat.
+
+        Parameters:
+        - :param player: tuple containing name and handle of the player
+        """
+        try:
+            return self._player_colors[player]
+        except KeyError:
+            used_slots = set(self._player_colors.values())
+            color_slot = 0
+            while color_slot in used_slots:
+                color_slot += 1
+            self._player_colors[player] = color_slot
+            return color_slot
 
     def update_shown_columns(self):
         """Shows/Hides appropriate table columns"""
@@ -226,17 +357,32 @@ class LiveParserWindow(QFrame):
         """
         cells = list()
         curves = list()
+        color_count = len(self._theme['plot']['color_cycler'])
+        if combat_time < self._last_combat_time:
+            self._rolling_metrics.clear()
+            self._graph_data_buffer.clear()
+            self._player_colors.clear()
+        self._last_combat_time = combat_time
         for player, player_data in player_data.items():
-            cells.append([player, *player_data.values(), 5])
+            try:
+                metrics = self._rolling_metrics[player]
+            except KeyError:
+                metrics = RollingMetrics()
+                self._rolling_metrics[player] = metrics
+            rolling_values = metrics.update(player_data['dps'] * player_data['combat_time'])
+            cells.append([player, *player_data.values(), *rolling_values, color_count])
         if self._graph_active:
-            if len(self._graph_data_buffer) == 0:
-                self._graph_data_buffer.extend(([0] * 15, [0] * 15, [0] * 15, [0] * 15, [0] * 15))
-            zipper = zip(self._graph_data_buffer, cells, self._graph_curves)
-            for id, (buffer_item, player_data, curve) in enumerate(zipper):
-                buffer_item.pop(0)
-                buffer_item.append(player_data[1 + self._graph_column])
-                player_data[8] = id
-                curves.append((curve, buffer_item))
+            for player_cells in cells:
+                player = player_cells[0]
+                try:
+                    buffer = self._graph_data_buffer[player]
+                except KeyError:
+                    buffer = deque([0] * GRAPH_HISTORY, maxlen=GRAPH_HISTORY)
+                    self._graph_data_buffer[player] = buffer
+                buffer.append(player_cells[1 + self._graph_column])
+                color_slot = self.get_color_slot(player)
+                player_cells[-1] = color_slot % color_count
+                curves.append((player, color_slot, np__array(buffer, dtype=float)))
             if len(curves) > 0:
                 self.update_graph.emit(curves)
 
@@ -265,8 +411,11 @@ class LiveParserWindow(QFrame):
                 self.build_window()
             if self._settings.state__live_geometry:
                 self.restoreGeometry(self._settings.state__live_geometry)
-            self._data_buffer = list()
-            FIELD_INDEX_CONVERSION = {0: 0, 1: 2, 2: 3, 3: 4}
+            self._graph_data_buffer.clear()
+            self._player_colors.clear()
+            self._rolling_metrics.clear()
+            self._last_combat_time = 0
+            FIELD_INDEX_CONVERSION = {0: 0, 1: 2, 2: 3, 3: 4, 4: 7, 5: 8, 6: 9, 7: 10}
             self._graph_column = FIELD_INDEX_CONVERSION[self._settings.liveparser__graph_field]
             self._table_model.legend_column = self._graph_column
             if self._settings.liveparser__graph_active:
@@ -291,7 +440,7 @@ class LiveParserWindow(QFrame):
             self.hide()
             if self._activate_button.isChecked():
                 self._activate_button.flip()
-            self._widgets.live_parser_button.setChecked(False)
+            self.closed.emit()
 
     @Slot()
     def update_live_table(self, data: list):
@@ -315,17 +464,30 @@ class LiveParserWindow(QFrame):
         self.update_table.disconnect(self.init_live_table_columns)
 
     @Slot()
-    def update_live_graph(self, curve_data: list[tuple[PlotDataItem, list[float]]]):
+    def update_live_graph(self, curve_data: list[tuple[tuple, int, ndarray]]):
         """
-        Updates the graph of the live parser with the supplied data
+        Updates the graph of the live parser with the supplied data. Curves are created for new
+        players and removed for players that left; the plot is repainted once after all curves
+        were updated.
 
         Parameters:
-        - :param curve_data: list containing pairs of curve items and data lists; curve items will
-        be updated with the data
+        - :param curve_data: list containing player, color index and data points of each curve
         """
-        time_data = list(range(-14, 1))
-        for curve, data_points in curve_data:
-            curve.setData(time_data, data_points)
+        self._plot_widget.setUpdatesEnabled(False)
+        current_players = set()
+        for player, color_slot, data_points in curve_data:
+            current_players.add(player)
+            try:
+                curve, curve_slot = self._graph_curves[player]
+                if curve_slot != color_slot:  # colors are reassigned when a new combat starts
+                    curve.setPen(self.get_curve_pen(color_slot))
+            except KeyError:
+                curve = self.create_live_curve(color_slot)
+            self._graph_curves[player] = (curve, color_slot)
+            curve.setData(self._graph_time, data_points)
+        for player in self._graph_curves.keys() - current_players:
+            self._plot_widget.removeItem(self._graph_curves.pop(player)[0])
+        self._plot_widget.setUpdatesEnabled(True)
 
     def live_parser_press_event(self, event: QMouseEvent):
         """
@@ -0,0 +1,164 @@
+from json import dumps, loads
+from multiprocessing.shared_memory import SharedMemory
+from struct import Struct
+from typing import Callable
+
+from PySide6.QtCore import QTimer
+
+# sequence number, payload size, parser active flag, overlay running flag
+SNAPSHOT_HEADER = Struct('<QIBB')
+SNAPSHOT_SIZE = 1 << 18
+
+
+class LiveSnapshot():
+    """
+    Shared memory block used to pass live parser data to an overlay running in another process.
+    The block is written by exactly one process and protected by a sequence counter: the counter is
+    odd while a snapshot is written, so readers can detect and retry torn reads without locking.
+    """
+
+    def __init__(self, name: str | None = None):
+        """
+        Parameters:
+        - :param name: name of an existing snapshot block to attach to; creates a new block when
+        `None`
+        """
+        if name is None:
+            self._memory: SharedMemory = SharedMemory(create=True, size=SNAPSHOT_SIZE)
+            self._memory.buf[:SNAPSHOT_HEADER.size] = SNAPSHOT_HEADER.pack(0, 0, 0, 1)
+            self._owner: bool = True
+        else:
+            self._memory: SharedMemory = SharedMemory(name=name, track=False)
+            self._owner: bool = False
+        self._sequence: int = 0
+
+    @property
+    def name(self) -> str:
+        return self._memory.name
+
+    @property
+    def parser_active(self) -> bool:
+        """
+        Set by the overlay when the user activates or deactivates the parser.
+        """
+        return bool(self._memory.buf[12])
+
+    @parser_active.setter
+    def parser_active(self, state: bool):
+        self._memory.buf[12] = int(state)
+
+    @property
+    def overlay_running(self) -> bool:
+        """
+        Cleared by the main process to request the overlay to close.
+        """
+        return bool(self._memory.buf[13])
+
+    @overlay_running.setter
+    def overlay_running(self, state: bool):
+        self._memory.buf[13] = int(state)
+
+    def publish(self, player_data: dict[tuple, dict], combat_time: float):
+        """
+        Writes new snapshot. Has the same signature as the `LiveParser` update callback.
+
+        Parameters:
+        - :param player_data: dictionary containing the new data
+        - :param combat_time: duration of the entire combat
+        """
+        players = [[*player, data] for player, data in player_data.items()]
+        payload = dumps({'combat_time': combat_time, 'players': players}).encode()
+        if SNAPSHOT_HEADER.size + len(payload) > SNAPSHOT_SIZE:
+            return
+        buffer = self._memory.buf
+        self._sequence += 1
+        buffer[0:8] = self._sequence.to_bytes(8, 'little')
+        buffer[SNAPSHOT_HEADER.size:SNAPSHOT_HEADER.size + len(payload)] = payload
+        buffer[8:12] = len(payload).to_bytes(4, 'little')
+        self._sequence += 1
+        buffer[0:8] = self._sequence.to_bytes(8, 'little')
+
+    def read(self, last_sequence: int) -> tuple[int, dict | None]:
+        """
+        Reads the current snapshot if it is newer than `last_sequence`. Returns sequence number and
+        decoded snapshot; the snapshot is `None` when no new consistent snapshot is available.
+
+        Parameters:
+        - :param last_sequence: sequence number of the snapshot read last
+        """
+        buffer = self._memory.buf
+        for _ in range(3):
+            sequence, size, _, _ = SNAPSHOT_HEADER.unpack_from(buffer)
+            if sequence == last_sequence or size == 0:
+                return last_sequence, None
+            if sequence % 2 == 1:
+                continue
+            payload = bytes(buffer[SNAPSHOT_HEADER.size:SNAPSHOT_HEADER.size + size])
+            if int.from_bytes(buffer[0:8], 'little') == sequence:
+                return sequence, loads(payload)
+        return last_sequence, None
+
+    def close(self):
+        """
+        Detaches from the shared memory block; the owning process also frees the block.
+        """
+        self._memory.close()
+        if self._owner:
+            self._memory.unlink()
+
+
+class LiveSnapshotReader():
+    """
+    Stands in for `LiveParser` inside the overlay process: polls the shared snapshot and passes new
+    data to the update callback on the GUI thread.
+    """
+
+    def __init__(
+            self, name: str, update_callback: Callable[[dict, float], None],
+            close_callback: Callable[[], None], interval: int = 100):
+        """
+        Parameters:
+        - :param name: name of the shared memory block
+        - :param update_callback: called with player data and combat time of new snapshots
+        - :param close_callback: called when the main process requests the overlay to close
+        - :param interval: polling interval in milliseconds
+        """
+        self._snapshot: LiveSnapshot = LiveSnapshot(name)
+        self._update_callback = update_callback
+        self._close_callback = close_callback
+        self._sequence: int = 0
+        self._timer: QTimer = QTimer()
+        self._timer.setInterval(interval)
+        self._timer.timeout.connect(self.poll)
+        self._timer.start()
+
+    def set_log_path(self, _) -> bool:
+        """
+        Log path is validated by the main process before the overlay is started.
+        """
+        return True
+
+    def start(self):
+        """
+        Requests the main process to start parsing.
+        """
+        self._snapshot.parser_active = True
+
+    def stop(self):
+        """
+        Requests the main process to stop parsing.
+        """
+        self._snapshot.parser_active = False
+
+    def poll(self):
+        """
+        Reads the latest snapshot and forwards it to the update callback.
+        """
+        if not self._snapshot.overlay_running:
+            self._timer.stop()
+            self._close_callback()
+            return
+        self._sequence, snapshot = self._snapshot.read(self._sequence)
+        if snapshot is not None:
+            player_data = {(name, handle): data for name, handle, data in snapshot['players']}
+            self._update_callback(player_data, snapshot['combat_time'])
@@ -1,3 +1,6 @@
+from concurrent.futures import as_completed, ThreadPoolExecutor
+from datetime import datetime
+import os
 from pathlib import Path
 from threading import Thread
 from traceback import format_exception
@@ -6,18 +9,20 @@ from PySide6.QtCore import QModelIndex, QObject, Signal
 from PySide6.QtGui import QFont
 from PySide6.QtWidgets import QApplication
 
-from OSCR import (
-    compose_logfile as oscr__compose_logfile, OSCR, extract_bytes as oscr__extract_bytes,
-    repair_logfile as oscr__repair_logfile, TABLE_HEADER)
+from OSCR import OSCR, repair_logfile as oscr__repair_logfile, TABLE_HEADER
 from OSCR.combat import Combat
 
+from .aggregate import CombatAggregate, CombatColumns
 from .analysisgraphs import AnalysisGraphs
 from .analysistables import AnalysisTables
+from .combatexport import (
+    EXPORT_FORMATS, EXPORT_WORKERS, export_combat, get_combat_file_name, get_export_filter)
 from .config import OSCRConfig, OSCRSettings
 from .datamodels import CombatModel, DamageTreeModel, HealTreeModel, OverviewTableModel
 from .dialogs import DialogsWrapper
-from .iofunctions import browse_path, save_to_json
+from .iofunctions import archive_byte_range, browse_folder, browse_path, copy_byte_ranges
 from .textedit import format_damage_number
+from .timeseries import create_damage_timelines, DamageTimeline, MIN_RESOLUTION
 from .translation import tr
 from .widgetmanager import WidgetManager
 
@@ -51,6 +56,7 @@ class ParserBridge(QObject):
         self._parser.combat_analyzed_callback = lambda combat: self.completed_combat.emit(combat)
         self._parser.task_finished_callback = self.analyzation_finished
         self._thread: Thread | None = None
+        self._export_thread: Thread | None = None
         self.analyzed_combats: CombatModel = CombatModel()
         self.current_combat_id: int = -1
         self.overview_table_model: OverviewTableModel = OverviewTableModel()
@@ -58,6 +64,10 @@ class ParserBridge(QObject):
         self.damage_in_model: DamageTreeModel = DamageTreeModel()
         self.heal_out_model: HealTreeModel = HealTreeModel()
         self.heal_in_model: HealTreeModel = HealTreeModel()
+        self._damage_timelines: dict[int, dict[str, DamageTimeline]] = dict()
+        self._combat_columns: dict[int, CombatColumns] = dict()
+        self._aggregate: tuple[frozenset[int], CombatAggregate] | None = None
+        self.aggregate_statistic: str = 'Mean'
         self._widgets: WidgetManager = widgets
         self._dialogs: DialogsWrapper = dialogs
         self._tables: AnalysisTables
@@ -68,10 +78,12 @@ class ParserBridge(QObject):
         """
         Returns settings relevant to the parser
         """
-        relevant_settings = (
-            'combats_to_parse', 'seconds_between_combats',
-            'graph_resolution', 'combat_min_lines')
-        settings = {'excluded_event_ids': self._global_config.excluded_event_ids}
+        relevant_settings = ('combats_to_parse', 'seconds_between_combats', 'combat_min_lines')
+        settings = {
+            'excluded_event_ids': self._global_config.excluded_event_ids,
+            # overview graphs are re-binned to the graph resolution setting when plotted
+            'graph_resolution': MIN_RESOLUTION
+        }
         for setting_key in relevant_settings:
             setting = getattr(self._global_settings, setting_key)
             if setting != '':
@@ -150,6 +162,9 @@ class ParserBridge(QObject):
 
         self._parser.reset_parser()
         self.analyzed_combats.clear()
+        self._damage_timelines.clear()
+        self._combat_columns.clear()
+        self._aggregate = None
         self._parser.log_path = str(path)
         # Only analyze 1 combat for best performance, see self.insert_combat for remaining combats
         self._thread = Thread(target=self._parser.analyze_log_file, kwargs={'max_combats': 1})
@@ -159,6 +174,29 @@ class ParserBridge(QObject):
         self._widgets.switch_main_tab(0)
         self._widgets.switch_overview_tab(self._global_settings.first_overview_tab)
 
+    def analyze_log_excerpt(self, path: Path, start_position: int, end_position: int):
+        """
+        Copies a part of a logfile into the temporary folder and analyzes it. Used to open single
+        combats from large logfiles.
+
+        Parameters:
+        - :param path: path to combat log file
+        - :param start_position: first byte of the excerpt
+        - :param end_position: byte after the end of the excerpt
+        """
+        if self._thread is not None and self._thread.is_alive():
+            desc = tr(
+                'The parser is currently analyzing a log file, please wait for it to finish before '
+                'analyzing another log file.')
+            self.show_info(tr('Parser busy'), desc)
+            return
+        excerpt_path = self._global_config.templog_folder_path / 'library_excerpt.log'
+        if copy_byte_ranges(path, excerpt_path, ((start_position, end_position),)):
+            self.analyze_log_file(excerpt_path, hidden_path=True)
+        else:
+            desc = tr('Log file') + f' "{path.name}" ' + tr('could not be read by OSCR.')
+            self.show_info(tr('Invalid logfile'), desc)
+
     def analyze_log_background(self, amount: int = -1):
         """
         Analyzes older combats from current combatlog in the background.
@@ -251,21 +289,14 @@ class ParserBridge(QObject):
             combat = self._parser.combats[index]
             self.current_combat_id = combat.id
 
-        overview_table = list()
-        dps_graph_data = dict()
-        dmg_bar_data = dict()
-        time_data = dict()
-        for player in combat.players.values():
-            overview_table.append((*player,))
-            dps_graph_data[player.handle] = player.DPS_graph_data
-            dmg_bar_data[player.handle] = player.DMG_graph_data
-            time_data[player.handle] = player.graph_time
+        self._widgets.aggregate_statistic_combo.hide()
+        overview_table = [(*player,) for player in combat.players.values()]
         overview_table.sort(key=lambda x: x[0])
         if len(overview_table) > 0:
             table_cell_data = [list(line[2:]) for line in overview_table]
             table_index = [line[0] + line[1] for line in overview_table]
             self.overview_table_model.set_data(table_cell_data, TABLE_HEADER, table_index)
-            self._graphs.plot_overview_data(overview_table, dps_graph_data, dmg_bar_data, time_data)
+            self.plot_overview_graphs(combat, overview_table)
         else:
             self.overview_table_model.clear()
             self._graphs.clear_overview_plots()
@@ -276,6 +307,141 @@ class ParserBridge(QObject):
             self.damage_out_model.player_index, self.damage_in_model.player_index,
             self.heal_out_model.player_index, self.heal_in_model.player_index)
 
+    def show_aggregate(self, combat_ids: list[int]):
+        """
+        Shows statistics of several analyzed combats: the overview table contains the selected
+        statistic of every column per player, the analysis tables contain the merged totals of all
+        combats.
+
+        Parameters:
+        - :param combat_ids: ids of the combats to aggregate
+        """
+        combat_ids = sorted(set(combat_ids))
+        if len(combat_ids) < 2:
+            desc = tr('Select at least two analyzed combats to show aggregated statistics.')
+            self.show_info(tr('No combats selected'), desc)
+            return
+        aggregate = self.get_aggregate(combat_ids)
+        self._widgets.aggregate_statistic_combo.show()
+        self.show_aggregate_table(aggregate)
+        self._widgets.log_duration_value.setText('')
+        self._widgets.player_duration_value.setText('')
+        damage_out_item, damage_in_item, heal_out_item, heal_in_item = aggregate.root_items
+        self.damage_out_model.set_data(damage_out_item)
+        self.damage_in_model.set_data(damage_in_item)
+        self.heal_out_model.set_data(heal_out_item)
+        self.heal_in_model.set_data(heal_in_item)
+        self._tables.refresh_tables(
+            self.damage_out_model.player_index, self.damage_in_model.player_index,
+            self.heal_out_model.player_index, self.heal_in_model.player_index)
+        details = (
+            tr('Showing statistics of combats with ids') + ' ' + ', '.join(map(str, combat_ids)))
+        self.show_info(tr('Combats aggregated'), details)
+
+    def show_aggregate_table(self, aggregate: CombatAggregate):
+        """
+        Inserts the current aggregate statistic into the overview table and DPS bar plot.
+
+        Parameters:
+        - :param aggregate: aggregated combats
+        """
+        table_cell_data = aggregate.get_table(self.aggregate_statistic)
+        table_index = [name + handle for name, handle in aggregate.players]
+        self.overview_table_model.set_data(table_cell_data, TABLE_HEADER, table_index)
+        self._graphs.clear_overview_plots()
+        bar_table = [[*player, row[0]] for player, row in zip(aggregate.players, table_cell_data)]
+        self._graphs.plot_horizontal_bar(bar_table, self._graphs.dps_bar_plot)
+        self._graphs.dps_bar_plot.show_plot()
+
+    def set_aggregate_statistic(self, statistic: str):
+        """
+        Sets statistic shown in the overview table while aggregated combats are shown.
+
+        Parameters:
+        - :param statistic: one of `AGGREGATE_STATISTICS`
+        """
+        self.aggregate_statistic = statistic
+        if self._aggregate is not None and self._widgets.aggregate_statistic_combo.isVisible():
+            self.show_aggregate_table(self._aggregate[1])
+
+    def get_aggregate(self, combat_ids: list[int]) -> CombatAggregate:
+        """
+        Returns aggregate of the combats with `combat_ids`. The last aggregate and the data
+        extracted from each combat are cached until another log file is analyzed.
+
+        Parameters:
+        - :param combat_ids: ids of the combats to aggregate
+        """
+        id_set = frozenset(combat_ids)
+        if self._aggregate is not None and self._aggregate[0] == id_set:
+            return self._aggregate[1]
+        combat_columns = list()
+        for combat_id in combat_ids:
+            try:
+                columns = self._combat_columns[combat_id]
+            except KeyError:
+                columns = CombatColumns(self._parser.combats[combat_id])
+                self._combat_columns[combat_id] = columns
+            combat_columns.append(columns)
+        aggregate = CombatAggregate(combat_columns)
+        self._aggregate = (id_set, aggregate)
+        return aggregate
+
+    def plot_overview_graphs(self, combat: Combat, overview_table: list[tuple]):
+        """
+        Plots overview graphs of `combat` binned at the current graph resolution. The graphs are
+        re-binned from the fine overview graphs of the parser, so changing the resolution does not
+        require parsing the log again.
+
+        Parameters:
+        - :param combat: combat to plot
+        - :param overview_table: overview table rows of the combat
+        """
+        resolution = self._global_settings.graph_resolution
+        timelines = self.get_damage_timelines(combat)
+        dps_graph_data = dict()
+        dmg_bar_data = dict()
+        time_data = dict()
+        for player in combat.players.values():
+            if player.handle in timelines:
+                graph_time, dmg_graph, dps_graph = timelines[player.handle].bin(resolution)
+                dps_graph_data[player.handle] = dps_graph
+                dmg_bar_data[player.handle] = dmg_graph
+                time_data[player.handle] = graph_time
+            else:
+                dps_graph_data[player.handle] = player.DPS_graph_data
+                dmg_bar_data[player.handle] = player.DMG_graph_data
+                time_data[player.handle] = player.graph_time
+        self._graphs.plot_overview_data(
+                list(overview_table), dps_graph_data, dmg_bar_data, time_data, timelines)
+
+    def update_graph_resolution(self):
+        """
+        Re-bins the overview graphs of the currently shown combat at the current graph resolution.
+        """
+        try:
+            combat = self.current_combat
+        except IndexError:
+            return
+        overview_table = [(*player,) for player in combat.players.values()]
+        if len(overview_table) > 0:
+            overview_table.sort(key=lambda x: x[0])
+            self.plot_overview_graphs(combat, overview_table)
+
+    def get_damage_timelines(self, combat: Combat) -> dict[str, DamageTimeline]:
+        """
+        Returns the damage timelines of all players in `combat`, creating them on first access.
+
+        Parameters:
+        - :param combat: combat to get the timelines for
+        """
+        try:
+            return self._damage_timelines[combat.id]
+        except KeyError:
+            timelines = create_damage_timelines(combat)
+            self._damage_timelines[combat.id] = timelines
+            return timelines
+
     def save_combat(self, combat_info: tuple[int, str, str, str, str] | None):
         """
         Callback for save button.
@@ -289,11 +455,8 @@ class ParserBridge(QObject):
             self.show_info(tr('No combat selected'), desc)
             return
         combat = self._parser.combats[combat_info[0]]
-        filename = combat.map
-        if combat.difficulty is not None and combat.difficulty != '':
-            filename += ' ' + combat.difficulty
         combat_time = combat.start_time.strftime("%Y-%m-%d %H.%M")
-        filename += f' {combat_time}.log'
+        filename = get_combat_file_name(combat.map, combat.difficulty, combat.start_time) + '.log'
         preset_path = Path(self._global_settings.log_path).parent / filename
         path = browse_path(preset_path, 'Logfile (*.log);;Any File (*.*)', save=True)
         if path is None:
@@ -311,7 +474,7 @@ class ParserBridge(QObject):
 
     def export_combat_json(self, combat_info: tuple[int, str, str, str, str] | None):
         """
-        Exports current combat to JSON file
+        Exports current combat to JSON file or any other format of `EXPORT_FORMATS`
 
         Parameters:
         - :param combat_info: tuple of combat-identifying data (id, map, date, time, difficulty)
@@ -322,16 +485,14 @@ class ParserBridge(QObject):
             self.show_info(tr('No combat selected'), desc)
             return
         combat = self._parser.combats[combat_info[0]]
-        filename = combat.map
-        if combat.difficulty is not None and combat.difficulty != '':
-            filename += ' ' + combat.difficulty
         combat_time = combat.start_time.strftime("%Y-%m-%d %H.%M")
-        filename += f' {combat_time}.json'
+        filename = get_combat_file_name(
+                combat.map, combat.difficulty, combat.start_time) + self.export_format
         preset_path = Path(self._parser.log_path) / filename
-        path = browse_path(preset_path, 'JSON File (*.json);;Any File (*.*)', save=True)
+        path = browse_path(preset_path, get_export_filter(), save=True)
         if path is None:
             self.show_info(tr('Export cancelled'), tr('The export process was manually cancelled.'))
-        elif save_to_json(path, combat.get_export()):
+        elif export_combat(path, combat):
             desc = (
                 tr('Combat') + f' {combat_info[0]} ({combat.map} {combat_time}) '
                 + tr('was successfully exported to') + f' "{path.name}".')
@@ -342,9 +503,121 @@ class ParserBridge(QObject):
                 + tr('failed because OSCR could not write to the specified location.'))
             self.show_info(tr('Export failed'), desc)
 
+    @property
+    def export_format(self) -> str:
+        """
+        Returns file extension of the export format selected in the settings.
+        """
+        if self._global_settings.export_format in EXPORT_FORMATS:
+            return self._global_settings.export_format
+        return '.json'
+
+    def export_all_combats(self):
+        """
+        Exports all combats of the current log file into a folder selected by the user. Every
+        combat is written to a logfile; analyzed combats are additionally exported using the
+        export format from the settings. The files are written concurrently in a separate thread.
+        """
+        if not self._parser.log_path or not Path(self._parser.log_path).is_file():
+            desc = tr('Please analyze a log file before attempting to export its combats.')
+            self.show_info(tr('No combats analyzed'), desc)
+            return
+        if self._export_thread is not None and self._export_thread.is_alive():
+            desc = tr('Please wait for the running export to finish before starting another one.')
+            self.show_info(tr('Export running'), desc)
+            return
+        folder = browse_folder(Path(self._global_settings.log_path).parent)
+        if folder is None:
+            self.show_info(tr('Export cancelled'), tr('The export process was manually cancelled.'))
+            return
+        combats = [combat for combat in self._parser.combats if combat is not None]
+        self._export_thread = Thread(
+                target=self._export_combats,
+                args=(self._parser.log_path, combats, folder, self.export_format), daemon=True)
+        self._export_thread.start()
+        self.show_info(tr('Exporting combats'), str(folder))
+
+    def _export_combats(
+            self, log_path: str, combats: list[Combat], folder: Path, export_format: str):
+        """
+        Writes combats of a logfile into folder. Runs in a separate thread, files are written by a
+        thread pool. Both files of an analyzed combat are named after its start time.
+
+        Parameters:
+        - :param log_path: logfile containing the combats
+        - :param combats: analyzed combats of the logfile
+        - :param folder: folder to write the files to
+        - :param export_format: extension of the export format for analyzed combats
+        """
+        try:
+            isolated_combats = self._parser.isolate_combats(log_path)
+        except OSError:
+            desc = tr('Log file') + f' "{Path(log_path).name}" ' + tr('could not be read by OSCR.')
+            self.show_info(tr('Export failed'), desc)
+            return
+        used_names = set()
+
+        def get_file_name(map_name: str, difficulty: str | None, start_time: datetime) -> str:
+            name = get_combat_file_name(map_name, difficulty, start_time)
+            unique_name = name
+            duplicate_num = 1
+            while unique_name in used_names:
+                duplicate_num += 1
+                unique_name = f'{name} ({duplicate_num})'
+            used_names.add(unique_name)
+            return unique_name
+
+        tasks = list()
+        remaining_combats = list(combats)
+        for _, map_name, date, time, difficulty, start, end in isolated_combats:
+            # the combat borders of the analysis may differ slightly as it skips some lines
+            combat = next((
+                combat for combat in remaining_combats
+                if combat.file_pos[0] < end and start < combat.file_pos[1]), None)
+            if combat is None:
+                start_time = datetime.strptime(f'{date} {time}', '%Y-%m-%d %H:%M:%S')
+                name = get_file_name(map_name, difficulty, start_time)
+            else:
+                remaining_combats.remove(combat)
+                name = get_file_name(combat.map, combat.difficulty, combat.start_time)
+                tasks.append((
+                    name + export_format, export_combat,
+                    (folder / (name + export_format), combat)))
+            tasks.append((
+                name + '.log', copy_byte_ranges,
+                (Path(log_path), folder / f'{name}.log', ((start, end),))))
+        for combat in remaining_combats:
+            name = get_file_name(combat.map, combat.difficulty, combat.start_time)
+            tasks.append((
+                name + export_format, export_combat, (folder / (name + export_format), combat)))
+
+        failed_files = list()
+        with ThreadPoolExecutor(max_workers=min(EXPORT_WORKERS, len(tasks) or 1)) as executor:
+            futures = {
+                executor.submit(function, *args): file_name
+                for file_name, function, args in tasks}
+            for num, future in enumerate(as_completed(futures), 1):
+                self.show_info(tr('Exporting combats'), f'{num} / {len(tasks)}: {futures[future]}')
+                try:
+                    success = future.result()
+                except Exception:
+                    success = False
+                if not success:
+                    failed_files.append(futures[future])
+        if len(failed_files) > 0:
+            desc = (
+                tr('The following files could not be written to') + f' "{folder}": '
+                + ', '.join(failed_files))
+            self.show_info(tr('Export failed'), desc)
+        else:
+            desc = f'{len(tasks)} ' + tr('files were successfully exported to') + f' "{folder}".'
+            self.show_info(tr('Export successful'), desc)
+
     def trim_logfile(self, path: Path) -> bool:
         """
-        Removes all combats but the most recent one from a logfile
+        Removes all combats but the most recent one from a logfile. The kept combat is copied to a
+        temporary file that replaces the logfile. When enabled in the settings, the removed part is
+        archived next to the logfile; it is compressed in the background.
 
         Parameters:
         - :param path: path of logfile to be trimmed
@@ -354,7 +627,12 @@ class ParserBridge(QObject):
         combats = self._parser.isolate_combats(path, 1)
         if len(combats) < 1:
             return False
-        if oscr__extract_bytes(path, path, combats[0][5], combats[0][6]):
+        start, end = combats[0][5], combats[0][6]
+        if self._global_settings.archive_trimmed_logs and start > 0:
+            success = self.trim_and_archive_logfile(path, start, end)
+        else:
+            success = copy_byte_ranges(path, path, ((start, end),))
+        if success:
             desc = tr('Log file') + f' "{path.name}" ' + tr('was successfully trimmed.')
             self.show_info(tr('Log file trimmed'), desc)
             return True
@@ -363,6 +641,64 @@ class ParserBridge(QObject):
             self.show_info(tr('Trimming failed'), desc)
             return False
 
+    def trim_and_archive_logfile(self, path: Path, start: int, end: int) -> bool:
+        """
+        Replaces logfile with the bytes from `start` to `end` and keeps the original file under a
+        new name. Bytes before `start` are then compressed into an archive in a separate thread;
+        the original file is removed once the archive is complete.
+
+        Parameters:
+        - :param path: path of logfile to be trimmed
+        - :param start: first byte to keep
+        - :param end: end of the kept bytes
+
+        :return: True if successful, False if not
+        """
+        temp_path = path.with_name(f'.{path.name}.trim')
+        archive_name = f'{path.stem} {datetime.now().strftime("%Y-%m-%d %H.%M.%S")} trimmed'
+        original_path = path.with_name(archive_name + path.suffix)
+        archive_path = path.with_name(archive_name + path.suffix + '.gz')
+        if not copy_byte_ranges(path, temp_path, ((start, end),)):
+            temp_path.unlink(missing_ok=True)
+            return False
+        try:
+            os.replace(path, original_path)
+        except OSError:
+            temp_path.unlink(missing_ok=True)
+            return False
+        try:
+            os.replace(temp_path, path)
+        except OSError:
+            # restore the untrimmed logfile, for example when it is held open by the game
+            try:
+                os.replace(original_path, path)
+                temp_path.unlink(missing_ok=True)
+            except OSError:
+                pass
+            return False
+        Thread(
+                target=self._archive_trimmed_log, args=(original_path, archive_path, start),
+                daemon=True).start()
+        return True
+
+    def _archive_trimmed_log(self, original_path: Path, archive_path: Path, size: int):
+        """
+        Compresses the first `size` bytes of `original_path` into `archive_path` and deletes
+        `original_path` afterwards. Runs in a separate thread.
+        """
+        if archive_byte_range(original_path, archive_path, 0, size):
+            try:
+                original_path.unlink()
+            except OSError:
+                pass
+            desc = tr('Removed combats were archived to') + f' "{archive_path.name}".'
+            self.show_info(tr('Log file archived'), desc)
+        else:
+            desc = (
+                tr('Removed combats could not be compressed, the untrimmed log file was kept as')
+                + f' "{original_path.name}".')
+            self.show_info(tr('Archiving failed'), desc)
+
     def populate_split_combats_list(
             self, combat_list: CombatModel, log_file: Path | None = None) -> bool:
         """
@@ -450,13 +786,9 @@ class ParserBridge(QObject):
         for index in selected_indices:
             data = index.data()
             combat_intervals.append((data[5], data[6]))
-        combat_intervals.sort(key=lambda element: element[0])
         target_path = browse_path(source_path.parent, 'Logfile (*.log);;Any File (*.*)', save=True)
         if target_path is not None:
-            success = oscr__compose_logfile(
-                str(source_path), str(target_path), combat_intervals,
-                str(self._global_config.templog_folder_path))
-            if success:
+            if copy_byte_ranges(source_path, target_path, combat_intervals):
                 desc = tr('New log file has been saved to') + f' "{target_path.name}".'
                 self.show_info(tr('Spliting successful'), desc)
                 self._dialogs.show_message(tr('Split Logfile'), desc)
@@ -1,14 +1,17 @@
 from pathlib import Path
-from PySide6.QtCore import Qt
+from PySide6.QtCore import QModelIndex, Qt, QTimer
 from PySide6.QtGui import QIcon
 from PySide6.QtWidgets import (
     QFrame, QGridLayout, QHBoxLayout, QLineEdit, QListView, QListWidget, QListWidgetItem,
-    QTabWidget, QVBoxLayout, QWidget)
+    QTableView, QTabWidget, QVBoxLayout, QWidget)
 
 from .config import OSCRConfig, OSCRSettings
+from .analysistables import AnalysisTables
+from .datamodels import LibraryTableModel, SortingProxy
 from .dialogs import DetectionInfoDialog, DialogsWrapper
-from .iofunctions import browse_path, open_link
+from .iofunctions import browse_folder, browse_path, open_link
 from .leagueconnector import OSCRLeagueConnector
+from .library import CombatLibrary, LIBRARY_TABLE_HEADER
 from .parserbridge import ParserBridge
 from .splitdialog import SplitDialog
 from .theme import AppTheme
@@ -27,8 +30,8 @@ class OSCRLeftSidebar():
     def __init__(
             self, app_version: str, main_window: QWidget, parser: ParserBridge,
             detection_info: DetectionInfoDialog, dialogs: DialogsWrapper, widgets: WidgetManager,
-            league: OSCRLeagueConnector, theme: AppTheme, config: OSCRConfig,
-            settings: OSCRSettings):
+            league: OSCRLeagueConnector, library: CombatLibrary, tables: AnalysisTables,
+            theme: AppTheme, config: OSCRConfig, settings: OSCRSettings):
         """
         Parameters:
         - :param app_version: version of the app for display on the sidebar
@@ -38,6 +41,8 @@ class OSCRLeftSidebar():
         - :param dialogs: DialogsWrapper
         - :param widgets: WidgetManager
         - :param league: OSCRLeagueConnector
+        - :param library: CombatLibrary
+        - :param tables: AnalysisTables
         - :param theme: AppTheme
         - :param config: OSCRConfig
         - :param settings: OSCRSettings
@@ -48,11 +53,21 @@ class OSCRLeftSidebar():
         self._dialogs: DialogsWrapper = dialogs
         self._widgets: WidgetManager = widgets
         self._league: OSCRLeagueConnector = league
+        self._library: CombatLibrary = library
+        self._tables: AnalysisTables = tables
+        self._library_model: LibraryTableModel = LibraryTableModel(tr(LIBRARY_TABLE_HEADER))
+        self._library_sort: SortingProxy = SortingProxy()
+        self._library_sort.setSourceModel(self._library_model)
+        self._library_filter_timer: QTimer = QTimer()
+        self._library_filter_timer.setSingleShot(True)
+        self._library_filter_timer.setInterval(200)
         self._theme: AppTheme = theme
         self._config: OSCRConfig = config
         self._settings: OSCRSettings = settings
         self._split_dialog: SplitDialog = SplitDialog(main_window, parser, dialogs, theme)
         self.log_path_widget: QLineEdit
+        self.library_path_widget: QLineEdit
+        self.library_filter_widget: QLineEdit
 
     def create_sidebar(self, parent_frame: QFrame):
         """
@@ -64,6 +79,7 @@ class OSCRLeftSidebar():
         log_frame = create_frame(self._theme, style='medium_frame', size_policy=SMINMIN)
         league_frame = create_frame(self._theme, style='medium_frame', size_policy=SMINMIN)
         about_frame = create_frame(self._theme, style='medium_frame', size_policy=SMINMIN)
+        library_frame = create_frame(self._theme, style='medium_frame', size_policy=SMINMIN)
         sidebar_tabber = QTabWidget(parent_frame)
         sidebar_tabber.setStyleSheet(self._theme.get_style_class('QTabWidget', 'tabber'))
         sidebar_tabber.tabBar().hide()
@@ -71,10 +87,12 @@ class OSCRLeftSidebar():
         sidebar_tabber.addTab(log_frame, tr('Log'))
         sidebar_tabber.addTab(league_frame, tr('League'))
         sidebar_tabber.addTab(about_frame, tr('About'))
+        sidebar_tabber.addTab(library_frame, tr('Library'))
         self._widgets.sidebar_tabber = sidebar_tabber
         self._widgets.sidebar_tab_frames.append(log_frame)
         self._widgets.sidebar_tab_frames.append(league_frame)
         self._widgets.sidebar_tab_frames.append(about_frame)
+        self._widgets.sidebar_tab_frames.append(library_frame)
         layout = QVBoxLayout()
         layout.setContentsMargins(0, 0, 0, 0)
         layout.setSpacing(0)
@@ -84,6 +102,7 @@ class OSCRLeftSidebar():
         self.setup_left_sidebar_log(log_frame)
         self.setup_left_sidebar_league(league_frame)
         self.setup_left_sidebar_about(about_frame)
+        self.setup_left_sidebar_library(library_frame)
 
     def browse_log(self):
         """
@@ -116,6 +135,9 @@ class OSCRLeftSidebar():
         split_log_button.clicked.connect(
             lambda: self._split_dialog.show_dialog(self.log_path_widget.text()))
         head_layout.addWidget(split_log_button, alignment=ARIGHT)
+        library_button = create_icon_button(self._theme, 'library', tr('Combat Library'))
+        library_button.clicked.connect(lambda: self._widgets.sidebar_tabber.setCurrentIndex(3))
+        head_layout.addWidget(library_button, alignment=ARIGHT)
         left_layout.addLayout(head_layout)
 
         self.log_path_widget = QLineEdit(self._settings.log_path)
@@ -154,6 +176,7 @@ class OSCRLeftSidebar():
         combats_list.setStyleSheet(self._theme.get_style_class('QListView', 'listbox'))
         combats_list.setFont(self._theme.get_font('listbox'))
         combats_list.setAlternatingRowColors(True)
+        combats_list.setSelectionMode(QListView.SelectionMode.ExtendedSelection)
         combats_list.setSizePolicy(SMIXMIN)
         combats_list.setModel(self._parser.analyzed_combats)
         border_width = 1 * self._theme.scale
@@ -168,7 +191,7 @@ class OSCRLeftSidebar():
         combat_button_row = QGridLayout()
         combat_button_row.setContentsMargins(0, 0, 0, 0)
         combat_button_row.setSpacing(self._theme['defaults']['csp'])
-        combat_button_row.setColumnStretch(3, 1)
+        combat_button_row.setColumnStretch(5, 1)
         export_button = create_icon_button(self._theme, 'export-parse', tr('Export Combat'))
         combat_button_row.addWidget(export_button, 0, 0)
         more_combats_button = create_icon_button(
@@ -177,12 +200,21 @@ class OSCRLeftSidebar():
         json_export_button = create_icon_button(
             self._theme, 'json', tr('Export Combat to JSON File'))
         combat_button_row.addWidget(json_export_button, 0, 2)
+        aggregate_button = create_icon_button(
+            self._theme, 'aggregate', tr('Aggregate Selected Combats'))
+        combat_button_row.addWidget(aggregate_button, 0, 3)
+        export_all_button = create_icon_button(
+            self._theme, 'export-all', tr('Export All Combats'))
+        combat_button_row.addWidget(export_all_button, 0, 4)
         left_layout.addLayout(combat_button_row)
         more_combats_button.clicked.connect(self._parser.analyze_log_background)
         export_button.clicked.connect(
             lambda: self._parser.save_combat(combats_list.currentIndex().data()))
         json_export_button.clicked.connect(
             lambda: self._parser.export_combat_json(combats_list.currentIndex().data()))
+        export_all_button.clicked.connect(self._parser.export_all_combats)
+        aggregate_button.clicked.connect(lambda: self._parser.show_aggregate(
+            [index.data()[0] for index in combats_list.selectedIndexes()]))
 
         sep = create_frame(self._theme, 'medium_frame')
         sep.setFixedHeight(margin)
@@ -211,6 +243,122 @@ class OSCRLeftSidebar():
 
         parent_frame.setLayout(left_layout)
 
+    def setup_left_sidebar_library(self, parent_frame: QFrame):
+        """
+        Sets up the combat library tab of the left sidebar.
+
+        Parameters:
+        - :param parent_frame: frame that contains the library
+        """
+        margin = self._theme['defaults']['margin']
+        left_layout = QVBoxLayout()
+        left_layout.setContentsMargins(margin, margin, margin, margin)
+        left_layout.setSpacing(0)
+        left_layout.setAlignment(ATOP)
+
+        head_layout = QHBoxLayout()
+        head = create_label(self._theme, tr('Combat Library:'), 'label_heading')
+        head_layout.addWidget(head, alignment=ALEFT | ABOTTOM)
+        back_button = create_icon_button(self._theme, 'close', tr('Back to Combatlog'))
+        back_button.clicked.connect(lambda: self._widgets.sidebar_tabber.setCurrentIndex(0))
+        head_layout.addWidget(back_button, alignment=ARIGHT)
+        left_layout.addLayout(head_layout)
+
+        self.library_path_widget = QLineEdit(self._settings.library_path)
+        self.library_path_widget.setStyleSheet(self._theme.get_style_class('QLineEdit', 'entry'))
+        self.library_path_widget.setFont(self._theme.get_font('entry'))
+        self.library_path_widget.setSizePolicy(SMIXMAX)
+        self.library_path_widget.textChanged.connect(
+            lambda new_text: self._settings.set('library_path', new_text))
+        left_layout.addWidget(self.library_path_widget)
+
+        entry_button_config = {
+            tr('Browse ...'): {
+                'callback': self.browse_library, 'align': ALEFT,
+                'style': {'margin-left': 0}
+            },
+            tr('Scan'): {
+                'callback': lambda: self._library.scan(Path(self.library_path_widget.text())),
+                'align': ARIGHT, 'style': {'margin-right': 0}
+            }
+        }
+        entry_buttons = create_button_series(self._theme, entry_button_config, 'button')
+        entry_buttons.setContentsMargins(0, 0, 0, margin)
+        left_layout.addLayout(entry_buttons)
+
+        self.library_filter_widget = QLineEdit()
+        self.library_filter_widget.setPlaceholderText(tr('Elite player:name@handle dps>100000'))
+        self.library_filter_widget.setToolTip(
+            tr('Words match map, difficulty and players. Fields: map:, difficulty:, player:, '
+               'duration, players, date, dps and damage; compare using >, <, >=, <=, = or !='))
+        self.library_filter_widget.setStyleSheet(
+            self._theme.get_style_class('QLineEdit', 'entry'))
+        self.library_filter_widget.setFont(self._theme.get_font('entry'))
+        self.library_filter_widget.setSizePolicy(SMIXMAX)
+        self.library_filter_widget.textChanged.connect(self._library_filter_timer.start)
+        self._library_filter_timer.timeout.connect(self.refresh_library)
+        left_layout.addWidget(self.library_filter_widget)
+
+        library_table = QTableView()
+        table_style = {
+            'border-style': 'solid', 'border-width': '@bw', 'border-color': '@bc',
+            'margin-top': '@csp', 'margin-bottom': '@csp'}
+        self._tables.style_table(library_table, table_style, single_row_selection=True)
+        self._library_model.init_fonts(
+            self._theme.get_font('table_header'), self._theme.get_font('table'))
+        library_table.setModel(self._library_sort)
+        library_table.doubleClicked.connect(self.open_library_entry)
+        self._widgets.library_table = library_table
+        left_layout.addWidget(library_table, stretch=1)
+
+        count_layout = QHBoxLayout()
+        count_layout.setContentsMargins(0, 0, 0, 0)
+        count_layout.setSpacing(margin)
+        count_layout.setAlignment(ALEFT)
+        count_layout.addWidget(create_label(self._theme, tr('Combats:')))
+        self._widgets.library_count_value = create_label(self._theme, '')
+        count_layout.addWidget(self._widgets.library_count_value)
+        left_layout.addLayout(count_layout)
+
+        self._library.scan_finished.connect(self.refresh_library)
+        self.refresh_library()
+        parent_frame.setLayout(left_layout)
+
+    def browse_library(self):
+        """
+        Callback for library browse button.
+        """
+        current_path = Path(self.library_path_widget.text()).absolute()
+        path = browse_folder(current_path)
+        if path is not None:
+            self.library_path_widget.setText(str(path))
+            self._library.scan(path)
+
+    def refresh_library(self):
+        """
+        Lists library combats matching the current filter.
+        """
+        entries = self._library.query(self.library_filter_widget.text())
+        self._library_model.set_entries(entries)
+        self._widgets.library_table.resizeColumnsToContents()
+        self._widgets.library_count_value.setText(str(len(entries)))
+
+    def open_library_entry(self, index: QModelIndex):
+        """
+        Analyzes combat from the library.
+
+        Parameters:
+        - :param index: index of the double-clicked cell of the library table
+        """
+        entry = self._library_model.entries[self._library_sort.mapToSource(index).row()]
+        if self._library.is_current(entry):
+            self._parser.analyze_log_excerpt(Path(entry[10]), entry[11], entry[12])
+        else:
+            self._dialogs.show_message(
+                tr('Combat Library'),
+                tr('The log file containing this combat was changed or removed since it was '
+                   'scanned. Please scan the library again.'), 'warning')
+
     def setup_left_sidebar_league(self, parent_frame: QFrame):
         """
         Sets up the league table management tab of the left sidebar
@@ -0,0 +1,301 @@
+from math import ceil, log2
+
+from numpy import (
+    append as np__append, arange as np__arange, asarray as np__asarray,
+    column_stack as np__column_stack, concatenate as np__concatenate, float64,
+    linspace as np__linspace, maximum as np__maximum, minimum as np__minimum, ndarray,
+    ones as np__ones, repeat as np__repeat, searchsorted as np__searchsorted, stack as np__stack,
+    zeros as np__zeros, zeros_like as np__zeros_like)
+
+from OSCR import TreeItem
+from OSCR.combat import Combat
+
+# resolution the parser bins the overview graphs at; coarser graphs are re-binned from these
+MIN_RESOLUTION = 0.05
+
+
+class SeriesPyramid():
+    """
+    Min / max / mean pyramid of an evenly spaced series. Level 0 contains the original values, every
+    further level combines two neighboring points of the level below; a leftover last point forms a
+    point on its own. Two-dimensional values contain one series per row; all rows are aggregated
+    together.
+    """
+    __slots__ = ('start', 'step', 'length', 'levels')
+
+    def __init__(self, start: float, step: float, values: ndarray):
+        """
+        Parameters:
+        - :param start: time of the first value
+        - :param step: time between two values
+        - :param values: series values, one series per row if two-dimensional
+        """
+        self.start: float = start
+        self.step: float = step
+        self.levels: list[tuple[ndarray, ndarray, ndarray]] = [(values, values, values)]
+        self.length: int = values.shape[-1]
+        lower, upper, total = values, values, values
+        counts = np__ones(values.shape[-1])
+        while lower.shape[-1] > 2:
+            if lower.shape[-1] % 2 == 1:
+                # the last point forms a bucket on its own
+                lower = np__concatenate((lower, lower[..., -1:]), axis=-1)
+                upper = np__concatenate((upper, upper[..., -1:]), axis=-1)
+                total = np__concatenate((total, np__zeros_like(total[..., -1:])), axis=-1)
+                counts = np__append(counts, 0)
+            lower = np__minimum(lower[..., 0::2], lower[..., 1::2])
+            upper = np__maximum(upper[..., 0::2], upper[..., 1::2])
+            total = total[..., 0::2] + total[..., 1::2]
+            counts = counts[0::2] + counts[1::2]
+            self.levels.append((lower, upper, total / counts))
+
+    def select_level(
+            self, x_min: float, x_max: float, pixel_width: float,
+            points_per_pixel: float = 1) -> int:
+        """
+        Returns the finest level that does not show more than `points_per_pixel` points per pixel
+        in the visible range.
+
+        Parameters:
+        - :param x_min: left edge of the visible range
+        - :param x_max: right edge of the visible range
+        - :param pixel_width: width of the visible range in pixels
+        - :param points_per_pixel: maximum point density
+        """
+        visible_points = (x_max - x_min) / self.step
+        max_points = max(pixel_width * points_per_pixel, 1)
+        if visible_points <= max_points:
+            return 0
+        return min(ceil(log2(visible_points / max_points)), len(self.levels) - 1)
+
+    def level_step(self, level: int) -> float:
+        """
+        Returns the time between two points of `level`.
+        """
+        return self.step * 2 ** level
+
+    def get(self, level: int) -> tuple[ndarray, ndarray, ndarray, ndarray]:
+        """
+        Returns time, minimum, maximum and mean of the points in `level`. The time of each point is
+        the center of the original points it combines.
+
+        Parameters:
+        - :param level: pyramid level
+        """
+        lower, upper, mean = self.levels[level]
+        first_time = self.start + (2 ** level - 1) * self.step / 2
+        time = first_time + np__arange(mean.shape[-1]) * self.level_step(level)
+        if level > 0:
+            # the last point may combine fewer original points
+            last_bucket_start = (mean.shape[-1] - 1) * 2 ** level
+            time[-1] = self.start + (last_bucket_start + self.length - 1) * self.step / 2
+        return time, lower, upper, mean
+
+
+class TreeSeries():
+    """
+    Per-second graphs of the items of an analysis tree. The pyramid of an item is created the first
+    time the item is plotted and reused afterwards. Graphs shorter than the longest graph of the
+    tree are padded with zeros, so that all pyramids share the same time axis.
+    """
+    __slots__ = ('_root_item', '_time', '_pyramids')
+
+    def __init__(self, root_item: TreeItem):
+        """
+        Parameters:
+        - :param root_item: invisible root item of the tree
+        """
+        self._root_item: TreeItem = root_item
+        self._time: ndarray | None = None
+        self._pyramids: dict[TreeItem, SeriesPyramid] = dict()
+
+    @property
+    def time(self) -> ndarray:
+        """
+        Time axis of all graphs of the tree.
+        """
+        if self._time is None:
+            length = 0
+            items = list(self._root_item._children)
+            while len(items) > 0:
+                item = items.pop()
+                length = max(length, getattr(item.graph_data, 'size', 0))
+                items.extend(item._children)
+            self._time = np__arange(length)
+        return self._time
+
+    def pyramid(self, item: TreeItem) -> SeriesPyramid:
+        """
+        Returns pyramid of the graph of `item`, creating it if necessary.
+
+        Parameters:
+        - :param item: item of the tree
+        """
+        pyramid = self._pyramids.get(item)
+        if pyramid is None:
+            length = len(self.time)
+            graph_length = getattr(item.graph_data, 'size', 0)
+            if graph_length == length:
+                values = np__asarray(item.graph_data, dtype=float64)
+            else:
+                values = np__zeros(length, dtype=float64)
+                values[:graph_length] = item.graph_data[:graph_length]
+            pyramid = SeriesPyramid(0, 1, values)
+            self._pyramids[item] = pyramid
+        return pyramid
+
+    def values(self, item: TreeItem) -> ndarray:
+        """
+        Returns per-second graph of `item`.
+
+        Parameters:
+        - :param item: item of the tree
+        """
+        return self.pyramid(item).levels[0][2]
+
+    def get(
+            self, items: list[TreeItem], level: int
+            ) -> tuple[ndarray, ndarray, ndarray, ndarray]:
+        """
+        Returns time and minimum, maximum and mean of `items` in `level`, one row per item.
+
+        Parameters:
+        - :param items: items of the tree
+        - :param level: pyramid level
+        """
+        time = None
+        lower_rows, upper_rows, mean_rows = list(), list(), list()
+        for item in items:
+            time, lower, upper, mean = self.pyramid(item).get(level)
+            lower_rows.append(lower)
+            upper_rows.append(upper)
+            mean_rows.append(mean)
+        return time, np__stack(lower_rows), np__stack(upper_rows), np__stack(mean_rows)
+
+
+class DamageTimeline():
+    """
+    Damage graph of one player over the whole combat as binned by the parser. Allows re-binning the
+    damage at any multiple of the parser resolution; binned series are cached per resolution.
+    """
+    __slots__ = ('damage', 'step', 'first_point', 'last_point', '_bins')
+
+    def __init__(self, damage: ndarray, step: float, first_point: int, last_point: int):
+        """
+        Parameters:
+        - :param damage: damage per graph point, counted from the beginning of the combat
+        - :param step: duration of one graph point in seconds
+        - :param first_point: graph point of the players first attack
+        - :param last_point: graph point of the players last attack
+        """
+        self.damage: ndarray = damage
+        self.step: float = step
+        self.first_point: int = first_point
+        self.last_point: int = last_point
+        self._bins: dict[int, tuple[ndarray, ndarray, ndarray]] = dict()
+
+    def bin(self, resolution: float) -> tuple[ndarray, ndarray, ndarray]:
+        """
+        Returns time, damage and DPS graph of the players active combat time binned at
+        `resolution`, computed the same way as the graphs created by the parser. `resolution` is
+        rounded to a multiple of the parser resolution.
+
+        Parameters:
+        - :param resolution: length of one bin in seconds
+        """
+        factor = max(round(resolution / self.step), 1)
+        try:
+            return self._bins[factor]
+        except KeyError:
+            pass
+        resolution = factor * self.step
+        first_bin = self.first_point // factor
+        last_bin = self.last_point // factor + 1
+        damage = self.damage[first_bin * factor:(last_bin + 1) * factor]
+        bin_count = last_bin - first_bin + 1
+        damage_graph = np__zeros(bin_count * factor, dtype=float64)
+        damage_graph[:len(damage)] = damage
+        damage_graph = damage_graph.reshape(bin_count, factor).sum(axis=1)
+        graph_time = np__linspace(
+                resolution * (first_bin + 1), resolution * (last_bin + 1), bin_count)
+        dps_graph = damage_graph.cumsum() / (graph_time - resolution * first_bin)
+        self._bins[factor] = graph_time, damage_graph, dps_graph
+        return self._bins[factor]
+
+
+def create_damage_timelines(combat: Combat) -> dict[str, DamageTimeline]:
+    """
+    Creates damage timelines from the overview graphs of an analyzed combat. Returns dictionary
+    mapping player handles to their damage timeline.
+
+    Parameters:
+    - :param combat: analyzed combat
+    """
+    step = combat.graph_resolution
+    timelines = dict()
+    for player in combat.players.values():
+        if len(player.graph_time) == 0 or player.handle not in combat.overview_graphs:
+            continue
+        # the parser places graph point `n` at `step * (n + 1)`
+        first_point = round(player.graph_time[0] / step) - 1
+        last_point = round(player.graph_time[-1] / step) - 2
+        timelines[player.handle] = DamageTimeline(
+                combat.overview_graphs[player.handle], step, first_point, last_point)
+    return timelines
+
+
+def visible_slice(time: ndarray, x_min: float, x_max: float) -> slice:
+    """
+    Returns slice selecting the points of `time` inside of the visible range, including one point
+    on each side so that lines continue beyond the edges of the plot.
+
+    Parameters:
+    - :param time: sorted time values
+    - :param x_min: left edge of the visible range
+    - :param x_max: right edge of the visible range
+    """
+    first = max(int(np__searchsorted(time, x_min)) - 1, 0)
+    last = int(np__searchsorted(time, x_max, side='right')) + 1
+    return slice(first, last)
+
+
+def finer_resolution(
+        base_resolution: float, x_min: float, x_max: float, pixel_width: float,
+        points_per_pixel: float = 1) -> float | None:
+    """
+    Returns a resolution finer than `base_resolution` if the visible range has room for more
+    points, `None` otherwise. Resolutions are `base_resolution` divided by powers of two, rounded
+    to a multiple of `MIN_RESOLUTION`, so that cached series can be reused when zooming back and
+    forth.
+
+    Parameters:
+    - :param base_resolution: resolution of the pyramid base
+    - :param x_min: left edge of the visible range
+    - :param x_max: right edge of the visible range
+    - :param pixel_width: width of the visible range in pixels
+    - :param points_per_pixel: maximum point density
+    """
+    desired_resolution = (x_max - x_min) / max(pixel_width * points_per_pixel, 1)
+    if desired_resolution >= base_resolution or base_resolution / 2 < MIN_RESOLUTION:
+        return None
+    divisor_exponent = ceil(log2(base_resolution / desired_resolution))
+    resolution = base_resolution / 2 ** divisor_exponent
+    while resolution < MIN_RESOLUTION:
+        resolution *= 2
+    resolution = max(round(resolution / MIN_RESOLUTION), 1) * MIN_RESOLUTION
+    if resolution >= base_resolution:
+        return None
+    return resolution
+
+
+def envelope(time: ndarray, lower: ndarray, upper: ndarray) -> tuple[ndarray, ndarray]:
+    """
+    Interleaves minimum and maximum of each point, so that a line plot shows the full value range
+    of every aggregated point.
+
+    Parameters:
+    - :param time: time of the points
+    - :param lower: minimum values
+    - :param upper: maximum values
+    """
+    return np__repeat(time, 2), np__column_stack((lower, upper)).ravel()
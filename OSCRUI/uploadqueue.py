@@ -0,0 +1,170 @@
+"""Persistent queue of combats waiting to be uploaded to the league tables"""
+
+from hashlib import sha1
+import json
+import os
+from pathlib import Path
+from uuid import uuid4
+
+from .iofunctions import archive_byte_range, save_to_json
+
+# bytes at the beginning and the end of a combat used to detect changed log files
+FINGERPRINT_SIZE = 4096
+
+
+class StaleUploadError(Exception):
+    """Raised when the log file of a queued combat was changed since the combat was queued"""
+
+
+def get_range_fingerprint(log_path: Path, start: int, end: int) -> str:
+    """
+    Returns hash of the first and last bytes of the range from `start` to `end` of `log_path`.
+    Appending to the log file does not change the fingerprint of a range.
+
+    Parameters:
+    - :param log_path: path to uncompressed log file
+    - :param start: first byte of the range
+    - :param end: byte after the end of the range
+    """
+    fingerprint = sha1(f'{start}:{end}'.encode())
+    with open(log_path, 'rb') as file:
+        file.seek(start)
+        fingerprint.update(file.read(min(FINGERPRINT_SIZE, end - start)))
+        file.seek(max(end - FINGERPRINT_SIZE, start))
+        fingerprint.update(file.read(min(FINGERPRINT_SIZE, end - start)))
+    return fingerprint.hexdigest()
+
+
+class QueuedUpload():
+    """Combat waiting to be uploaded"""
+    __slots__ = ('id', 'name', 'log_path', 'start', 'end', 'attempts', 'fingerprint')
+
+    def __init__(
+            self, id: str, name: str, log_path: str, start: int, end: int, attempts: int = 0,
+            fingerprint: str = ''):
+        """
+        Parameters:
+        - :param id: unique id of the queue entry
+        - :param name: name of the combat shown to the user
+        - :param log_path: path to the log file containing the combat
+        - :param start: first byte of the combat in the log file
+        - :param end: byte after the end of the combat
+        - :param attempts: number of failed upload attempts
+        - :param fingerprint: fingerprint of the combat in the log file, see
+        `get_range_fingerprint`
+        """
+        self.id: str = id
+        self.name: str = name
+        self.log_path: str = log_path
+        self.start: int = start
+        self.end: int = end
+        self.attempts: int = attempts
+        self.fingerprint: str = fingerprint
+
+    def to_dict(self) -> dict:
+        return {attribute: getattr(self, attribute) for attribute in self.__slots__}
+
+
+class UploadQueue():
+    """
+    Combats waiting to be uploaded. The queue is stored in a JSON file, so that uploads continue
+    after the app is restarted. Before its first upload attempt, each combat is compressed into a
+    file in the spool folder, which is sent to the server; the spool file keeps the combat available
+    even if the log file is changed or removed in the meantime. Combats whose log file was trimmed
+    or repaired before they were compressed are refused.
+    """
+
+    def __init__(self, queue_file: Path, spool_folder: Path):
+        """
+        Parameters:
+        - :param queue_file: JSON file storing the queue
+        - :param spool_folder: folder containing the compressed combats
+        """
+        self._queue_file: Path = queue_file
+        self._spool_folder: Path = spool_folder
+        self._items: dict[str, QueuedUpload] = dict()
+        try:
+            with queue_file.open('r') as file:
+                for item in json.load(file):
+                    self._items[item['id']] = QueuedUpload(**item)
+        except (OSError, ValueError, TypeError, KeyError):
+            pass
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    @property
+    def items(self) -> list[QueuedUpload]:
+        return list(self._items.values())
+
+    def add(self, name: str, log_path: str, start: int, end: int) -> QueuedUpload:
+        """
+        Adds combat to the queue and returns the new entry.
+
+        Parameters:
+        - :param name: name of the combat shown to the user
+        - :param log_path: path to the log file containing the combat
+        - :param start: first byte of the combat in the log file
+        - :param end: byte after the end of the combat
+        """
+        try:
+            fingerprint = get_range_fingerprint(Path(log_path), start, end)
+        except OSError:
+            fingerprint = ''  # compressing the combat will fail as well
+        item = QueuedUpload(uuid4().hex, name, log_path, start, end, fingerprint=fingerprint)
+        self._items[item.id] = item
+        self.save()
+        return item
+
+    def remove(self, item: QueuedUpload):
+        """
+        Removes entry and its spool file from the queue.
+        """
+        self._items.pop(item.id, None)
+        self.spool_path(item).unlink(missing_ok=True)
+        self.save()
+
+    def record_failure(self, item: QueuedUpload):
+        """
+        Counts failed upload attempt of entry.
+        """
+        item.attempts += 1
+        self.save()
+
+    def spool_path(self, item: QueuedUpload) -> Path:
+        """
+        Returns path of the compressed combat of entry.
+        """
+        return self._spool_folder / f'{item.id}.gz'
+
+    def prepare(self, item: QueuedUpload, compression_level: int) -> Path:
+        """
+        Compresses the combat of entry into the spool folder unless that was done before. Returns
+        path to the compressed combat. Raises `StaleUploadError` when the combat is no longer at
+        its position in the log file. Can be called from any thread.
+
+        Parameters:
+        - :param item: queue entry
+        - :param compression_level: gzip compression level from 0 (none) to 9 (smallest)
+        """
+        spool_path = self.spool_path(item)
+        if spool_path.is_file():
+            return spool_path
+        if item.fingerprint != '' and item.fingerprint != get_range_fingerprint(
+                Path(item.log_path), item.start, item.end):
+            raise StaleUploadError(
+                    'Log file was changed after the combat was queued.', item.log_path)
+        self._spool_folder.mkdir(exist_ok=True)
+        temp_path = spool_path.with_suffix('.part')
+        if not archive_byte_range(
+                Path(item.log_path), temp_path, item.start, item.end, compression_level):
+            temp_path.unlink(missing_ok=True)
+            raise OSError('Could not read combat from log file.', item.log_path)
+        os.replace(temp_path, spool_path)
+        return spool_path
+
+    def save(self) -> bool:
+        """
+        Writes queue to its JSON file. Returns `True` on success, `False` on failure.
+        """
+        return save_to_json(self._queue_file, [item.to_dict() for item in self._items.values()])
@@ -23,12 +23,15 @@ class WidgetManager():
         self.combats_list: QListView
         self.log_duration_value: QLabel
         self.player_duration_value: QLabel
+        self.library_table: QTableView
+        self.library_count_value: QLabel
 
         self.overview_menu_buttons: list[QPushButton] = list()
         self.overview_tabber: QTabWidget
         self.overview_tab_frames: list[QFrame] = list()
         self.overview_table_button: FlipButton
         self.overview_splitter: QSplitter
+        self.aggregate_statistic_combo: QComboBox
 
         self.analysis_splitter: QSplitter
         self.analysis_menu_buttons: list[QPushButton] = list()
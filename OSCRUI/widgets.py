@@ -1,17 +1,20 @@
 from math import sqrt, frexp
-from typing import Iterable
+from typing import Callable, Iterable
 
 import numpy as np
-from pyqtgraph import AxisItem, BarGraphItem, PlotWidget, setConfigOptions as pyqtgraph__configure
-from PySide6.QtCore import QRect, QSize, Qt, Slot
+from pyqtgraph import (
+    AxisItem, BarGraphItem, mkBrush, PlotDataItem, PlotWidget,
+    setConfigOptions as pyqtgraph__configure)
+from PySide6.QtCore import QRect, QSize, Qt, QTimer, Slot
 from PySide6.QtGui import QFont, QIcon, QMouseEvent, QPainter, QPen, QPixmap
 from PySide6.QtWidgets import (
     QFrame, QHBoxLayout, QLabel, QPushButton, QSizeGrip, QStyle, QStyledItemDelegate, QVBoxLayout,
     QWidget)
 
-from .datamodels import TreeItem
+from .datamodels import TreeItem, TreeModel
 from .widgetbuilder import ACENTER, AVCENTER, SMAXMAX, SMINMIN, create_frame, create_label
 from .theme import AppTheme
+from .timeseries import envelope, TreeSeries, visible_slice
 
 
 pyqtgraph__configure(antialias=True)
@@ -273,7 +276,16 @@ class LegendPlot(QFrame):
     """Represents a plot widget with legend below the plot area."""
 
     def __init__(
-            self, theme: AppTheme, x_unit: str = '', y_unit: str = '', y_font: str = 'plot_widget'):
+            self, theme: AppTheme, x_unit: str = '', y_unit: str = '', y_font: str = 'plot_widget',
+            zoomable: bool = False):
+        """
+        Parameters:
+        - :param theme: reference to AppTheme for styling
+        - :param x_unit: unit of the x-axis
+        - :param y_unit: unit of the y-axis
+        - :param y_font: font of the y-axis labels
+        - :param zoomable: allows zooming and panning along the x-axis; double click resets zoom
+        """
         super().__init__()
         self._theme: AppTheme = theme
         self.setStyleSheet(self._theme.get_style('plot_widget'))
@@ -286,10 +298,23 @@ class LegendPlot(QFrame):
         self._plot.setAxisItems({'left': left_axis, 'bottom': bottom_axis})
         self._plot.setStyleSheet(self._theme.get_style('plot_widget_nullifier'))
         self._plot.setBackground(None)
-        self._plot.setMouseEnabled(False, False)
         self._plot.setMenuEnabled(False)
         self._plot.hideButtons()
         self._plot.setDefaultPadding(padding=0)
+        self._home_range: tuple[float, float] | None = None
+        if zoomable:
+            self._plot.setMouseEnabled(True, False)
+            self._plot.getViewBox().setAutoVisible(y=True)
+            self._plot.scene().sigMouseClicked.connect(self.reset_zoom_on_double_click)
+        else:
+            self._plot.setMouseEnabled(False, False)
+        self._lod_callback: Callable[[float, float, float], None] | None = None
+        self._lod_timer: QTimer = QTimer()
+        self._lod_timer.setSingleShot(True)
+        self._lod_timer.setInterval(0)
+        self._lod_timer.timeout.connect(self.update_level_of_detail)
+        self._plot.getViewBox().sigXRangeChanged.connect(self._lod_timer.start)
+        self._plot.getViewBox().sigResized.connect(self._lod_timer.start)
         self._layout = QVBoxLayout()
         self._layout.setContentsMargins(0, 0, 0, 0)
         self._layout.setSpacing(self._theme['defaults']['isp'])
@@ -309,6 +334,9 @@ class LegendPlot(QFrame):
         self._plot.getAxis(side).setTicks(tick_labels)
 
     def clear(self):
+        self._lod_callback = None
+        self._home_range = None
+        self._plot.setLimits(xMin=None, xMax=None)
         self._plot.clear()
         QWidget().setLayout(self._legend.layout())
         self._plot.hide()
@@ -322,8 +350,50 @@ class LegendPlot(QFrame):
     def set_x_range(self, min, max, padding):
         self._plot.setXRange(min, max, padding)
 
-    def plot(self, x_data: tuple, y_data: tuple, pen: QPen):
-        self._plot.plot(x_data, y_data, pen=pen)
+    def set_home_range(self, x_min: float, x_max: float):
+        """
+        Shows the range from `x_min` to `x_max` and restricts zooming and panning to this range.
+
+        Parameters:
+        - :param x_min: left edge of the range
+        - :param x_max: right edge of the range
+        """
+        self._home_range = (x_min, x_max)
+        self._plot.setLimits(xMin=x_min, xMax=x_max)
+        self._plot.setXRange(x_min, x_max, padding=0)
+
+    def reset_zoom_on_double_click(self, event):
+        """
+        Shows the full range again when the plot is double clicked.
+        """
+        if event.double() and self._home_range is not None:
+            self._plot.setXRange(*self._home_range, padding=0)
+            event.accept()
+
+    def plot(self, x_data: tuple, y_data: tuple, pen: QPen) -> PlotDataItem:
+        return self._plot.plot(x_data, y_data, pen=pen)
+
+    def set_level_of_detail_callback(self, callback: Callable[[float, float, float], None]):
+        """
+        Sets function that updates the plotted data when the visible range or the size of the plot
+        changes. Repeated changes are combined into one call. The callback is removed when the plot
+        is cleared.
+
+        Parameters:
+        - :param callback: called with left and right edge of the visible range and the width of
+        the plot area in pixels
+        """
+        self._lod_callback = callback
+        self.update_level_of_detail()
+
+    def update_level_of_detail(self):
+        """
+        Calls level of detail callback with the current visible range.
+        """
+        if self._lod_callback is not None:
+            view_box = self._plot.getViewBox()
+            (x_min, x_max), _ = view_box.viewRange()
+            self._lod_callback(x_min, x_max, view_box.width())
 
     def create_legend(self, colors_and_names: Iterable[tuple[str]]) -> QFrame:
         """
@@ -394,80 +464,190 @@ class AnalysisPlot(LegendPlot):
     """
     PlotWidget for plotting the analysis plot.
     """
-    def __init__(self, theme: AppTheme, colors: tuple[str]):
+    def __init__(self, theme: AppTheme, colors: tuple[str], tree_model: TreeModel):
         """
         Parameters:
         - :param theme: reference to AppTheme for styling
         - :param colors: tuple with at least 5 different colors that are used to paint the bars
+        - :param tree_model: model of the analysis tree whose items are plotted
         """
         super().__init__(theme, x_unit='s')
         self._theme: AppTheme = theme
-        self._bar_queue: list[BarGraphItem] = list()
+        self._tree_model: TreeModel = tree_model
+        self._bars: BarGraphItem = BarGraphItem(x=[], width=0.18, height=[], brushes=[], pen=None)
         self._legend_queue: list[QFrame] = list()
         self._bar_item_queue: list[TreeItem] = list()
+        self._bar_data_queue: list[tuple[np.ndarray, np.ndarray]] = list()
+        self._bar_position_queue: list[int] = list()
         self._bar_position: int = 0
+        self._selection_series: TreeSeries | None = None
+        self._selection_items: list[TreeItem] = list()
+        self._selection_stacked: bool = False
+        self._selection_curves: list[PlotDataItem] = list()
         self._colors: tuple[str] = colors
+        self._brushes: tuple = tuple(mkBrush(color) for color in colors)
         self._frozen: bool = True
         self._legend_layout: QHBoxLayout = QHBoxLayout()
         margin = self._theme['defaults']['margin']
         self._legend_layout.setContentsMargins(0, 0, 0, 0)
         self._legend_layout.setSpacing(margin)
         self._legend.setLayout(self._legend_layout)
+        self._plot.addItem(self._bars)
         self._plot.show()
 
     def add_bar(self, item: TreeItem):
         """
-        Adds plot item to plot widget and removes plot item if there are more than 5 currently
-        displayed.
+        Adds bars of item to the plot and removes the oldest bars if there are more than 5 items
+        currently displayed.
 
         Parameters:
-        - :param item: object with property ".graph_data", containing the height of the bars
+        - :param item: item of the analysis tree
 
         :return: returns the color that the graph was created with for the legend
         """
         if self._frozen or item in self._bar_item_queue:
             return
-        data = item.graph_data
-        time_reference = np.arange(len(data))
-        group_width = 0.9
-        bar_width = group_width / 5
-        bar_offset = - (group_width / 2) + 0.5 * bar_width + self._bar_position * bar_width
-        time_data = np.subtract(time_reference, bar_offset)
+        if len(self._selection_curves) > 0:
+            self.clear()
         brush_color = self._colors[self._bar_position]
-        bars = BarGraphItem(x=time_data, width=bar_width, height=data, brush=brush_color, pen=None)
-        annotation = item.get_data(0)
-        if isinstance(annotation, tuple):
-            annotation = annotation[0] + annotation[1]
-        legend_item = self.create_legend_item(brush_color, annotation)
-        if len(self._bar_queue) >= 5:
-            self._plot.removeItem(self._bar_queue.pop(0))
+        legend_item = self.create_legend_item(brush_color, self.get_item_name(item))
+        if len(self._bar_item_queue) >= 5:
             self._bar_item_queue.pop(0)
+            self._bar_data_queue.pop(0)
+            self._bar_position_queue.pop(0)
             legend_item_to_remove = self._legend_queue.pop(0)
             self._legend_layout.removeWidget(legend_item_to_remove)
             legend_item_to_remove.setParent(None)
-        self._bar_queue.append(bars)
         self._bar_item_queue.append(item)
-        self._plot.addItem(bars)
+        series = self._tree_model.series
+        self._bar_data_queue.append((series.time, series.values(item)))
+        self._bar_position_queue.append(self._bar_position)
         self._legend_queue.append(legend_item)
         self._legend_layout.addWidget(legend_item)
+        self.update_bars()
         self._bar_position += 1
         if self._bar_position >= 5:
             self._bar_position = 0
         return brush_color
 
+    def update_bars(self):
+        """
+        Combines the bars of all displayed items into the single bar item of the plot.
+        """
+        group_width = 0.9
+        bar_width = group_width / 5
+        bar_x = list()
+        bar_heights = list()
+        bar_brushes = list()
+        for (time, data), position in zip(self._bar_data_queue, self._bar_position_queue):
+            bar_offset = - (group_width / 2) + 0.5 * bar_width + position * bar_width
+            bar_x.append(time - bar_offset)
+            bar_heights.append(data)
+            bar_brushes.extend([self._brushes[position]] * len(data))
+        if len(bar_x) > 0:
+            self._bars.setOpts(
+                    x=np.concatenate(bar_x), height=np.concatenate(bar_heights), width=bar_width,
+                    brushes=bar_brushes)
+        else:
+            self._bars.setOpts(x=[], height=[], width=bar_width, brushes=[])
+
+    def plot_selection(self, items: list[TreeItem], stacked: bool = False):
+        """
+        Replaces the contents of the plot with the graphs of all `items`, drawn as lines or as
+        stacked areas.
+
+        Parameters:
+        - :param items: items of the analysis tree
+        - :param stacked: stacks the graphs on top of each other when True
+        """
+        if len(items) == 0:
+            return
+        self.clear()
+        self._selection_series = self._tree_model.series
+        self._selection_items = items
+        self._selection_stacked = stacked
+        color_count = len(self._colors)
+        for num, item in enumerate(items):
+            color = self._colors[num % color_count]
+            if stacked:
+                curve = PlotDataItem(
+                        pen=None, fillLevel=0, brush=self._brushes[num % color_count])
+            else:
+                curve = PlotDataItem(pen=color)
+            self._selection_curves.append(curve)
+            if num < color_count:
+                legend_item = self.create_legend_item(color, self.get_item_name(item))
+                self._legend_queue.append(legend_item)
+                self._legend_layout.addWidget(legend_item)
+        if len(items) > color_count:
+            legend_item = self.create_legend_item(
+                    self._theme['defaults']['fg'], f'+{len(items) - color_count}')
+            self._legend_queue.append(legend_item)
+            self._legend_layout.addWidget(legend_item)
+        # lower layers of a stack are added last to be painted on top of the upper layers
+        for curve in reversed(self._selection_curves) if stacked else self._selection_curves:
+            self._plot.addItem(curve)
+        # fixed range, autoranging would follow the visible slice of the data
+        self._plot.setXRange(0, max(len(self._selection_series.time) - 1, 1))
+        self.set_level_of_detail_callback(self.update_selection)
+
+    def update_selection(self, x_min: float, x_max: float, pixel_width: float):
+        """
+        Updates the graphs of the plotted selection using the pyramid level that fits the plot
+        width. Used as level of detail callback.
+
+        Parameters:
+        - :param x_min: left edge of the visible range
+        - :param x_max: right edge of the visible range
+        - :param pixel_width: width of the visible range in pixels
+        """
+        series = self._selection_series
+        if len(series.time) == 0:
+            return
+        level = series.pyramid(self._selection_items[0]).select_level(x_min, x_max, pixel_width)
+        time, lower, upper, mean = series.get(self._selection_items, level)
+        visible = visible_slice(time, x_min, x_max)
+        time = time[visible]
+        lower, upper, mean = lower[:, visible], upper[:, visible], mean[:, visible]
+        if self._selection_stacked:
+            for curve, values in zip(self._selection_curves, mean.cumsum(axis=0)):
+                curve.setData(time, values)
+        elif level == 0:
+            for curve, values in zip(self._selection_curves, mean):
+                curve.setData(time, values)
+        else:
+            for curve, row_lower, row_upper in zip(self._selection_curves, lower, upper):
+                curve.setData(*envelope(time, row_lower, row_upper))
+
+    def get_item_name(self, item: TreeItem) -> str:
+        """
+        Returns name of `item` to show in the legend.
+        """
+        annotation = item.get_data(0)
+        if isinstance(annotation, tuple):
+            annotation = annotation[0] + annotation[1]
+        return annotation
+
     def clear(self):
         """
-        Removes all bars from the plot
+        Removes all bars and graphs from the plot
         """
-        for bar in self._bar_queue:
-            self._plot.removeItem(bar)
-        self._bar_queue = list()
         for legend_item in self._legend_queue:
             self._legend_layout.removeWidget(legend_item)
             legend_item.setParent(None)
+        for curve in self._selection_curves:
+            self._plot.removeItem(curve)
+        self._lod_callback = None
+        self._plot.enableAutoRange(x=True)
+        self._selection_curves = list()
+        self._selection_series = None
+        self._selection_items = list()
         self._legend_queue = list()
         self._bar_item_queue = list()
+        self._bar_data_queue = list()
+        self._bar_position_queue = list()
         self._bar_position = 0
+        self.update_bars()
 
     def toggle_freeze(self, state):
         """